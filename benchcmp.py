@@ -0,0 +1,83 @@
+
+#       .|/
+# (\/)(o,,,o)(\/)
+
+# compares two runs of make bench, flagging anything that got worse
+# 
+#   python benchcmp.py baseline.json current.json [tolerance percent]
+# 
+# runs are matched by workload, heap size and live percent. exits 1 if any measure
+# got worse by more than the tolerance, 10 percent unless given.
+
+import json
+import sys
+
+# measure, and whether more of it is better
+MEASURES = [
+    ( 'allocationsPerSecond' , True  ),
+    ( 'sumGcNs'              , False ),
+    ( 'pauseP50Ns'           , False ),
+    ( 'pauseP99Ns'           , False ),
+    ( 'mutatorUtilization'   , True  ),
+]
+
+def load( path ):
+    runs = {}
+    with open( path ) as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            run = json.loads( line )
+            runs[ ( run['workload'], run['heapMegabytes'], run['livePercent'] ) ] = run
+    return runs
+
+def change( before, after ):
+    if before == 0:
+        return 0.0 if after == 0 else float( 'inf' )
+    return 100.0 * ( after - before ) / before
+
+def main():
+    if len( sys.argv ) not in [ 3, 4 ]:
+        sys.stderr.write( 'usage : %s baseline.json current.json [tolerance percent]\n' % sys.argv[ 0 ] )
+        sys.exit( 2 )
+    
+    baseline  = load( sys.argv[ 1 ] )
+    current   = load( sys.argv[ 2 ] )
+    tolerance = float( sys.argv[ 3 ] ) if len( sys.argv ) == 4 else 10.0
+    
+    regressions = 0
+    
+    for key in sorted( current ):
+        name = '%s:%s:%s' % key
+        
+        if key not in baseline:
+            sys.stdout.write( '%-24s not in baseline\n' % name )
+            continue
+        
+        for measure, moreIsBetter in MEASURES:
+            before  = baseline[ key ][ measure ]
+            after   = current[ key ][ measure ]
+            percent = change( before, after )
+            worse   = -percent if moreIsBetter else percent
+            flag    = ''
+            
+            if worse > tolerance:
+                flag = '  REGRESSION'
+                regressions += 1
+            
+            sys.stdout.write(
+                '%-24s %-22s %16s -> %-16s %+8.1f%%%s\n' % (
+                    name, measure, before, after, percent, flag
+                )
+            )
+    
+    for key in sorted( baseline ):
+        if key not in current:
+            sys.stdout.write( '%-24s missing from this run\n' % ( '%s:%s:%s' % key ) )
+    
+    if regressions:
+        sys.stdout.write( '%d regressions past %s%%\n' % ( regressions, tolerance ) )
+        sys.exit( 1 )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+
+#include <stdio.h>
+
+// gc benchmarks, run by make bench. appended to the gc generated from data/EXAMPLE.
+// 
+//   bench <workload> <heap megabytes> <live percent> <allocations>
+// 
+// first keeps a list of the workload's objects alive until they take up about the
+// given percentage of the heap, then allocates the given number of objects more,
+// keeping only the last few of them alive. only that second part is measured, and
+// is written to stdout as a single line of json. everything is seeded the same each
+// run, so runs of the same arguments do the same work.
+// 
+
+#define zBENCH_SEED 0x5eed5eed5eed5eedllu
+
+static inline
+uint64_t
+bench__random(
+  uint64_t * state
+){
+  * state ^= * state << 13 ;
+  * state ^= * state >> 7  ;
+  * state ^= * state << 17 ;
+  return * state ;
+}
+
+static char bench__text [ 1024 ] ;
+
+// short lived churn, single small objects
+// 
+static inline
+uint64_t
+bench__make_churn(
+  struct zGc * gc       ,
+  uint64_t     reg      ,
+  uint64_t *   state
+){
+  zUNUSED( state );
+  
+  zGc__set( gc, reg, zGc__new_uint64( gc ) );
+  return 1 ;
+}
+
+// a tree of depth Cons cells with uint64 leaves, using registers 4 on up
+// 
+static inline
+uint64_t
+bench__make_tree(
+  struct zGc * gc    ,
+  uint64_t     reg   ,
+  uint64_t     depth
+){
+  if( ! depth ){
+    zGc__set( gc, reg, zGc__new_uint64( gc ) );
+    return 1 ;
+  }
+  
+  uint64_t made = 0 ;
+  
+  made += bench__make_tree( gc, 4 + 2 * depth    , depth - 1 );
+  made += bench__make_tree( gc, 4 + 2 * depth + 1, depth - 1 );
+  
+  struct zII node = zGc__new_Cons( gc );
+  zTYPE_Cons * cons = zGc__data( gc, node );
+  
+  cons->car = zGc__get( gc, 4 + 2 * depth     );
+  cons->cdr = zGc__get( gc, 4 + 2 * depth + 1 );
+  
+  zGc__set( gc, 4 + 2 * depth    , zRESERVED_NULL );
+  zGc__set( gc, 4 + 2 * depth + 1, zRESERVED_NULL );
+  zGc__set( gc, reg, node );
+  
+  return made + 1 ;
+}
+
+static inline
+uint64_t
+bench__make_trees(
+  struct zGc * gc    ,
+  uint64_t     reg   ,
+  uint64_t *   state
+){
+  zUNUSED( state );
+  
+  return bench__make_tree( gc, reg, 6 );
+}
+
+// a list of 16 Cons cells holding uint64s
+// 
+static inline
+uint64_t
+bench__make_cons(
+  struct zGc * gc    ,
+  uint64_t     reg   ,
+  uint64_t *   state
+){
+  zUNUSED( state );
+  
+  zGc__set( gc, reg, zRESERVED_NULL );
+  
+  for( uint64_t jj = 0 ; jj < 16 ; jj ++ ){
+    zGc__set( gc, 4, zGc__new_uint64( gc ) );
+    
+    struct zII cell = zGc__new_Cons( gc );
+    zTYPE_Cons * cons = zGc__data( gc, cell );
+    
+    cons->car = zGc__get( gc, 4   );
+    cons->cdr = zGc__get( gc, reg );
+    
+    zGc__set( gc, reg, cell );
+  }
+  
+  zGc__set( gc, 4, zRESERVED_NULL );
+  return 32 ;
+}
+
+// Strings of up to a kilobyte and SmallStrings, mixed
+// 
+static inline
+uint64_t
+bench__make_strings(
+  struct zGc * gc    ,
+  uint64_t     reg   ,
+  uint64_t *   state
+){
+  uint64_t random = bench__random( state );
+  
+  if( random & 1 ){
+    zGc__set( gc, reg, zGc__new_SmallString( gc, ( random >> 1 ) % 256, bench__text ) );
+  } else {
+    zGc__set( gc, reg, zGc__new_String( gc, ( random >> 1 ) % sizeof( bench__text ), bench__text ) );
+  }
+  
+  return 1 ;
+}
+
+// objects with cfrees, half of which free a malloc of their own
+// 
+static inline
+uint64_t
+bench__make_finalizers(
+  struct zGc * gc    ,
+  uint64_t     reg   ,
+  uint64_t *   state
+){
+  if( bench__random( state ) & 1 ){
+    zGc__set( gc, reg, zGc__new_fixed64( gc ) );
+  } else {
+    zGc__set( gc, reg, zGc__new_Noise( gc ) );
+  }
+  
+  return 1 ;
+}
+
+// objects whose mallocs are freed a batch at a time by a cfreebatch
+// 
+static inline
+uint64_t
+bench__make_buffers(
+  struct zGc * gc    ,
+  uint64_t     reg   ,
+  uint64_t *   state
+){
+  zUNUSED( state );
+  
+  zGc__set( gc, reg, zGc__new_Buffer( gc ) );
+  return 1 ;
+}
+
+struct bench__workload {
+  const char * name ;
+  uint64_t  (* make)( struct zGc * gc, uint64_t reg, uint64_t * state ) ;
+};
+
+static const struct bench__workload bench__workloads [] = {
+  { "churn"      , bench__make_churn      },
+  { "trees"      , bench__make_trees      },
+  { "cons"       , bench__make_cons       },
+  { "strings"    , bench__make_strings    },
+  { "finalizers" , bench__make_finalizers },
+  { "buffers"    , bench__make_buffers    },
+};
+
+static inline
+uint64_t
+bench__used_bytes(
+  struct zGc * gc
+){
+  return ( gc->nextII.indirectionIndex + gc->nextSI.slotIndex ) * zSLOT_SIZE ;
+}
+
+int main(
+  int     argc ,
+  char ** argv
+){
+  if( argc != 5 ){
+    fprintf( stderr, "usage : %s <workload> <heap megabytes> <live percent> <allocations>\n", argv[ 0 ] );
+    return 2 ;
+  }
+  
+  const struct bench__workload * workload = NULL ;
+  for( uint64_t jj = 0 ; jj < sizeof( bench__workloads ) / sizeof( bench__workloads[ 0 ] ) ; jj ++ ){
+    if( ! strcmp( argv[ 1 ], bench__workloads[ jj ].name ) ){
+      workload = & bench__workloads[ jj ] ;
+    }
+  }
+  
+  if( ! workload ){
+    fprintf( stderr, "unknown workload %s\n", argv[ 1 ] );
+    return 2 ;
+  }
+  
+  uint64_t heapBytes   = strtoull( argv[ 2 ], NULL, 10 ) * 1024 * 1024 ;
+  uint64_t livePercent = strtoull( argv[ 3 ], NULL, 10 ) ;
+  uint64_t allocations = strtoull( argv[ 4 ], NULL, 10 ) ;
+  uint64_t state       = zBENCH_SEED ;
+  
+  memset( bench__text, 'x', sizeof( bench__text ) );
+  
+  struct zGc * gc = zGc__create( heapBytes );
+  
+  // the long lived, kept in a list in register 0
+  
+  while( bench__used_bytes( gc ) < gc->numSlots * zSLOT_SIZE / 100 * livePercent ){
+    workload->make( gc, 2, & state );
+    
+    struct zII cell = zGc__new_Cons( gc );
+    zTYPE_Cons * cons = zGc__data( gc, cell );
+    
+    cons->car = zGc__get( gc, 2 );
+    cons->cdr = zGc__get( gc, 0 );
+    
+    zGc__set( gc, 0, cell );
+    zGc__set( gc, 2, zRESERVED_NULL );
+  }
+  
+  zGc__collect( gc );
+  
+  // only what follows is measured, so the pause times start over
+  
+  gc->longestGc = 0 ;
+  gc->sumGc     = 0 ;
+  gc->pauses    = 0 ;
+  memset( gc->pauseHistogram, 0, sizeof( gc->pauseHistogram ) );
+  
+  uint64_t collectionsBefore    = gc->collections    ;
+  uint64_t bytesAllocatedBefore = gc->bytesAllocated ;
+  uint64_t made                 = 0 ;
+  uint64_t start                = zGc__now() ;
+  
+  // the short lived, the last few of which are kept in registers 1 and 3
+  
+  for( uint64_t round = 0 ; made < allocations ; round ++ ){
+    made += workload->make( gc, 1 + 2 * ( round % 2 ), & state );
+  }
+  
+  uint64_t elapsed = zGc__now() - start ;
+  
+  struct zGcStats stats ;
+  zGc__stats_snapshot( gc, & stats );
+  
+  uint64_t bytesAllocated = gc->bytesAllocated - bytesAllocatedBefore ;
+  double   seconds        = (double) elapsed / 1e9 ;
+  
+  printf(
+    "{ \"workload\" : \"%s\", \"heapMegabytes\" : %" PRIu64 ", \"livePercent\" : %" PRIu64
+    ", \"allocations\" : %" PRIu64 ", \"bytesAllocated\" : %" PRIu64 ", \"elapsedNs\" : %" PRIu64
+    ", \"allocationsPerSecond\" : %.0f, \"bytesPerSecond\" : %.0f, \"collections\" : %" PRIu64
+    ", \"sumGcNs\" : %" PRIu64 ", \"pauses\" : %" PRIu64 ", \"pauseP50Ns\" : %" PRIu64
+    ", \"pauseP99Ns\" : %" PRIu64 ", \"pauseP999Ns\" : %" PRIu64 ", \"longestPauseNs\" : %" PRIu64
+    ", \"mutatorUtilization\" : %.4f }\n" ,
+    workload->name                                              ,
+    heapBytes / 1024 / 1024                                     ,
+    livePercent                                                 ,
+    made                                                        ,
+    bytesAllocated                                              ,
+    elapsed                                                     ,
+    seconds > 0 ? (double) made / seconds : 0.0                 ,
+    seconds > 0 ? (double) bytesAllocated / seconds : 0.0       ,
+    gc->collections - collectionsBefore                         ,
+    stats.sumGc                                                 ,
+    stats.pauses                                                ,
+    stats.pauseP50                                              ,
+    stats.pauseP99                                              ,
+    stats.pauseP999                                             ,
+    stats.longestGc                                             ,
+    elapsed ? 1.0 - (double) stats.sumGc / (double) elapsed : 1.0
+  );
+  
+  return 0 ;
+}
@@ -1,6 +1,56 @@
 
 #include <stdio.h>
 
+// old objects referencing young ones have to survive a minor collection, and be
+// rewritten by it, even when there's no nursery for the write barrier to remember them
+// 
+static
+int
+test__collect_minor_without_nursery(
+  void
+){
+  struct zGc * gc = zGc__create( 16 * 1024 * 1024 );
+  
+  // an old cons and weak reference
+  zGc__set( gc, 0, zGc__new_Cons( gc ) );
+  zGc__set( gc, 1, zGc__new_Weak( gc ) );
+  zGc__collect( gc );
+  
+  // leaving garbage below a young fixed64 so it has to move
+  for( int junk = 0 ; junk < 1000 ; junk ++ ){
+    zGc__new_uint64( gc );
+  }
+  
+  struct zII young = zGc__new_fixed64( gc );
+  ** (uint64_t **) zGc__data( gc, young ) = 42 ;
+  zGc__set( gc, 2, young );
+  
+  zTYPE_Cons * cons = zGc__data( gc, zGc__get( gc, 0 ) );
+  zGc__store( gc, zGc__get( gc, 0 ), & cons->car, young );
+  
+  zTYPE_Weak * weak = zGc__data( gc, zGc__get( gc, 1 ) );
+  zGc__store( gc, zGc__get( gc, 1 ), & weak->target, young );
+  
+  uint64_t finalizers = gc->finalizers ;
+  
+  zGc__collect_minor( gc );
+  
+  cons = zGc__data( gc, zGc__get( gc, 0 ) );
+  weak = zGc__data( gc, zGc__get( gc, 1 ) );
+  
+  if(
+    gc->finalizers != finalizers
+    || cons->car.indirectionIndex != zGc__get( gc, 2 ).indirectionIndex
+    || zGc__load_weak( gc, & weak->target ).indirectionIndex != zGc__get( gc, 2 ).indirectionIndex
+    || ** (uint64_t **) zGc__data( gc, cons->car ) != 42
+  ){
+    printf( "collect_minor without a nursery lost an old object's young reference\n" );
+    return 0 ;
+  }
+  
+  return 1 ;
+}
+
 int main(
   int argc     ,
   char ** argv 
@@ -9,6 +59,10 @@ int main(
   zUNUSED( argc );
   zUNUSED( argv );
   
+  if( ! test__collect_minor_without_nursery() ){
+    return 1 ;
+  }
+  
   struct zGc * gc = zGc__create( 2000000000 );
   if( ! gc ){
     printf( "failed to allocate a new gc\n" );
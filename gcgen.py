@@ -15,13 +15,37 @@
 # c-type : struct { struct II car ; struct II cdr ;};
 # walk   : { yield( &this->car ) ; yield( &this->cdr ) ;};
 # 
+# or, for types whose ii's are all plain fields, see FIELDS-NOTES
+# 
+# cfields : car, cdr
+# 
 
 # __create( size )          -> mmap and initialize a new gc region of the specified size
+# __create_growable( size, maximumSize ) -> same, but the region can grow up to maximumSize
+# __create_with_options( size, maximumSize, options ) -> same, with zCREATE_* options for huge pages and prefaulting
+# __open( path, size )      -> map a gc from a file, making a new one of the given size if it's empty, see PERSIST-NOTES
+# __sync()                  -> write a file backed gc out to its file
+# __pin( ii ) / __unpin( ii ) -> keep an object alive and its data where it is until unpinned
+# __new_many_<type>( n, out, ... ) -> make n objects of a type at once, see BATCH-NOTES
+# __serialize( root, buffer ) -> write root and everything reachable from it to a buffer, see SERIALIZE-NOTES
+# __deserialize( buffer )   -> copy what was written to a buffer into the gc, returning the copy of its root
+# __stats_snapshot( stats )  -> fill in a struct zGcStats with the counters, pause percentiles and utilization, see STATS-NOTES
+# __census_snapshot( census ) -> fill in a struct zGcTypeCensus for each type, with its name and counts, see CENSUS-NOTES
+# __trace( ago )            -> what the collection ago collections before the last did, phase by phase, see TRACE-NOTES
+# __set_trace_hook( hook, context ) -> have hook called as each phase of a collection starts and stops
 # __alloc( register, size ) -> allocate a gc object with the given amount of storage in the given register
 # __cast( ii, type )        -> mark the new object as being of the given type, presumably after readying it
 # __set( register, ii )     -> set a register to ii ( if you put in an invalid ii, you've ruined everything )
 # __get( register )         -> get from a register
+# __push_root( ii ) / __pop_roots( n ) -> keep ii alive on the root stack, returning its index there, see ROOTS-NOTES
+# __get_root( index ) / __set_root( index, ii ) -> same as __get and __set, for the root stack
+# __enter_frame() / __leave_frame( frame ) -> pop everything pushed onto the root stack in between
 # __data( ii )              -> it's your job to know what the data means
+# __store( ii, field, ii )  -> store an ii into a field of an object, telling the gc in case the object is old
+# __load_weak( field )      -> read a cweak or cephemeron field, see WEAK-NOTES
+# __collect_minor()         -> collect only what was allocated since the last collection
+# __collect_step( ns )      -> work on an incremental collection for about that long
+# __run_finalizers( ns )    -> run deferred cfrees for about that long, returning how many are left, see DEFER-NOTES
 
 # any and all pointers and ii's are invalidated whenever you call __collect
 # calling __alloc can call __collect, so you have to make an unlikely check
@@ -44,8 +68,12 @@ TEMPLATE = r"""
 #include <sys/mman.h>
 #include <errno.h>
 #include <string.h>
+#include <stddef.h>
 #include <inttypes.h>
 #include <time.h>
+#include <unistd.h>
+#include <fcntl.h>
+#include <sys/stat.h>
 
 // abort on panic vs mere exit
 #define zABORT 0
@@ -55,8 +83,93 @@ TEMPLATE = r"""
 #define zNUM_REGISTERS    $NUMREGISTERS
 #define zNUM_UNIQUE_TYPES $UNIQUETYPES
 #define zNUM_OBJECT_TYPES $OBJECTTYPES
+#define zWEAK_TYPES       $WEAKTYPES // types with a cweak or cephemeron, see WEAK-NOTES
+#define zFREE_BATCH_TYPES $FREEBATCHTYPES // types with a cfreebatch, see BATCHFREE-NOTES
+#define zEPHEMERON_TYPES  $EPHEMERONTYPES
 #define zSLOT_SIZE        $SLOTSIZE
 
+// generational collection, see GENERATION-NOTES
+// a nursery of 0 slots disables minor collections entirely
+// 
+#define zNURSERY_SLOTS    $NURSERYSLOTS
+#define zPROMOTE_AFTER    $PROMOTEAFTER
+
+// incremental collection, see INCREMENTAL-NOTES
+// how many objects each allocation marks while a collection cycle is running,
+// 0 never starts cycles on its own ( zGc__collect_step still can )
+// 
+#define zINCREMENTAL_WORK $INCREMENTALWORK
+
+// concurrent marking, see CONCURRENT-NOTES
+// whether collection cycles hand their marking to a helper thread
+// 
+#define zCONCURRENT_MARKING $CONCURRENTMARKING
+
+// parallel marking, see PARALLEL-NOTES
+// how many threads share the marking done in a single pause
+// 
+#define zMARK_THREADS $MARKTHREADS
+
+// parallel compaction, see COMPACTION-NOTES
+// how many threads share renumbering and compacting
+// 
+#define zCOMPACT_THREADS $COMPACTTHREADS
+
+// heap sizing, see HEAPSIZE-NOTES
+// the percentage of the heap full collections should leave in use, or 0 to leave its size be
+// 
+#define zTARGET_LIVE_RATIO $LIVERATIO
+
+// large objects, see LARGE-NOTES
+// objects of at least this many bytes get a mapping of their own, 0 keeps everything in the slots
+// 
+#define zLARGE_OBJECT_BYTES $LARGEOBJECTBYTES
+
+// tracing, see TRACE-NOTES
+// how many collections are kept in the trace ring, and whether phases fire usdt probes
+// 
+#define zTRACE_RING   $TRACERING
+#define zUSDT_PROBES  $USDTPROBES
+
+#if zUSDT_PROBES
+#include <sys/sdt.h>
+#endif
+
+// stable handles, see STABLE-NOTES
+// whether indirections stay put, with the dead kept on a free list, instead of being compacted
+// 
+#define zSTABLE_HANDLES $STABLEHANDLES
+
+// deferred finalization, see DEFER-NOTES
+// whether cfrees are queued to run after the pause, and whether a thread of their own runs them
+// 
+#define zDEFER_FINALIZERS $DEFERFINALIZERS
+#define zFINALIZER_THREAD $FINALIZERTHREAD
+
+// options for zGc__create_with_options, see HUGEPAGE-NOTES
+// 
+#define zCREATE_HUGETLB  1 // back the heap with preallocated huge pages, else as zCREATE_HUGEPAGE
+#define zCREATE_HUGEPAGE 2 // ask for transparent huge pages
+#define zCREATE_POPULATE 4 // fault in the initial size up front
+#define zCREATE_FILE     8 // set on heaps mapped from a file by zGc__open, see PERSIST-NOTES
+
+#define zHUGE_PAGE_SIZE ( 2llu * 1024 * 1024 )
+
+// the pause histogram, see STATS-NOTES
+// 
+#define zPAUSE_SUB_BUCKETS 8 // 1 << 3, which zGc__pause_bucket relies on
+#define zPAUSE_BUCKETS     ( 62 * zPAUSE_SUB_BUCKETS ) // enough for any uint64_t
+
+// what zGc__open checks a heap file against before using it, see PERSIST-NOTES
+// 
+#define zHEAP_MAGIC 0x317061654863477allu // "zGcHeap1"
+#define zSPEC_HASH  $SPECHASH
+
+#if zCONCURRENT_MARKING || zMARK_THREADS > 1 || zCOMPACT_THREADS > 1 || zFINALIZER_THREAD
+#include <pthread.h>
+#include <sched.h>
+#endif
+
 // define object type here and then determine the available immediate size based on it
 // ( max of uint32, then question the user's sanity ? )
 // ( or allow them to also specify a desired indirection size, which will allow manual control for wastage )
@@ -105,10 +218,14 @@ $TYPEENUMERATIONS
 // 
 $TYPEDEFS
 
+// what an indirection's immediate field may hold besides 0 and 1
+#define zLARGE_OBJECT 2 // the slot holds a pointer to the object's own mapping, see LARGE-NOTES
+#define zPINNED       3 // the slot data must not move, see PINNING-NOTES
+
 struct zIndirection {
   struct zOT objectType ;
-  char       immediate  ;
-  char       _reserved  ;
+  char       immediate  ; // 1 when the data is kept in the indirection itself, or zLARGE_OBJECT
+  char       age        ; // minor collections survived while young, remembered flag once old
   union {
     struct zSI as_slotIndex ;
     // hopefully, there will be no spacing ( because char ) and this will
@@ -147,19 +264,198 @@ z__static_assertions(
     "slots must be a multiple of uint64_t's"
   );
   
+  _Static_assert(
+    zPROMOTE_AFTER > 0 && zPROMOTE_AFTER < 127,
+    "objects must be promoted after between 1 and 126 minor collections"
+  );
+  
+  _Static_assert(
+    zMARK_THREADS > 0,
+    "marking needs at least the collecting thread"
+  );
+  
+  _Static_assert(
+    zCOMPACT_THREADS > 0,
+    "compaction needs at least the collecting thread"
+  );
+  
+  _Static_assert(
+    zTARGET_LIVE_RATIO >= 0 && zTARGET_LIVE_RATIO < 100,
+    "the target live ratio must be a percentage below 100, or 0 to not resize"
+  );
+  
 }
 
+#define zCYCLE_IDLE        0
+#define zCYCLE_MARKING     1
+#define zCYCLE_RENUMBERING 2
+
+// the phases of a collection, as traced, see TRACE-NOTES
+// 
+#define zTRACE_ROOTS    0 // setting up the cycle and pushing the roots
+#define zTRACE_MARK     1
+#define zTRACE_RENUMBER 2 // filling in the rewrite array
+#define zTRACE_COMPACT  3 // moving and counting the survivors, and finalizing the dead
+#define zTRACE_REWRITE  4 // rewriting the roots, and keeping the heap size
+#define zTRACE_PHASES   5
+
+// what's recorded of each collection, times in nanoseconds, see TRACE-NOTES
+// 
+struct zGcTrace {
+  uint64_t collection        ; // how many collections came before it
+  uint64_t minor             ; // whether it only looked at the young generation
+  uint64_t startedAt         ; // zGc__now() when it began
+  uint64_t finishedAt        ;
+  uint64_t phaseTimes [ zTRACE_PHASES ] ; // paused in each phase, over every slice
+  uint64_t liveObjects       ; // the counts it added to those in struct zGc
+  uint64_t indirectionShifts ;
+  uint64_t slotShifts        ;
+  uint64_t referenceRewrites ;
+  uint64_t promotions        ;
+  uint64_t finalizers        ;
+  uint64_t bytesReclaimed    ;
+};
+
+// the state of a collection in progress, kept between slices of incremental work
+// 
+struct zCycle {
+  uint32_t   phase             ;
+  
+  struct zII floorII           ; // everything below the floors is alive without being looked at
+  struct zSI floorSI           ;
+  uint32_t   promoteAfter      ;
+  
+  struct zII snapshotII        ; // everything allocated since the cycle began is alive as well
+  
+  struct zII limitII           ; // allocations while the cycle runs must stay clear of its scratch space
+  struct zSI limitSI           ;
+  
+  struct zSI livemapSI         ;
+  struct zSI rewritesSI        ;
+  struct zSI slotmapSI         ; // where live slot data starts, with @stableHandles, see STABLE-NOTES
+  uint64_t   livemapSlots      ;
+  
+  uint32_t   descentIndex      ;
+  uint32_t   finalDescentIndex ;
+  
+  uint64_t   renumberChunk     ;
+  uint32_t   nextNewII         ;
+  
+  struct zGcTrace trace        ; // added to the trace ring once the cycle finishes
+  
+  #if zCONCURRENT_MARKING
+  pthread_t  marker            ;
+  int        markerRunning     ;
+  int        markerDone        ; // set by the marker when it runs out of work
+  int        stopMarker        ; // set by the mutator when it can't wait any longer
+  uint32_t   numShaded         ; // shaded by the mutator, stored at the far end of the rewrite array
+  uint32_t   shadedConsumed    ; // how many of those the marker has scanned
+  #endif
+};
+
+// what's kept for each object type, indexed by objectType, see CENSUS-NOTES
+// 
+struct zTypeCounts {
+  uint64_t allocations    ;
+  uint64_t bytesAllocated ; // as asked for
+  uint64_t liveObjects    ; // survivors of the last collection
+  uint64_t liveBytes      ; // and what they take up in the heap
+  uint64_t oldObjects     ; // of those, the ones in the old generation
+  uint64_t oldBytes       ;
+  uint64_t finalizers     ;
+};
+
+// what a dead object left for its cfree to run on, once the pause is over, see DEFER-NOTES
+// 
+struct zFinalizerEntry {
+  uint16_t objectType ;
+  uint16_t large      ; // data holds where the object's mapping is, rather than a copy of it
+  uint32_t count      ; // of objects whose data it holds, more than one for a cfreebatch
+  uint64_t size       ; // of data, rounded up to a whole number of entry headers
+  char     data []    ;
+};
+
+// entries are packed one after the other, those before start having been run
+// 
+struct zFinalizerQueue {
+  char *   entries ;
+  uint64_t start   ;
+  uint64_t size    ;
+  uint64_t max     ;
+};
+
+// the dead of a cfreebatch type, their data copied one after the other, see BATCHFREE-NOTES
+// 
+struct zFreeBatch {
+  char *   objects ;
+  uint64_t count   ;
+  uint64_t max     ;
+};
+
 struct zGc {
+  uint64_t    magic                        ; // zHEAP_MAGIC, see PERSIST-NOTES
+  uint64_t    specHash                     ; // zSPEC_HASH of the spec the heap was made for
+  uint32_t    slotSize                     ; // zSLOT_SIZE
+  uint32_t    numRegisters                 ; // zNUM_REGISTERS
+  uint64_t    headerSize                   ; // sizeof( struct zGc ), which changes along with the generator
+  
   uint64_t    numSlots                     ; // how many total slots are available to the gc?
+  uint64_t    minSlots                     ; // the heap never shrinks below this many slots
+  uint64_t    maxSlots                     ; // nor grows past this many, for which address space is reserved
+  uint64_t    options                      ; // the zCREATE_* options the heap ended up with
   
   uint64_t    remainingSlots               ; // number of slots left available to use
   uint64_t    collectionSlots              ; // number of slots needed to perform a collection
   
   struct zII  nextII                       ; // what is the index of the next indirection available to the gc?
   struct zSI  nextSI                       ; // what is the index of the next slot available to the gc?
+  
+  struct zII  freeII                       ; // the lowest free indirection, with @stableHandles, see STABLE-NOTES
+  uint64_t    numFree                      ; // and how many there are
+  
+  uint32_t    allocationLimitII            ; // allocations below this ii may take the fast path, see ALLOCATION-NOTES
+  uint64_t    allocationLimit              ; // so long as indirections plus slots in use stay within this
   struct zII  registers [ zNUM_REGISTERS ] ; // root set
   
+  struct zII  oldII                        ; // indirections below this are in the old generation
+  struct zSI  oldSI                        ; // slots below this belong to the old generation
+  
+  struct zII * remembered                  ; // old objects that may reference young ones
+  uint64_t     numRemembered               ;
+  uint64_t     maxRemembered               ;
+  
+  uint64_t    usedAfterCollection          ; // indirections plus slots in use when the last collection finished
+  
+  uint64_t    largeObjects                 ; // how many large objects are mapped, see LARGE-NOTES
+  uint64_t    largeBytes                   ; // and how many bytes their mappings take up
+  uint64_t    largeBytesSinceCollection    ; // bytes mapped for large objects since the last collection
+  
+  struct zII * pinned                      ; // objects pinned by zGc__pin, once for each time, see PINNING-NOTES
+  uint64_t     numPinned                   ;
+  uint64_t     maxPinned                   ;
+  
+  struct zII * roots                       ; // the root stack, see ROOTS-NOTES
+  uint64_t     numRoots                    ;
+  uint64_t     maxRoots                    ;
+  
+  struct zFinalizerQueue finalizing        ; // cfrees left for zGc__run_finalizers, see DEFER-NOTES
+  uint64_t     pendingFinalizers           ; // queued here or with the finalizer thread, and not yet run
+  
+  struct zFreeBatch freeBatches [ zNUM_OBJECT_TYPES + 1 ] ; // by objectType, see BATCHFREE-NOTES
+  
+  #if zFINALIZER_THREAD
+  pthread_t              finalizer         ;
+  int                    finalizerStarted  ;
+  pthread_mutex_t        finalizerLock     ;
+  pthread_cond_t         finalizerWake     ;
+  struct zFinalizerQueue handedOff         ; // waiting on the finalizer thread, under finalizerLock
+  #endif
+  
+  struct zCycle cycle                      ; // the collection currently in progress, if any
+  
   uint64_t collections           ;
+  uint64_t minorCollections      ;
+  uint64_t promotions            ;
   uint64_t allocations           ;
   uint64_t bytesAllocated        ;
   uint64_t indirectionsAllocated ;
@@ -168,10 +464,26 @@ struct zGc {
   uint64_t referenceRewrites     ;
   uint64_t slotShifts            ;
   uint64_t finalizers            ;
+  uint64_t bytesReclaimed        ; // slot and large object bytes freed by collections
+  uint64_t weakCleared           ; // weak references and ephemerons cleared, see WEAK-NOTES
+  uint64_t weakObjects           ; // of weak types, live after the last collection plus allocated since
+  uint64_t lastBytesReclaimed    ; // and by the last one alone
+  
+  struct zTypeCounts types [ zNUM_OBJECT_TYPES + 1 ] ; // by objectType, see CENSUS-NOTES
   
   // time kept in nanoseconds
   uint64_t longestGc ;
   uint64_t sumGc     ;
+  uint64_t pauses    ; // how many pauses make up sumGc
+  uint64_t startedAt ; // when the heap was created, or opened again, see STATS-NOTES
+  
+  uint64_t pauseHistogram [ zPAUSE_BUCKETS ] ; // pauses counted by length, see STATS-NOTES
+  
+  struct zGcTrace traces [ zTRACE_RING ] ; // the last collections, see TRACE-NOTES
+  uint64_t        numTraces              ; // ever recorded, the next goes in traces[ numTraces % zTRACE_RING ]
+  
+  void (* traceHook)( struct zGc * gc, uint32_t phase, int ending, void * context ) ; // see zGc__set_trace_hook
+  void *  traceContext ;
   
   union zSlot slots [] ; // gc'd data
 };
@@ -296,6 +608,21 @@ zGc__finalmap__marked(
   return !! ( (* zGc__finalmap( gc, ii )) & ( 1llu << bitIndex ) );
 }
 
+// moves an ii's finalmap bit to where it's being renumbered to. the words are updated
+// atomically, as parallel compaction may move objects from several ranges into the
+// same chunk at once, see COMPACTION-NOTES
+// 
+static inline
+void
+zGc__finalmap__move(
+  struct zGc * gc   ,
+  struct zII   from ,
+  struct zII   to
+){
+  __atomic_fetch_and( zGc__finalmap( gc, from ), ~ ( 1llu << ( from.indirectionIndex % 64 ) ), __ATOMIC_RELAXED );
+  __atomic_fetch_or( zGc__finalmap( gc, to ), 1llu << ( to.indirectionIndex % 64 ), __ATOMIC_RELAXED );
+}
+
 // </seeing FINALMAP-NOTES>
 
 static inline
@@ -323,7 +650,7 @@ zGc__slots_needed_for_collection_livemaps(
 ){
   zUNUSED( gc );
   // we only use 1 bit per object to track liveness
-  uint64_t requiredSlots = ( ( numObjects / 64 ) / zSLOT_SIZE ) + 1 ;
+  uint64_t requiredSlots = ( ( numObjects / 64 + 1 ) * sizeof( uint64_t ) / zSLOT_SIZE ) + 1 ;
   return requiredSlots ;
 }
 
@@ -342,24 +669,119 @@ zGc__slots_needed_for_collection_rewrites(
   return requiredSlots ;
 }
 
+// with @stableHandles, compaction goes in slot order by way of a bitmap of where the
+// live objects' data starts, see STABLE-NOTES
+// 
+static inline
+uint32_t
+zGc__slots_needed_for_collection_slotmap(
+  struct zGc * gc
+){
+  if( ! zSTABLE_HANDLES ){
+    return 0 ;
+  }
+  
+  return ( ( gc->numSlots / 64 + 1 ) * sizeof( uint64_t ) / zSLOT_SIZE ) + 1 ;
+}
+
+// HUGEPAGE-NOTES
+// 
+// a collection walks the livemap, the rewrite array, the indirections at the top of the
+// heap and the slots at the bottom, which on a heap of several gigabytes misses the tlb
+// about as often as it can. with zCREATE_HUGETLB the heap is mapped from the preallocated
+// huge page pool, reserving enough of them for the maximum size of the heap up front, and
+// if there aren't enough of those, or with zCREATE_HUGEPAGE, it asks for transparent huge
+// pages instead. either way the livemap and rewrite array are each
+// started on a huge page boundary, so neither straddles one more page than it has to,
+// and room for that is counted into the scratch space every collection needs.
+// 
+// zCREATE_POPULATE faults in the initial size of the heap up front, so the first
+// collection doesn't pay for it.
+// 
+
+// how many slots the scratch space may need to align its parts to huge pages
+// 
+static inline
+uint64_t
+zGc__huge_page_padding(
+  struct zGc * gc
+){
+  if( gc->options & ( zCREATE_HUGETLB | zCREATE_HUGEPAGE ) ){
+    return 2 * ( zHUGE_PAGE_SIZE / zSLOT_SIZE + 1 ) ;
+  }
+  
+  return 0 ;
+}
+
+// the first slot at or after si that starts on a huge page boundary, when using them
+// 
+static inline
+struct zSI
+zGc__huge_page_align(
+  struct zGc * gc ,
+  struct zSI   si
+){
+  if( ! ( gc->options & ( zCREATE_HUGETLB | zCREATE_HUGEPAGE ) ) ){
+    return si ;
+  }
+  
+  uintptr_t address = (uintptr_t) & gc->slots[ si.slotIndex ] ;
+  uintptr_t aligned = ( address + zHUGE_PAGE_SIZE - 1 ) & ~ ( zHUGE_PAGE_SIZE - 1 ) ;
+  
+  return (struct zSI){ .slotIndex = si.slotIndex + ( aligned - address + zSLOT_SIZE - 1 ) / zSLOT_SIZE };
+}
+
 static inline
 uint32_t
 zGc__slots_needed_for_collection(
   struct zGc * gc         ,
   uint32_t     numObjects
 ){
-  zUNUSED( gc );
   uint32_t livemapSpace = zGc__slots_needed_for_collection_livemaps( gc, numObjects );
   uint32_t rewriteSpace = zGc__slots_needed_for_collection_rewrites( gc, numObjects );
-  return livemapSpace + rewriteSpace ;
+  uint32_t slotmapSpace = zGc__slots_needed_for_collection_slotmap( gc );
+  return livemapSpace + rewriteSpace + slotmapSpace + zGc__huge_page_padding( gc );
 }
 
+// where the counter handed to zGc__take_and_increment_skipping_first_of_each_64_and_zeroing_if_skipped
+// ends up after taking count ii's from it
+// 
 static inline
 uint32_t
+zGc__advance_ii(
+  uint32_t counter ,
+  uint64_t count
+){
+  if( ! count ){
+    return counter ;
+  }
+  
+  // never 0, as the reserved ii's are below any floor
+  if( counter % 64 == 0 ){
+    counter ++ ;
+  }
+  
+  // number the ii's that aren't finalmap chunks, find the last one taken, and step past it
+  uint64_t rank = counter - counter / 64 + count - 1 ;
+  uint64_t last = rank + ( rank - 1 ) / 63 ;
+  
+  return last + 1 ;
+}
+
+// how many ii's numObjects new objects take up, counting finalmap chunks
+// 
+static inline
+uint64_t
 zGc__indirections_required_for_new(
-  struct zGc * gc
+  struct zGc * gc         ,
+  uint64_t     numObjects
 ){
-  return 1 + !! ( gc->nextII.indirectionIndex % 64 == 0 ) ;
+  // free ones are handed out first, see STABLE-NOTES
+  if( zSTABLE_HANDLES ){
+    numObjects = numObjects > gc->numFree ? numObjects - gc->numFree : 0 ;
+  }
+  
+  return zGc__advance_ii( gc->nextII.indirectionIndex, numObjects ) - gc->nextII.indirectionIndex ;
 }
 
 static inline
@@ -389,849 +811,6023 @@ zGc__set(
   gc->registers[ registerNo ] = ii ;
 }
 
+// ROOTS-NOTES
+// 
+// the registers are a fixed set of roots, as many as the spec's @registers. the root
+// stack is a second set that grows as it's needed, for code that wants to keep more
+// objects alive than it has registers for, or doesn't know how many ahead of time.
+// zGc__push_root pushes an ii onto it, returning the index it was pushed at, which
+// zGc__get_root and zGc__set_root take in place of a register number, and zGc__pop_roots
+// pops the last n pushed. collections mark from the stack and rewrite it along with the
+// registers, so the ii's on it stay good across them.
+// 
+// zGc__enter_frame returns a frame holding the height of the stack, and zGc__leave_frame
+// pops everything pushed since, so a function can push as many roots as it likes and
+// drop them all on its way out, however it leaves. frames have to be left in the reverse
+// of the order they were entered. zROOT_FRAME( gc ) enters a frame that's left when the
+// enclosing block is, using gcc's cleanup attribute.
+// 
+//   struct zII
+//   copy_tree( struct zGc * gc, uint64_t from ){
+//     zROOT_FRAME( gc );
+//     uint64_t car = zGc__push_root( gc, zRESERVED_NULL );
+//     ...
+//   }
+// 
+// like the pinned list, the stack lives outside the heap, so a heap opened from a file
+// starts with it empty, see PERSIST-NOTES.
+// 
+
+struct zGcFrame {
+  struct zGc * gc     ;
+  uint64_t     height ; // of the root stack when the frame was entered
+};
+
+// pushes ii onto the root stack, returning its index there
+// 
 static inline
-void
-zGc__stats(
-  struct zGc * gc
+uint64_t
+zGc__push_root(
+  struct zGc * gc ,
+  struct zII   ii
 ){
-  zGc__log( "zgc::registers = %" PRIu32, zNUM_REGISTERS );
-  zGc__log( "zgc::slots     = %" PRIu64, gc->numSlots ) ;
-  zGc__log( "zgc::nextII    = II[%" PRIu32 "]", gc->nextII.indirectionIndex );
-  zGc__log( "zgc::nextSI    = SI[%" PRIu32 "]", gc->nextSI.slotIndex );
-  zGc__log( "" );
-  
-  zGc__log( "zgc::collections           = %" PRIu64 "", gc->collections           );
-  zGc__log( "zgc::allocations           = %" PRIu64 "", gc->allocations           );
-  zGc__log( "zgc::bytesAllocated        = %" PRIu64 "", gc->bytesAllocated        );
-  zGc__log( "zgc::indirectionsAllocated = %" PRIu64 "", gc->indirectionsAllocated );
-  zGc__log( "zgc::slotsAllocated        = %" PRIu64 "", gc->slotsAllocated        );
-  
-  zGc__log( "zgc::indirectionShifts     = %" PRIu64 "", gc->indirectionShifts     );
-  zGc__log( "zgc::slotShifts            = %" PRIu64 "", gc->slotShifts            );
-  zGc__log( "zgc::referenceRewrites     = %" PRIu64 "", gc->referenceRewrites     );
-  zGc__log( "zgc::finalizersCalled      = %" PRIu64 "", gc->finalizers            );
+  if( zUNLIKELY( gc->numRoots == gc->maxRoots ) ){
+    uint64_t     maxRoots = gc->maxRoots ? gc->maxRoots * 2 : 64 ;
+    struct zII * roots    = realloc( gc->roots, maxRoots * sizeof( struct zII ) );
+    if( zUNLIKELY( ! roots ) ){
+      zGc__panic( "failed to grow root stack : %s", strerror( errno ) );
+    }
+    
+    gc->roots    = roots    ;
+    gc->maxRoots = maxRoots ;
+  }
   
-  zGc__log( "zgc::longestGc             = %" PRIu64 "", gc->longestGc                          );
-  zGc__log( "zgc::sumGc                 = %" PRIu64 "", gc->sumGc                              );
-  zGc__log( "zgc::averageGc             = %" PRIu64 "", ( gc->sumGc / (gc->collections ? gc->collections : 1) ) );
+  gc->roots[ gc->numRoots ] = ii ;
   
-  zGc__log( "" );
+  return gc->numRoots ++ ;
 }
 
 static inline
 void
-zGc__registers(
-  struct zGc * gc
+zGc__pop_roots(
+  struct zGc * gc       ,
+  uint64_t     numRoots
 ){
-  zGc__warn( "zgc::registers (%" PRIu32 ")", (uint32_t)zNUM_REGISTERS );
-  for( uint64_t rn = 0 ; rn < zNUM_REGISTERS ; rn++ ){
-    zGc__warn( "  [%" PRIu64 "] :: II[%" PRIu32 "]", rn, zGc__get( gc, rn ).indirectionIndex );
+  if( zUNLIKELY( numRoots > gc->numRoots ) ){
+    zGc__panic( "cannot pop %" PRIu64 " roots, only %" PRIu64 " are pushed", numRoots, gc->numRoots );
   }
+  
+  gc->numRoots -= numRoots ;
 }
 
 static inline
-struct zGc *
-zGc__create(
-  size_t size
+struct zII
+zGc__get_root(
+  struct zGc * gc    ,
+  uint64_t     index
 ){
-  
-  if( size < sizeof( struct zGc ) ){
-    zGc__panic( "size is insufficient to hold gc metadata structure" );
-  }
-  
-  uint64_t numSlots = (size - sizeof( struct zGc )) / zSLOT_SIZE ;
-  
-  if( zUNLIKELY( numSlots < zMINSLOTS ) ){
-    zGc__panic( "you cannot specify a gc of fewer than " zSTRINGVALUE( zMINSLOTS ) " SLOTS" );
-  }
-  
-  char * start = mmap( NULL, size, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS, -1, 0 );
-  if( zUNLIKELY( start == MAP_FAILED ) ){
-    zGc__panic( "failed to alloc memory for gc : %s", strerror( errno ) );
-  }
-  
-  struct zGc * gc = (struct zGc *) start ;
-  
-  gc->numSlots = numSlots ;
-  gc->nextII   = (struct zII) { .indirectionIndex = zNUM_UNIQUE_TYPES + 1 }; // 0 reserved for builtin zRESERVED_NULL
-  gc->nextSI   = (struct zSI) { .slotIndex = 0 } ;
-  
-  gc->collections           = 0 ;
-  gc->allocations           = 0 ;
-  gc->bytesAllocated        = 0 ;
-  gc->indirectionsAllocated = 0 ;
-  gc->slotsAllocated        = 0 ;
-  gc->indirectionShifts     = 0 ;
-  gc->referenceRewrites     = 0 ;
-  gc->slotShifts            = 0 ;
-  gc->finalizers            = 0 ;
-  
-  gc->longestGc = 0 ;
-  gc->sumGc     = 0 ;
-  
-  for( uint64_t index = 0; index < (zNUM_UNIQUE_TYPES + 1) ; index ++ ){
-    struct zIndirection * indirection = zGc__indirection( gc, (struct zII){ .indirectionIndex = index });
-    indirection->objectType.objectType = index ;
-  }
-  
-  for( uint64_t index = 0; index < zNUM_REGISTERS ; index ++ ){
-    zGc__set( gc, index, zRESERVED_NULL );
+  if( zUNLIKELY( index >= gc->numRoots ) ){
+    zGc__panic( "bad root index" );
   }
   
-  zGc__finalmap__zero( gc, (struct zII){ .indirectionIndex = 0 });
-  
-  return gc ;
+  return gc->roots[ index ] ;
 }
 
 static inline
-void *
-zGc__data(
-  struct zGc * gc ,
+void
+zGc__set_root(
+  struct zGc * gc    ,
+  uint64_t     index ,
   struct zII   ii
 ){
-  struct zIndirection * indirection = zGc__indirection( gc, ii );
-  if( indirection->immediate ){
-    return & indirection->as_immediateData[0] ;
-  } else {
-    return & gc->slots[ indirection->as_slotIndex.slotIndex ].as_chardata[0] ;
+  if( zUNLIKELY( index >= gc->numRoots ) ){
+    zGc__panic( "bad root index" );
   }
+  
+  gc->roots[ index ] = ii ;
 }
 
 static inline
-void
-zLM__mark(
-  uint64_t * lm    ,
-  uint64_t   index
+struct zGcFrame
+zGc__enter_frame(
+  struct zGc * gc
 ){
-  uint64_t chunkIndex = index / 64 ;
-  uint64_t bitIndex   = index % 64 ;
-  
-  // zGc__warn( "__mark %llu %llu", (unsigned long long) chunkIndex, (unsigned long long) bitIndex );
-  // zGc__warn( "  pre:%llx", (unsigned long long) lm[ chunkIndex ] );
-  
-  lm[ chunkIndex ] |= (uint64_t) ( 1llu << bitIndex ) ;
-  
-  // zGc__warn( "  pst:%llx", (unsigned long long) lm[ chunkIndex ] );
+  return (struct zGcFrame){ .gc = gc, .height = gc->numRoots } ;
 }
 
+// pops everything pushed since frame was entered
+// 
 static inline
-unsigned char
-zLM__marked(
-  uint64_t * lm    ,
-  uint64_t   index
+void
+zGc__leave_frame(
+  struct zGcFrame frame
 ){
-  uint64_t chunkIndex = index / 64 ;
-  uint64_t bitIndex   = index % 64 ;
-  
-  // zGc__warn( "__marked %llu %llu", (unsigned long long) chunkIndex, (unsigned long long) bitIndex );
-  // zGc__warn( "  is :%llx", (unsigned long long) lm[ chunkIndex ] );
+  if( zUNLIKELY( frame.height > frame.gc->numRoots ) ){
+    zGc__panic( "root frames left out of order, the stack is below the frame being left" );
+  }
   
-  return !! ( lm[ chunkIndex ] & (uint64_t) ( 1llu << bitIndex ) );
+  frame.gc->numRoots = frame.height ;
 }
 
-////
+static inline
+void
+zGc__leave_frame__cleanup(
+  struct zGcFrame * frame
+){
+  zGc__leave_frame( * frame );
+}
 
-// mark that the given object requires finalization
-// finalizing is marked during allocation and shifting
+#define zROOT_FRAME( gc ) \
+  struct zGcFrame zPASTEVALUE( zRootFrame, __LINE__ ) \
+    __attribute__(( cleanup( zGc__leave_frame__cleanup ) )) \
+    = zGc__enter_frame( gc )
+
+static inline
+uint64_t
+zGc__now(
+  void
+){
+  struct timespec spec ;
+  clock_gettime( CLOCK_MONOTONIC, & spec );
+  return (uint64_t) (spec.tv_sec) * 1000000000llu + (uint64_t) (spec.tv_nsec) ;
+}
+
+// STATS-NOTES
+// 
+// every pause, whether a whole collection or a slice of an incremental one, is counted
+// in pauseHistogram by its length in nanoseconds. lengths below zPAUSE_SUB_BUCKETS get
+// a bucket each, and each doubling past that is split into zPAUSE_SUB_BUCKETS buckets,
+// so a bucket is never wider than an eighth of the pauses it holds. percentiles are
+// read off the histogram as the upper end of the bucket they fall in, so they're never
+// under the real pause, and over it by at most that eighth.
+// 
+// mutator utilization is the share of the time since startedAt not spent paused.
+// pause times are only kept for the process that has the heap, so opening a heap from
+// a file starts them over, see PERSIST-NOTES. the rest of the counters carry on.
+// 
+
+// which bucket of the pause histogram a pause of ns nanoseconds is counted in
 // 
 static inline
-void
-zLM__mark_finalizing(
-  uint64_t * lm    ,
-  uint64_t   index
+uint64_t
+zGc__pause_bucket(
+  uint64_t ns
 ){
-  uint64_t chunkIndex = index / 32 ;
-  uint64_t bitIndex   = index % 32 ;
+  if( ns < zPAUSE_SUB_BUCKETS ){
+    return ns ;
+  }
   
-  lm[ chunkIndex ] |= (uint64_t) ( 1llu << ( bitIndex * 2llu + 1llu ) ) ;
+  // the highest bit says which doubling, the three below it which eighth of it
+  uint64_t highBit = 63 - __builtin_clzll( ns );
+  uint64_t eighth  = ( ns >> ( highBit - 3 ) ) & ( zPAUSE_SUB_BUCKETS - 1 ) ;
+  
+  return ( highBit - 2 ) * zPAUSE_SUB_BUCKETS + eighth ;
 }
 
-// unmark that the given object requires finalization
-// ( used when shifting objects around )
+// the longest pause counted in the given bucket of the pause histogram
 // 
 static inline
-void
-zLM__unmark_finalizing(
-  uint64_t * lm    ,
-  uint64_t   index
+uint64_t
+zGc__pause_bucket_limit(
+  uint64_t bucket
 ){
-  uint64_t chunkIndex = index / 32 ;
-  uint64_t bitIndex   = index % 32 ;
+  if( bucket < zPAUSE_SUB_BUCKETS ){
+    return bucket ;
+  }
   
-  lm[ chunkIndex ] &= ~ (uint64_t) ( 1llu << ( bitIndex * 2llu + 1llu ) ) ;
+  uint64_t highBit = bucket / zPAUSE_SUB_BUCKETS + 2 ;
+  uint64_t eighth  = bucket % zPAUSE_SUB_BUCKETS ;
+  
+  return ( ( zPAUSE_SUB_BUCKETS + eighth + 1 ) << ( highBit - 3 ) ) - 1 ;
 }
 
+// the pause length that perMillion millionths of pauses were no longer than
+// 
 static inline
-void
-zLM__marked_finalizing(
-  uint64_t * lm    ,
-  uint64_t   index
+uint64_t
+zGc__pause_percentile(
+  struct zGc * gc         ,
+  uint64_t     perMillion
 ){
-  uint64_t chunkIndex = index / 32 ;
-  uint64_t bitIndex   = index % 32 ;
+  if( ! gc->pauses ){
+    return 0 ;
+  }
   
-  lm[ chunkIndex ] |= (uint64_t) ( 1llu << ( bitIndex * 2llu + 1llu ) ) ;
+  // the rank of the pause wanted, rounding up, so p50 of two pauses is the first
+  uint64_t rank = ( gc->pauses * perMillion + 999999 ) / 1000000 ;
+  rank = rank ? rank : 1 ;
+  
+  uint64_t seen = 0 ;
+  for( uint64_t bucket = 0 ; bucket < zPAUSE_BUCKETS ; bucket ++ ){
+    seen += gc->pauseHistogram[ bucket ] ;
+    if( seen >= rank ){
+      uint64_t limit = zGc__pause_bucket_limit( bucket );
+      return limit < gc->longestGc ? limit : gc->longestGc ;
+    }
+  }
+  
+  return gc->longestGc ;
 }
 
+// everything zGc__stats_snapshot reports, times in nanoseconds. the counters are the
+// ones kept in struct zGc, see there
+// 
+struct zGcStats {
+  uint64_t numSlots              ;
+  uint64_t maxSlots              ;
+  uint64_t usedSlots             ; // indirections plus slots, as both take a slot each
+  uint64_t usedAfterCollection   ;
+  uint64_t remembered            ;
+  uint64_t pinned                ;
+  uint64_t roots                 ; // on the root stack
+  uint64_t free                  ; // indirections on the free list, see STABLE-NOTES
+  uint64_t finalizing            ; // cfrees queued and not yet run, see DEFER-NOTES
+  uint64_t largeObjects          ;
+  uint64_t largeBytes            ;
+  
+  uint64_t collections           ;
+  uint64_t minorCollections      ;
+  uint64_t promotions            ;
+  uint64_t allocations           ;
+  uint64_t bytesAllocated        ;
+  uint64_t indirectionsAllocated ;
+  uint64_t slotsAllocated        ;
+  uint64_t indirectionShifts     ;
+  uint64_t referenceRewrites     ;
+  uint64_t slotShifts            ;
+  uint64_t finalizers            ;
+  uint64_t weakCleared           ;
+  
+  uint64_t bytesReclaimed        ;
+  uint64_t lastBytesReclaimed    ;
+  uint64_t averageBytesReclaimed ; // per collection
+  
+  double   liveRatio             ; // of the heap in use when the last collection finished, from 0 to 1
+  
+  uint64_t elapsed               ; // since the heap was created, or opened
+  uint64_t pauses                ;
+  uint64_t sumGc                 ;
+  uint64_t longestGc             ;
+  uint64_t averageGc             ; // per collection, as zGc__stats has it
+  uint64_t averagePause          ;
+  uint64_t pauseP50              ;
+  uint64_t pauseP90              ;
+  uint64_t pauseP99              ;
+  uint64_t pauseP999             ;
+  
+  double   mutatorUtilization    ; // the share of elapsed not spent in pauses, from 0 to 1
+  
+  uint64_t pauseHistogram [ zPAUSE_BUCKETS ] ; // bucket b holds pauses up to zGc__pause_bucket_limit( b )
+};
 
+// fills in stats from the gc, see STATS-NOTES
+// 
 static inline
 void
-zGc__dump(
+zGc__stats_snapshot(
+  struct zGc *      gc    ,
+  struct zGcStats * stats
+){
+  stats->numSlots              = gc->numSlots                                        ;
+  stats->maxSlots              = gc->maxSlots                                        ;
+  stats->usedSlots             = gc->nextII.indirectionIndex + gc->nextSI.slotIndex ;
+  stats->usedAfterCollection   = gc->usedAfterCollection                             ;
+  stats->remembered            = gc->numRemembered                                   ;
+  stats->pinned                = gc->numPinned                                       ;
+  stats->roots                 = gc->numRoots                                        ;
+  stats->free                  = gc->numFree                                         ;
+  stats->finalizing            = __atomic_load_n( & gc->pendingFinalizers, __ATOMIC_RELAXED ) ;
+  stats->largeObjects          = gc->largeObjects                                    ;
+  stats->largeBytes            = gc->largeBytes                                      ;
+  
+  stats->collections           = gc->collections           ;
+  stats->minorCollections      = gc->minorCollections      ;
+  stats->promotions            = gc->promotions            ;
+  stats->allocations           = gc->allocations           ;
+  stats->bytesAllocated        = gc->bytesAllocated        ;
+  stats->indirectionsAllocated = gc->indirectionsAllocated ;
+  stats->slotsAllocated        = gc->slotsAllocated        ;
+  stats->indirectionShifts     = gc->indirectionShifts     ;
+  stats->referenceRewrites     = gc->referenceRewrites     ;
+  stats->slotShifts            = gc->slotShifts            ;
+  stats->finalizers            = gc->finalizers            ;
+  stats->weakCleared           = gc->weakCleared           ;
+  
+  stats->bytesReclaimed        = gc->bytesReclaimed                                              ;
+  stats->lastBytesReclaimed    = gc->lastBytesReclaimed                                          ;
+  stats->averageBytesReclaimed = gc->bytesReclaimed / ( gc->collections ? gc->collections : 1 ) ;
+  
+  stats->liveRatio = (double) gc->usedAfterCollection / (double) gc->numSlots ;
+  
+  stats->elapsed      = zGc__now() - gc->startedAt                           ;
+  stats->pauses       = gc->pauses                                           ;
+  stats->sumGc        = gc->sumGc                                            ;
+  stats->longestGc    = gc->longestGc                                        ;
+  stats->averageGc    = gc->sumGc / ( gc->collections ? gc->collections : 1 ) ;
+  stats->averagePause = gc->sumGc / ( gc->pauses ? gc->pauses : 1 )           ;
+  stats->pauseP50     = zGc__pause_percentile( gc, 500000 )                  ;
+  stats->pauseP90     = zGc__pause_percentile( gc, 900000 )                  ;
+  stats->pauseP99     = zGc__pause_percentile( gc, 990000 )                  ;
+  stats->pauseP999    = zGc__pause_percentile( gc, 999000 )                  ;
+  
+  stats->mutatorUtilization =
+    stats->elapsed && gc->sumGc < stats->elapsed
+    ? 1.0 - (double) gc->sumGc / (double) stats->elapsed
+    : stats->elapsed ? 0.0 : 1.0
+    ;
+  
+  memcpy( stats->pauseHistogram, gc->pauseHistogram, sizeof( stats->pauseHistogram ) );
+}
+
+static inline
+void
+zGc__stats(
   struct zGc * gc
 ){
-  for( uint64_t jj = 0; jj < gc->nextII.indirectionIndex; jj++ ){
-    zGc__warn( 
-      "II[%llu] OT[%llu]",
-      (unsigned long long) jj,
-      (unsigned long long) zGc__indirection( gc, (struct zII){ .indirectionIndex = jj } )->objectType.objectType
-    );
-  }
+  zGc__log( "zgc::registers = %" PRIu32, zNUM_REGISTERS );
+  zGc__log( "zgc::slots     = %" PRIu64, gc->numSlots ) ;
+  zGc__log( "zgc::maxSlots  = %" PRIu64, gc->maxSlots ) ;
+  zGc__log( "zgc::nextII    = II[%" PRIu32 "]", gc->nextII.indirectionIndex );
+  zGc__log( "zgc::nextSI    = SI[%" PRIu32 "]", gc->nextSI.slotIndex );
+  zGc__log( "zgc::oldII     = II[%" PRIu32 "]", gc->oldII.indirectionIndex );
+  zGc__log( "zgc::oldSI     = SI[%" PRIu32 "]", gc->oldSI.slotIndex );
+  zGc__log( "zgc::remembered = %" PRIu64, gc->numRemembered );
+  zGc__log( "zgc::largeObjects = %" PRIu64, gc->largeObjects );
+  zGc__log( "zgc::largeBytes   = %" PRIu64, gc->largeBytes );
+  zGc__log( "zgc::pinned       = %" PRIu64, gc->numPinned );
+  zGc__log( "zgc::roots        = %" PRIu64, gc->numRoots );
+  zGc__log( "zgc::free         = %" PRIu64, gc->numFree );
+  zGc__log( "zgc::finalizing   = %" PRIu64, __atomic_load_n( & gc->pendingFinalizers, __ATOMIC_RELAXED ) );
+  zGc__log( "zgc::cycle     = %" PRIu32, gc->cycle.phase );
+  zGc__log( "" );
+  
+  zGc__log( "zgc::collections           = %" PRIu64 "", gc->collections           );
+  zGc__log( "zgc::minorCollections      = %" PRIu64 "", gc->minorCollections      );
+  zGc__log( "zgc::promotions            = %" PRIu64 "", gc->promotions            );
+  zGc__log( "zgc::allocations           = %" PRIu64 "", gc->allocations           );
+  zGc__log( "zgc::bytesAllocated        = %" PRIu64 "", gc->bytesAllocated        );
+  zGc__log( "zgc::indirectionsAllocated = %" PRIu64 "", gc->indirectionsAllocated );
+  zGc__log( "zgc::slotsAllocated        = %" PRIu64 "", gc->slotsAllocated        );
+  
+  zGc__log( "zgc::indirectionShifts     = %" PRIu64 "", gc->indirectionShifts     );
+  zGc__log( "zgc::slotShifts            = %" PRIu64 "", gc->slotShifts            );
+  zGc__log( "zgc::referenceRewrites     = %" PRIu64 "", gc->referenceRewrites     );
+  zGc__log( "zgc::finalizersCalled      = %" PRIu64 "", gc->finalizers            );
+  zGc__log( "zgc::weakCleared           = %" PRIu64 "", gc->weakCleared           );
+  zGc__log( "zgc::bytesReclaimed        = %" PRIu64 "", gc->bytesReclaimed        );
+  
+  zGc__log( "zgc::longestGc             = %" PRIu64 "", gc->longestGc                          );
+  zGc__log( "zgc::sumGc                 = %" PRIu64 "", gc->sumGc                              );
+  zGc__log( "zgc::averageGc             = %" PRIu64 "", ( gc->sumGc / (gc->collections ? gc->collections : 1) ) );
+  zGc__log( "zgc::pauses                = %" PRIu64 "", gc->pauses                             );
+  zGc__log( "zgc::pauseP50              = %" PRIu64 "", zGc__pause_percentile( gc, 500000 )    );
+  zGc__log( "zgc::pauseP99              = %" PRIu64 "", zGc__pause_percentile( gc, 990000 )    );
+  zGc__log( "zgc::pauseP999             = %" PRIu64 "", zGc__pause_percentile( gc, 999000 )    );
+  
+  zGc__log( "" );
 }
 
-// FINALMAP-NOTES
+// CENSUS-NOTES
 // 
-// we're using every (ii%64==0)th indirection to store metadata on whether or not
-// the indirections need to have finalizers called on them, so we can avoid scanning
-// the entire bunch of them during garbage collection ( hoping to save time versus
-// a full scan checking 64x bytes during collection, should test it the other way
-// as well, but this seemed like a fun way to do it for now.
-// we let use ii 0 for this as well, even though it's zOT_NULL, our stand in for
-// no-value, because our no-value is just a reserved number and the ii itself never
-// gets accessed by anything. just knowing it's being pointed to is sufficient
-// information for anything needing to know if its II is zOT_NULL or not. the only
-// mandatory unique type. that works out for us here.
+// each object type has its own struct zTypeCounts in gc->types. allocations and the
+// bytes asked for are counted as objects are made, and finalizers as they're run.
 // 
-// so, following that little explanation, I've decided to create a helper function
-// for incrementing the nextII value on the gc so it skips all of the (ii%64=0) entries
-// while 0'ing them out along the way, so it's always safe for us to assume they
-// contain a uint64_t bitfield of who needs to have finalizers called when they're
-// being collected
+// the live counts are those of the last collection. compaction moves every survivor at
+// or above its floor, and counts each as it goes, along with what it takes up in the
+// heap : an indirection, the slots its data is in, and the mapping of a large object.
+// what's below the floor is the old generation the previous collection left, whose
+// counts were kept aside for this, so a minor collection only counts its own survivors.
+// old objects that died since are still counted until a full collection finds them.
 // 
-// this is used for take_next_ii, in __new, and for newNextII in __collect()
-// it's responsible for renumbering all of the ii's. it returns the current value
-// and increments, unless the current value is mod64=0, then it increments first
-// to skip over those values
+// with @compactThreads, each range counts into an array of its own, which are added up
+// once they're done, see COMPACTION-NOTES.
 // 
-// if doesn't bother with the skip when *counter is 0, since that slot is always
-// the unique type zOT_NULL, and it doesn't use its data
+// unique types are never allocated or collected, so they're never counted.
 // 
-// the "zeroing_if_skipped" bit should hopefully get optimized out of all the callsites
-// except in __new, where it's used to 0 out the finalmap. kind of ugly. probably
-// should rework it in the future.
+
+// the name a type was given in the spec
 // 
 static inline
-uint32_t
-zGc__take_and_increment_skipping_first_of_each_64_and_zeroing_if_skipped(
-  uint32_t * counter    ,
-  uint64_t * zeroOnSkip
+const char *
+zGc__type_name(
+  struct zOT objectType
 ){
-  if( (*counter) && (*counter) % 64 == 0 ){
-    (*counter) ++ ;
-    if( zeroOnSkip ){
-      * zeroOnSkip = 0 ;
-    }
+  static const char * const typeNames [] = { "NULL" $TYPENAMES } ;
+  
+  if( objectType.objectType > zNUM_OBJECT_TYPES ){
+    return "?" ;
   }
   
-  return (*counter) ++ ;
+  return typeNames[ objectType.objectType ] ;
 }
 
-static inline
-void
-zGc__collect__mark_reserved_in_livemap(
-  uint64_t * livemap
-){
-  // first mark all the reserved objects as live
-  for( uint64_t jj = 0; jj < zNUM_UNIQUE_TYPES + 1; jj++ ){
-    zLM__mark( livemap, jj );
-  }
-}
+// one type's counters, as zGc__census_snapshot reports them, see CENSUS-NOTES
+// 
+struct zGcTypeCensus {
+  struct zOT   objectType     ;
+  const char * name           ;
+  uint64_t     allocations    ;
+  uint64_t     bytesAllocated ;
+  uint64_t     liveObjects    ;
+  uint64_t     liveBytes      ;
+  uint64_t     finalizers     ;
+};
 
+// fills in census[ tt - 1 ] for each of the zNUM_OBJECT_TYPES types zOT_* numbers tt
+// 
 static inline
 void
-zGc__collect__push_registers_to_descent_array(
-  struct zGc * gc                ,
-  struct zII * rewrites          ,
-  uint64_t *   livemap           ,
-  uint32_t *   finalDescentIndex
+zGc__census_snapshot(
+  struct zGc *           gc     ,
+  struct zGcTypeCensus * census
 ){
-  // first preload the descent array with whatevers in the current registers
-  for( uint64_t registerIndex = 0 ; registerIndex < zNUM_REGISTERS ; registerIndex ++ ){
-    if( ! zLM__marked( livemap, gc->registers[ registerIndex ].indirectionIndex ) ){
-      rewrites[ (*finalDescentIndex)++ ].indirectionIndex 
-        = gc->registers[ registerIndex ].indirectionIndex 
-        ;
-      zLM__mark( livemap, gc->registers[ registerIndex ].indirectionIndex );
-    }
+  for( uint16_t tt = 1 ; tt <= zNUM_OBJECT_TYPES ; tt ++ ){
+    struct zTypeCounts *   counts = & gc->types[ tt ] ;
+    struct zGcTypeCensus * entry  = & census[ tt - 1 ] ;
+    
+    entry->objectType     = (struct zOT){ .objectType = tt } ;
+    entry->name           = zGc__type_name( entry->objectType ) ;
+    entry->allocations    = counts->allocations    ;
+    entry->bytesAllocated = counts->bytesAllocated ;
+    entry->liveObjects    = counts->liveObjects    ;
+    entry->liveBytes      = counts->liveBytes      ;
+    entry->finalizers     = counts->finalizers     ;
   }
 }
 
+// logs the counters of every type that's been allocated
+// 
 static inline
 void
-zGc__collect__create_livemap(
-  struct zGc * gc                ,
-  struct zII * rewrites          ,
-  uint64_t *   livemap           ,
-  uint32_t *   finalDescentIndex
+zGc__census(
+  struct zGc * gc
 ){
-  // now we'll descend the current object heirarchy and create the livemap
-  uint64_t currentDescentIndex = 0 ;
-  while( currentDescentIndex < *finalDescentIndex ){
-    struct zIndirection * indirection =
-      zGc__indirection( gc, (struct zII){ .indirectionIndex = rewrites[ currentDescentIndex ].indirectionIndex } )
-      ;
-    
-    // zGc__warn( 
-    //   "descent/RW[%llu]=II[%llu]=[%p] ot=%llu",
-    //   (unsigned long long) currentDescentIndex,
-    //   (unsigned long long) rewrites[ currentDescentIndex ].indirectionIndex,
-    //   indirection ,
-    //   (unsigned long long) indirection->objectType.objectType
-    // );
-    
-    #define yield( ptr ) \
-      do{ \
-        if(! zLM__marked( livemap, (ptr)->indirectionIndex ) ){ \
-          if( (ptr)->indirectionIndex > zNUM_UNIQUE_TYPES ){ \
-            rewrites[ (*finalDescentIndex)++ ].indirectionIndex \
-              = (ptr)->indirectionIndex \
-              ; \
-            zLM__mark( livemap, (ptr)->indirectionIndex ); \
-          } \
-        } \
-      } while (0)
-    
-    #define zTYPEWALK_PREFIX zSCAN
-    
-    #define zCURRENT_II (currentDescentIndex)
-    
-    // type walk targets
-    // 
-    $TYPEWALKTARGETS
-    
-    // type walks
-    // 
-    goto * zPASTEVALUE( zTYPEWALK_PREFIX, typeWalkTargets )[ indirection->objectType.objectType ];
-    $TYPEWALKS
-    zPASTEVALUE( zTYPEWALK_PREFIX, typeWalkExit ):;
+  for( uint16_t tt = 1 ; tt <= zNUM_OBJECT_TYPES ; tt ++ ){
+    struct zTypeCounts * counts = & gc->types[ tt ] ;
     
-    #undef zCURRENT_II
-    #undef zTYPEWALK_PREFIX
-    #undef yield
+    if( ! counts->allocations && ! counts->liveObjects ){
+      continue ;
+    }
     
-    currentDescentIndex ++ ;
+    zGc__log(
+      "zgc::census %-20s allocations = %" PRIu64 " bytesAllocated = %" PRIu64
+      " liveObjects = %" PRIu64 " liveBytes = %" PRIu64 " finalizers = %" PRIu64 ,
+      zGc__type_name( (struct zOT){ .objectType = tt } ) ,
+      counts->allocations    ,
+      counts->bytesAllocated ,
+      counts->liveObjects    ,
+      counts->liveBytes      ,
+      counts->finalizers
+    );
   }
   
+  zGc__log( "" );
 }
 
+// TRACE-NOTES
+// 
+// the pause histogram says a pause was slow, but not what it was doing. each collection
+// adds up how long it was paused in each of its zTRACE_* phases, along with what it did,
+// in the struct zGcTrace kept in its cycle. once it finishes, that's copied into a ring
+// of the last zTRACE_RING collections kept in struct zGc, set with @traceRing, which
+// zGc__trace reads back. an incremental cycle goes through a phase over many slices, and
+// its times are summed over all of them. a concurrent marker's time isn't counted, only
+// the mutator's, since it's only the mutator's that's a pause.
+// 
+// zGc__set_trace_hook sets a function to call each time the collector starts and stops
+// working on a phase, with ending 0 and 1. it's called on the collecting thread, in the
+// middle of the collection, so it must not touch the gc. with @usdtProbes, the same
+// points fire zgc:phase__start( gc, phase ) and zgc:phase__end( gc, phase, ns ) usdt
+// probes from sys/sdt.h, which cost a nop each until something attaches to them.
+// 
+// like pause times, traces and the hook only belong to the process that has the heap,
+// and opening a heap from a file starts them over, see PERSIST-NOTES.
+// 
+
+// the collector is starting work on phase, returning when for zGc__trace__leave
+// 
 static inline
-uint32_t
-zGc__collect__create_rewrite_array(
-  struct zGc * gc               ,
-  uint64_t     numLivemapChunks ,
-  struct zII * rewrites         ,
-  uint64_t *   livemap
+uint64_t
+zGc__trace__enter(
+  struct zGc * gc    ,
+  uint32_t     phase
 ){
-  (void) gc ;
+  #if zUSDT_PROBES
+  DTRACE_PROBE2( zgc, phase__start, gc, phase );
+  #endif
   
-  uint32_t nextNewII = 0 ;
-  for(
-    uint64_t * livemapChunk = (uint64_t *) livemap ;
-    (uint64_t) ( livemapChunk - (uint64_t *) livemap ) < numLivemapChunks ;
-    livemapChunk++
-  ){
-    if( *livemapChunk ){
-      for(
-        uint64_t bitIndex = 0 ;
-        bitIndex < 64 ;
-        bitIndex++
-      ){
-        if( (*livemapChunk) & (1llu << bitIndex) ){
-          struct zII sourceII = 
-            (struct zII){ .indirectionIndex = 
-              ( (uint64_t) ( livemapChunk - (uint64_t *) livemap ) ) * 64 + bitIndex
-            };
-          
-          rewrites[ sourceII.indirectionIndex ].indirectionIndex 
-            = zGc__take_and_increment_skipping_first_of_each_64_and_zeroing_if_skipped(
-                & nextNewII ,
-                NULL
-              );
-        }
-      }
-    }
+  if( gc->traceHook ){
+    gc->traceHook( gc, phase, 0, gc->traceContext );
   }
   
-  return nextNewII ;
+  return zGc__now();
 }
 
+// and has stopped for now, having started at enteredAt
+// 
 static inline
 void
-zGc__finalize(
-  struct zGc * gc ,
+zGc__trace__leave(
+  struct zGc * gc        ,
+  uint32_t     phase     ,
+  uint64_t     enteredAt
+){
+  uint64_t elapsed = zGc__now() - enteredAt ;
+  
+  gc->cycle.trace.phaseTimes[ phase ] += elapsed ;
+  
+  if( gc->traceHook ){
+    gc->traceHook( gc, phase, 1, gc->traceContext );
+  }
+  
+  #if zUSDT_PROBES
+  DTRACE_PROBE3( zgc, phase__end, gc, phase, elapsed );
+  #endif
+}
+
+// calls hook( gc, phase, ending, context ) around each phase of each collection, or
+// stops calling it if hook is NULL, see TRACE-NOTES
+// 
+static inline
+void
+zGc__set_trace_hook(
+  struct zGc * gc                                                                    ,
+  void      (* hook)( struct zGc * gc, uint32_t phase, int ending, void * context ) ,
+  void *       context
+){
+  gc->traceHook    = hook    ;
+  gc->traceContext = context ;
+}
+
+// the trace of the collection that finished ago collections before the last, 0 being the
+// last, or NULL if it's not in the ring
+// 
+static inline
+const struct zGcTrace *
+zGc__trace(
+  struct zGc * gc  ,
+  uint64_t     ago
+){
+  if( ago >= gc->numTraces || ago >= zTRACE_RING ){
+    return NULL ;
+  }
+  
+  return & gc->traces[ ( gc->numTraces - 1 - ago ) % zTRACE_RING ] ;
+}
+
+static inline
+const char *
+zGc__trace_phase_name(
+  uint32_t phase
+){
+  static const char * const phaseNames [] = { "roots", "mark", "renumber", "compact", "rewrite" } ;
+  
+  if( phase >= zTRACE_PHASES ){
+    return "?" ;
+  }
+  
+  return phaseNames[ phase ] ;
+}
+
+// logs the traces in the ring, oldest first
+// 
+static inline
+void
+zGc__traces(
+  struct zGc * gc
+){
+  for( uint64_t ago = zTRACE_RING ; ago -- ; ){
+    const struct zGcTrace * trace = zGc__trace( gc, ago );
+    if( ! trace ){
+      continue ;
+    }
+    
+    zGc__log(
+      "zgc::trace %" PRIu64 " %s took %" PRIu64 " live = %" PRIu64 " slotShifts = %" PRIu64
+      " referenceRewrites = %" PRIu64 " finalizers = %" PRIu64 " bytesReclaimed = %" PRIu64 ,
+      trace->collection                          ,
+      trace->minor ? "minor" : "full"            ,
+      trace->finishedAt - trace->startedAt       ,
+      trace->liveObjects                         ,
+      trace->slotShifts                          ,
+      trace->referenceRewrites                   ,
+      trace->finalizers                          ,
+      trace->bytesReclaimed
+    );
+    
+    for( uint32_t phase = 0 ; phase < zTRACE_PHASES ; phase ++ ){
+      zGc__log( "zgc::trace   %-8s = %" PRIu64, zGc__trace_phase_name( phase ), trace->phaseTimes[ phase ] );
+    }
+  }
+  
+  zGc__log( "" );
+}
+
+static inline
+void
+zGc__registers(
+  struct zGc * gc
+){
+  zGc__warn( "zgc::registers (%" PRIu32 ")", (uint32_t)zNUM_REGISTERS );
+  for( uint64_t rn = 0 ; rn < zNUM_REGISTERS ; rn++ ){
+    zGc__warn( "  [%" PRIu64 "] :: II[%" PRIu32 "]", rn, zGc__get( gc, rn ).indirectionIndex );
+  }
+  
+  zGc__warn( "zgc::roots (%" PRIu64 ")", gc->numRoots );
+  for( uint64_t rn = 0 ; rn < gc->numRoots ; rn++ ){
+    zGc__warn( "  [%" PRIu64 "] :: II[%" PRIu32 "]", rn, gc->roots[ rn ].indirectionIndex );
+  }
+}
+
+// sets up the header of a newly mapped heap of numSlots slots, with room to grow to maxSlots
+// 
+static inline
+void
+zGc__initialize(
+  struct zGc * gc       ,
+  uint64_t     numSlots ,
+  uint64_t     maxSlots ,
+  uint64_t     options
+){
+  gc->magic        = zHEAP_MAGIC          ;
+  gc->specHash     = zSPEC_HASH           ;
+  gc->slotSize     = zSLOT_SIZE           ;
+  gc->numRegisters = zNUM_REGISTERS       ;
+  gc->headerSize   = sizeof( struct zGc ) ;
+  
+  gc->options = options ;
+  
+  gc->numSlots = numSlots ;
+  gc->minSlots = numSlots ;
+  gc->maxSlots = maxSlots ;
+  gc->nextII   = (struct zII) { .indirectionIndex = zNUM_UNIQUE_TYPES + 1 }; // 0 reserved for builtin zRESERVED_NULL
+  gc->nextSI   = (struct zSI) { .slotIndex = 0 } ;
+  
+  gc->freeII  = zRESERVED_NULL ;
+  gc->numFree = 0              ;
+  
+  gc->oldII = gc->nextII ;
+  gc->oldSI = gc->nextSI ;
+  
+  gc->allocationLimitII = 0 ;
+  gc->allocationLimit   = 0 ;
+  
+  gc->remembered    = NULL ;
+  gc->numRemembered = 0    ;
+  gc->maxRemembered = 0    ;
+  
+  gc->usedAfterCollection = gc->nextII.indirectionIndex + gc->nextSI.slotIndex ;
+  
+  gc->largeObjects              = 0 ;
+  gc->largeBytes                = 0 ;
+  gc->largeBytesSinceCollection = 0 ;
+  
+  gc->pinned    = NULL ;
+  gc->numPinned = 0    ;
+  gc->maxPinned = 0    ;
+  
+  gc->roots    = NULL ;
+  gc->numRoots = 0    ;
+  gc->maxRoots = 0    ;
+  
+  gc->finalizing        = (struct zFinalizerQueue){ 0 } ;
+  gc->pendingFinalizers = 0                              ;
+  
+  memset( gc->freeBatches, 0, sizeof( gc->freeBatches ) );
+  
+  #if zFINALIZER_THREAD
+  gc->finalizerStarted = 0                              ;
+  gc->handedOff        = (struct zFinalizerQueue){ 0 } ;
+  #endif
+  
+  gc->cycle.phase = zCYCLE_IDLE ;
+  
+  gc->collections           = 0 ;
+  gc->minorCollections      = 0 ;
+  gc->promotions            = 0 ;
+  gc->allocations           = 0 ;
+  gc->bytesAllocated        = 0 ;
+  gc->indirectionsAllocated = 0 ;
+  gc->slotsAllocated        = 0 ;
+  gc->indirectionShifts     = 0 ;
+  gc->referenceRewrites     = 0 ;
+  gc->slotShifts            = 0 ;
+  gc->finalizers            = 0 ;
+  gc->weakCleared           = 0 ;
+  gc->weakObjects           = 0 ;
+  
+  gc->bytesReclaimed        = 0 ;
+  gc->lastBytesReclaimed    = 0 ;
+  
+  gc->longestGc = 0           ;
+  gc->sumGc     = 0           ;
+  gc->pauses    = 0           ;
+  gc->startedAt = zGc__now() ;
+  
+  memset( gc->pauseHistogram, 0, sizeof( gc->pauseHistogram ) );
+  memset( gc->types, 0, sizeof( gc->types ) );
+  
+  gc->numTraces    = 0    ;
+  gc->traceHook    = NULL ;
+  gc->traceContext = NULL ;
+  
+  for( uint64_t index = 0; index < (zNUM_UNIQUE_TYPES + 1) ; index ++ ){
+    struct zIndirection * indirection = zGc__indirection( gc, (struct zII){ .indirectionIndex = index });
+    indirection->objectType.objectType = index ;
+  }
+  
+  for( uint64_t index = 0; index < zNUM_REGISTERS ; index ++ ){
+    zGc__set( gc, index, zRESERVED_NULL );
+  }
+  
+  zGc__finalmap__zero( gc, (struct zII){ .indirectionIndex = 0 });
+}
+
+// creates a gc that starts out with size bytes, and can grow up to maximumSize bytes,
+// see HEAPSIZE-NOTES. the address space for maximumSize is reserved up front, but pages
+// only cost memory once they're used. options are any of the zCREATE_* flags, see
+// HUGEPAGE-NOTES
+// 
+static inline
+struct zGc *
+zGc__create_with_options(
+  size_t   size        ,
+  size_t   maximumSize ,
+  uint64_t options
+){
+  
+  if( size < sizeof( struct zGc ) ){
+    zGc__panic( "size is insufficient to hold gc metadata structure" );
+  }
+  
+  if( maximumSize < size ){
+    zGc__panic( "maximum size is smaller than the initial size" );
+  }
+  
+  uint64_t numSlots = (size - sizeof( struct zGc )) / zSLOT_SIZE ;
+  
+  if( zUNLIKELY( numSlots < zMINSLOTS ) ){
+    zGc__panic( "you cannot specify a gc of fewer than " zSTRINGVALUE( zMINSLOTS ) " SLOTS" );
+  }
+  
+  // only zGc__open makes file backed heaps
+  options &= ~ zCREATE_FILE ;
+  
+  int flags = MAP_PRIVATE | MAP_ANONYMOUS | MAP_NORESERVE ;
+  
+  // there's no point populating the whole reservation of a growable heap
+  if( ( options & zCREATE_POPULATE ) && size == maximumSize ){
+    flags |= MAP_POPULATE ;
+  }
+  
+  char * start = MAP_FAILED ;
+  
+  if( options & zCREATE_HUGETLB ){
+    // huge page mappings have to be a whole number of huge pages
+    size_t hugeSize = ( maximumSize + zHUGE_PAGE_SIZE - 1 ) & ~ ( zHUGE_PAGE_SIZE - 1 ) ;
+    
+    // and must be reserved, or running short of huge pages shows up as a SIGBUS on touch
+    // instead of a failure here
+    start = mmap( NULL, hugeSize, PROT_READ | PROT_WRITE, ( flags & ~ MAP_NORESERVE ) | MAP_HUGETLB, -1, 0 );
+    
+    if( start == MAP_FAILED ){
+      zGc__warn( "failed to map huge pages for gc, using transparent huge pages : %s", strerror( errno ) );
+      options = ( options & ~ zCREATE_HUGETLB ) | zCREATE_HUGEPAGE ;
+    }
+  }
+  
+  if( start == MAP_FAILED ){
+    start = mmap( NULL, maximumSize, PROT_READ | PROT_WRITE, flags, -1, 0 );
+    if( zUNLIKELY( start == MAP_FAILED ) ){
+      zGc__panic( "failed to alloc memory for gc : %s", strerror( errno ) );
+    }
+    
+    if( options & zCREATE_HUGEPAGE ){
+      if( madvise( start, maximumSize, MADV_HUGEPAGE ) ){
+        zGc__warn( "failed to ask for transparent huge pages for gc : %s", strerror( errno ) );
+        options &= ~ zCREATE_HUGEPAGE ;
+      }
+    }
+  }
+  
+  if( ( options & zCREATE_POPULATE ) && ! ( flags & MAP_POPULATE ) ){
+    uintptr_t pageSize = sysconf( _SC_PAGESIZE );
+    for( size_t offset = 0 ; offset < size ; offset += pageSize ){
+      start[ offset ] = 0 ;
+    }
+  }
+  
+  struct zGc * gc = (struct zGc *) start ;
+  
+  zGc__initialize( gc, numSlots, (maximumSize - sizeof( struct zGc )) / zSLOT_SIZE, options );
+  
+  return gc ;
+}
+
+static inline
+struct zGc *
+zGc__create_growable(
+  size_t size        ,
+  size_t maximumSize
+){
+  return zGc__create_with_options( size, maximumSize, 0 );
+}
+
+static inline
+struct zGc *
+zGc__create(
+  size_t size
+){
+  return zGc__create_with_options( size, size, 0 );
+}
+
+static inline
+void *
+zGc__data(
+  struct zGc * gc ,
   struct zII   ii
 ){
-  // zGc__warn(
-  //   "finalize II[%llu] OT[%llu]",
-  //   (unsigned long long) ii.indirectionIndex,
-  //   (unsigned long long) zGc__indirection( gc, ii )->objectType.objectType
-  // );
+  struct zIndirection * indirection = zGc__indirection( gc, ii );
+  if( indirection->immediate == 1 ){
+    return & indirection->as_immediateData[0] ;
+  }
+  
+  char * data = & gc->slots[ indirection->as_slotIndex.slotIndex ].as_chardata[0] ;
+  if( zUNLIKELY( indirection->immediate == zLARGE_OBJECT ) ){
+    return * (char **) data ;
+  }
+  
+  return data ;
+}
+
+static inline
+void
+zLM__mark(
+  uint64_t * lm    ,
+  uint64_t   index
+){
+  uint64_t chunkIndex = index / 64 ;
+  uint64_t bitIndex   = index % 64 ;
+  
+  // zGc__warn( "__mark %llu %llu", (unsigned long long) chunkIndex, (unsigned long long) bitIndex );
+  // zGc__warn( "  pre:%llx", (unsigned long long) lm[ chunkIndex ] );
+  
+  lm[ chunkIndex ] |= (uint64_t) ( 1llu << bitIndex ) ;
+  
+  // zGc__warn( "  pst:%llx", (unsigned long long) lm[ chunkIndex ] );
+}
+
+static inline
+unsigned char
+zLM__marked(
+  uint64_t * lm    ,
+  uint64_t   index
+){
+  uint64_t chunkIndex = index / 64 ;
+  uint64_t bitIndex   = index % 64 ;
+  
+  // zGc__warn( "__marked %llu %llu", (unsigned long long) chunkIndex, (unsigned long long) bitIndex );
+  // zGc__warn( "  is :%llx", (unsigned long long) lm[ chunkIndex ] );
+  
+  return !! ( lm[ chunkIndex ] & (uint64_t) ( 1llu << bitIndex ) );
+}
+
+// marks every index in [from, to), other than the finalmap entries at each multiple of 64,
+// a word at a time
+// 
+static inline
+void
+zLM__mark_range(
+  uint64_t * lm   ,
+  uint64_t   from ,
+  uint64_t   to
+){
+  for( uint64_t chunkIndex = from / 64 ; chunkIndex * 64 < to ; chunkIndex ++ ){
+    uint64_t low  = from > chunkIndex * 64 ? from - chunkIndex * 64 : 0 ;
+    uint64_t high = to < chunkIndex * 64 + 64 ? to - chunkIndex * 64 : 64 ;
+    
+    uint64_t mask = ( ~ 0llu << low ) & ~ 1llu ;
+    if( high < 64 ){
+      mask &= ( 1llu << high ) - 1 ;
+    }
+    
+    lm[ chunkIndex ] |= mask ;
+  }
+}
+
+// the bits of a livemap chunk that a collection from floorII deals with : everything at
+// or above the floor, other than the finalmap entry at bit 0
+// 
+static inline
+uint64_t
+zLM__chunk_mask(
+  uint64_t   chunkIndex ,
+  struct zII floorII
+){
+  uint64_t mask = ~ 1llu ;
+  
+  if( chunkIndex * 64 < floorII.indirectionIndex ){
+    mask &= ~ 0llu << ( floorII.indirectionIndex - chunkIndex * 64 );
+  }
+  
+  return mask ;
+}
+
+////
+
+// mark that the given object requires finalization
+// finalizing is marked during allocation and shifting
+// 
+static inline
+void
+zLM__mark_finalizing(
+  uint64_t * lm    ,
+  uint64_t   index
+){
+  uint64_t chunkIndex = index / 32 ;
+  uint64_t bitIndex   = index % 32 ;
+  
+  lm[ chunkIndex ] |= (uint64_t) ( 1llu << ( bitIndex * 2llu + 1llu ) ) ;
+}
+
+// unmark that the given object requires finalization
+// ( used when shifting objects around )
+// 
+static inline
+void
+zLM__unmark_finalizing(
+  uint64_t * lm    ,
+  uint64_t   index
+){
+  uint64_t chunkIndex = index / 32 ;
+  uint64_t bitIndex   = index % 32 ;
+  
+  lm[ chunkIndex ] &= ~ (uint64_t) ( 1llu << ( bitIndex * 2llu + 1llu ) ) ;
+}
+
+static inline
+void
+zLM__marked_finalizing(
+  uint64_t * lm    ,
+  uint64_t   index
+){
+  uint64_t chunkIndex = index / 32 ;
+  uint64_t bitIndex   = index % 32 ;
+  
+  lm[ chunkIndex ] |= (uint64_t) ( 1llu << ( bitIndex * 2llu + 1llu ) ) ;
+}
+
+
+static inline
+void
+zGc__dump(
+  struct zGc * gc
+){
+  for( uint64_t jj = 0; jj < gc->nextII.indirectionIndex; jj++ ){
+    zGc__warn( 
+      "II[%llu] OT[%llu]",
+      (unsigned long long) jj,
+      (unsigned long long) zGc__indirection( gc, (struct zII){ .indirectionIndex = jj } )->objectType.objectType
+    );
+  }
+}
+
+// FINALMAP-NOTES
+// 
+// we're using every (ii%64==0)th indirection to store metadata on whether or not
+// the indirections need to have finalizers called on them, so we can avoid scanning
+// the entire bunch of them during garbage collection ( hoping to save time versus
+// a full scan checking 64x bytes during collection, should test it the other way
+// as well, but this seemed like a fun way to do it for now.
+// we let use ii 0 for this as well, even though it's zOT_NULL, our stand in for
+// no-value, because our no-value is just a reserved number and the ii itself never
+// gets accessed by anything. just knowing it's being pointed to is sufficient
+// information for anything needing to know if its II is zOT_NULL or not. the only
+// mandatory unique type. that works out for us here.
+// 
+// so, following that little explanation, I've decided to create a helper function
+// for incrementing the nextII value on the gc so it skips all of the (ii%64=0) entries
+// while 0'ing them out along the way, so it's always safe for us to assume they
+// contain a uint64_t bitfield of who needs to have finalizers called when they're
+// being collected
+// 
+// this is used for take_next_ii, in __new, and for newNextII in __collect()
+// it's responsible for renumbering all of the ii's. it returns the current value
+// and increments, unless the current value is mod64=0, then it increments first
+// to skip over those values
+// 
+// if doesn't bother with the skip when *counter is 0, since that slot is always
+// the unique type zOT_NULL, and it doesn't use its data
+// 
+// the "zeroing_if_skipped" bit should hopefully get optimized out of all the callsites
+// except in __new, where it's used to 0 out the finalmap. kind of ugly. probably
+// should rework it in the future.
+// 
+static inline
+uint32_t
+zGc__take_and_increment_skipping_first_of_each_64_and_zeroing_if_skipped(
+  uint32_t * counter    ,
+  uint64_t * zeroOnSkip
+){
+  if( (*counter) && (*counter) % 64 == 0 ){
+    (*counter) ++ ;
+    if( zeroOnSkip ){
+      * zeroOnSkip = 0 ;
+    }
+  }
+  
+  return (*counter) ++ ;
+}
+
+// GENERATION-NOTES
+// 
+// we never reorder anything while compacting, so the heap is always sorted by age,
+// oldest at the bottom of the slots and the top of the indirections. that means the
+// old generation is just a prefix of each : every indirection below oldII and every
+// slot below oldSI. a minor collection treats that prefix as implicitly alive and
+// only marks, renumbers and slides what comes after it, so it costs time in
+// proportion to what's been allocated since the last collection rather than in
+// proportion to the heap.
+// 
+// the catch is old objects that reference young ones. anything storing an ii into
+// an old object has to go through zGc__store ( or call zGc__write_barrier after the
+// fact ), which records the owner in the remembered set. minor collections use the
+// remembered objects as extra roots and rewrite their references after compacting.
+// without a @nursery, the write barrier remembers nothing, so zGc__collect_minor does a
+// full collection instead.
+// 
+// young objects count how many minor collections they've survived in their
+// indirection's age. since earlier allocations have always survived at least as
+// many collections as later ones, the survivors that have reached zPROMOTE_AFTER are
+// always a prefix of the young generation, and promoting them is just a matter of
+// moving oldII and oldSI up past them. once an object is old, its age is reused as
+// a flag marking its membership in the remembered set.
+// 
+// a full collection promotes everything that survives it and empties the remembered
+// set, since there's nothing young left for an old object to reference.
+// 
+
+static inline
+void
+zGc__remember(
+  struct zGc * gc ,
+  struct zII   ii
+){
+  struct zIndirection * indirection = zGc__indirection( gc, ii );
+  if( indirection->age ){
+    return ;
+  }
+  
+  if( zUNLIKELY( gc->numRemembered == gc->maxRemembered ) ){
+    uint64_t     maxRemembered = gc->maxRemembered ? gc->maxRemembered * 2 : 64 ;
+    struct zII * remembered    = realloc( gc->remembered, maxRemembered * sizeof( struct zII ) );
+    if( zUNLIKELY( ! remembered ) ){
+      zGc__panic( "failed to grow remembered set : %s", strerror( errno ) );
+    }
+    
+    gc->remembered    = remembered    ;
+    gc->maxRemembered = maxRemembered ;
+  }
+  
+  indirection->age = 1 ;
+  gc->remembered[ gc->numRemembered ++ ] = ii ;
+}
+
+// call after storing value into one of owner's fields
+// 
+static inline
+void
+zGc__write_barrier(
+  struct zGc * gc    ,
+  struct zII   owner ,
+  struct zII   value
+){
+  // a full collection is underway whenever a cycle is, and will promote
+  // everything, so there's no need to remember anything until it's done
+  // 
+  if(
+    zNURSERY_SLOTS
+    && gc->cycle.phase == zCYCLE_IDLE
+    && owner.indirectionIndex < gc->oldII.indirectionIndex
+    && value.indirectionIndex >= gc->oldII.indirectionIndex
+  ){
+    zGc__remember( gc, owner );
+  }
+}
+
+// INCREMENTAL-NOTES
+// 
+// marking can be spread over many small slices, either paid for by allocations or
+// run explicitly through zGc__collect_step. it's snapshot-at-the-beginning : the
+// cycle marks everything that was reachable when it began, plus everything allocated
+// since. to keep the snapshot intact while the mutator runs, zGc__store shades the
+// value it overwrites, so no object can be hidden from the marker by unlinking it.
+// registers are only read when the cycle begins, anything put in one afterwards
+// was either reachable at the snapshot or allocated since.
+// 
+// the livemap and descent array can't sit just past nextSI like they do for a
+// stop-the-world collection, since allocation keeps moving it. instead a cycle puts
+// them in the middle of the free space, and allocations must stay below them (slots)
+// and above them (indirections) until the cycle ends. if either runs out of room,
+// the rest of the cycle is completed on the spot.
+// 
+// once marking is done, the rewrite array is built in slices as well. what can't
+// be split up is the compaction, since every ii the mutator holds changes with it.
+// that happens in one final pause, which only has to slide objects around, all the
+// tracing already having been done.
+// 
+
+static inline
+uint64_t *
+zGc__cycle__livemap(
+  struct zGc * gc
+){
+  return (uint64_t *) & zGc__slot( gc, gc->cycle.livemapSI )->as_chardata[0] ;
+}
+
+static inline
+struct zII *
+zGc__cycle__rewrites(
+  struct zGc * gc
+){
+  return (struct zII *) & zGc__slot( gc, gc->cycle.rewritesSI )->as_chardata[0] ;
+}
+
+static inline
+uint64_t *
+zGc__cycle__slotmap(
+  struct zGc * gc
+){
+  return (uint64_t *) & zGc__slot( gc, gc->cycle.slotmapSI )->as_chardata[0] ;
+}
+
+// FIELDS-NOTES
+// 
+// a type whose references are all struct zII fields at fixed offsets can list them
+// with cfields instead of giving a cwalk :
+// 
+//   name    : Cons
+//   ctype   : struct { struct zII car ; struct zII cdr ;}
+//   cfields : car, cdr
+// 
+// the generator turns them into a mask of which of the object's first 64 zII sized
+// words are references, and every walk of such a type is the same loop over the bits
+// of its mask, rather than an indirect jump to a copy of its cwalk pasted in for each
+// kind of walk. zTYPEWALK does whichever the type needs, wherever a walk is wanted.
+// fields must be struct zII's, within the first 64 * sizeof( struct zII ) bytes, which
+// the generated code checks when it's compiled.
+// 
+
+// which words of an object of objectType are references, or 0 if it has a cwalk instead
+// 
+static inline
+uint64_t
+zGc__field_mask(
+  struct zOT objectType
+){
+  static const uint64_t fieldMasks [] = { 0 $FIELDMASKS } ;
+  
+  return fieldMasks[ objectType.objectType ] ;
+}
+
+$FIELDCHECKS
+
+// walks the object at zCURRENT_II, which is of zObjectType, calling yield on each of its
+// references, and going on to typeWalkExit. the walk's yield, zCURRENT_II, zTYPEWALK_PREFIX
+// and jump table of typeWalkTargets have to be in place, see FIELDS-NOTES
+// 
+#define zTYPEWALK( zObjectType ) \
+  do{ \
+    struct zOT zWalkType = ( zObjectType ); \
+    uint64_t zFields = zGc__field_mask( zWalkType ); \
+    if( zFields ){ \
+      struct zII * zFieldBase = (struct zII *) zGc__data( gc, zCURRENT_II ); \
+      for( ; zFields ; zFields &= zFields - 1 ){ \
+        yield( & zFieldBase[ __builtin_ctzll( zFields ) ] ); \
+      } \
+      goto zPASTEVALUE( zTYPEWALK_PREFIX, typeWalkExit ); \
+    } \
+    goto * zPASTEVALUE( zTYPEWALK_PREFIX, typeWalkTargets )[ zWalkType.objectType ]; \
+  } while( 0 )
+
+// LEAF-NOTES
+// 
+// types without a cwalk or cfields are leaves : their objects can't reference anything, so
+// walking them only ever dispatches straight to the walk's exit. marking sets a leaf's
+// livemap bit without pushing it onto the descent array, or a marking thread's deque,
+// and compaction moves it without running the reference rewriting walk over it. this
+// reads the child's indirection when it's marked, rather than when it's popped, so it
+// costs nothing extra, and a heap that's mostly leaf data has that much less descent.
+// 
+// leaves share the slots with everything else. slots are kept in ii order, which
+// compaction, pinning and the generations all rely on, so leaves can't be given a
+// region of their own without giving up that order.
+// 
+
+static inline
+int
+zGc__type_is_leaf(
+  struct zOT objectType
+){
+  static const unsigned char isLeaf [] = { 1 $ISLEAFS } ;
+  
+  return isLeaf[ objectType.objectType ] ;
+}
+
+static inline
+int
+zGc__is_leaf(
+  struct zGc * gc ,
+  struct zII   ii
+){
+  return zGc__type_is_leaf( zGc__indirection( gc, ii )->objectType );
+}
+
+// WEAK-NOTES
+// 
+// a type can hold a single weak reference instead of ordinary ones, or be an ephemeron,
+// a weak key holding on to a value only for as long as something else holds the key :
+// 
+//   name    : Weak
+//   ctype   : struct { struct zII target ; }
+//   cweak   : target
+// 
+//   name       : Ephemeron
+//   ctype      : struct { struct zII key ; struct zII value ; }
+//   cephemeron : key, value
+// 
+// such types are leaves as far as marking goes, see LEAF-NOTES, so they're marked without
+// marking what they refer to, remembered ones included. once the descent runs dry, the
+// live objects of weak types are looked over : the value of any ephemeron whose key
+// was marked is marked too, and since that may mark more keys, marking goes on until a
+// look over marks nothing more. then weak references to anything left unmarked are
+// cleared to zRESERVED_NULL, as are both fields of ephemerons whose keys are unmarked,
+// before renumbering starts. their fields are rewritten by compaction like any others.
+// 
+// finding them means going over every live object in the collection, and every old
+// one in the remembered set, once per look, so it's skipped by specs without any weak
+// types, and by collections when none survived the last one or have been allocated
+// since, going by the census, see CENSUS-NOTES. serializing follows weak fields just
+// like ordinary ones.
+// 
+// weak fields are set with zGc__store, and have to be read with zGc__load_weak, which
+// shades what it reads while a cycle is marking, so an incremental or concurrent cycle
+// can't clear out something the mutator has just taken a hold of.
+// 
+
+#define zWEAK_REFERENCE 1
+#define zEPHEMERON      2
+
+// whether objectType is a zWEAK_REFERENCE, a zEPHEMERON, or neither
+// 
+static inline
+uint32_t
+zGc__type_weakness(
+  struct zOT objectType
+){
+  static const unsigned char weaknesses [] = { 0 $WEAKNESSES } ;
+  
+  return weaknesses[ objectType.objectType ] ;
+}
+
+// the word of a weak object that holds its weak reference or ephemeron key, and that
+// holds an ephemeron's value
+// 
+static inline
+uint32_t
+zGc__weak_key(
+  struct zOT objectType
+){
+  static const unsigned char weakKeys [] = { 0 $WEAKKEYS } ;
+  
+  return weakKeys[ objectType.objectType ] ;
+}
+
+static inline
+uint32_t
+zGc__weak_value(
+  struct zOT objectType
+){
+  static const unsigned char weakValues [] = { 0 $WEAKVALUES } ;
+  
+  return weakValues[ objectType.objectType ] ;
+}
+
+// make sure the marker gets to an object that was part of the snapshot
+// 
+static inline
+void
+zGc__collect__shade(
+  struct zGc * gc ,
+  struct zII   ii
+){
+  if(
+    ii.indirectionIndex >= gc->cycle.floorII.indirectionIndex
+    && ii.indirectionIndex < gc->cycle.snapshotII.indirectionIndex
+  ){
+    uint64_t * livemap = zGc__cycle__livemap( gc );
+    
+    #if zCONCURRENT_MARKING
+    if( gc->cycle.markerRunning ){
+      // the marker owns the descent array, so shaded objects go to the far end of
+      // the rewrite array for it to pick up, see CONCURRENT-NOTES
+      uint64_t bit = 1llu << ( ii.indirectionIndex % 64 );
+      if(
+        ! ( __atomic_fetch_or( & livemap[ ii.indirectionIndex / 64 ], bit, __ATOMIC_RELAXED ) & bit )
+        && ! zGc__is_leaf( gc, ii )
+      ){
+        zGc__cycle__rewrites( gc )[ gc->cycle.limitII.indirectionIndex - 1 - gc->cycle.numShaded ] = ii ;
+        __atomic_store_n( & gc->cycle.numShaded, gc->cycle.numShaded + 1, __ATOMIC_RELEASE );
+      }
+      return ;
+    }
+    #endif
+    
+    if( ! zLM__marked( livemap, ii.indirectionIndex ) ){
+      zLM__mark( livemap, ii.indirectionIndex );
+      if( ! zGc__is_leaf( gc, ii ) ){
+        zGc__cycle__rewrites( gc )[ gc->cycle.finalDescentIndex ++ ] = ii ;
+      }
+    }
+  }
+}
+
+// marks an object taken from the free list while a cycle is in progress, which is
+// alive just like anything allocated since the snapshot, see STABLE-NOTES
+// 
+static inline
+void
+zGc__collect__mark_allocated(
+  struct zGc * gc ,
+  struct zII   ii
+){
+  uint64_t * livemap = zGc__cycle__livemap( gc );
+  
+  #if zCONCURRENT_MARKING
+  if( gc->cycle.markerRunning ){
+    __atomic_fetch_or( & livemap[ ii.indirectionIndex / 64 ], 1llu << ( ii.indirectionIndex % 64 ), __ATOMIC_RELAXED );
+    return ;
+  }
+  #endif
+  
+  zLM__mark( livemap, ii.indirectionIndex );
+}
+
+static inline
+void
+zGc__store(
+  struct zGc * gc    ,
+  struct zII   owner ,
+  struct zII * field ,
+  struct zII   value
+){
+  if( zUNLIKELY( gc->cycle.phase == zCYCLE_MARKING ) ){
+    zGc__collect__shade( gc, * field );
+  }
+  
+  #if zCONCURRENT_MARKING
+  // the marker may be reading this field, see CONCURRENT-NOTES
+  __atomic_store_n( & field->indirectionIndex, value.indirectionIndex, __ATOMIC_RELAXED );
+  #else
+  * field = value ;
+  #endif
+  zGc__write_barrier( gc, owner, value );
+}
+
+// reads a cweak or cephemeron field, see WEAK-NOTES
+// 
+static inline
+struct zII
+zGc__load_weak(
+  struct zGc * gc    ,
+  struct zII * field
+){
+  struct zII ii = * field ;
+  
+  if( zUNLIKELY( gc->cycle.phase == zCYCLE_MARKING ) ){
+    zGc__collect__shade( gc, ii );
+  }
+  
+  return ii ;
+}
+
+// does the given object hold any references into the young generation?
+// 
+static inline
+int
+zGc__references_young(
+  struct zGc * gc ,
+  struct zII   ii
+){
+  int young = 0 ;
+  
+  #define yield( ptr ) \
+    do{ \
+      young |= (ptr)->indirectionIndex >= gc->oldII.indirectionIndex ; \
+    } while( 0 )
+  
+  #define zTYPEWALK_PREFIX zYOUNG
+  
+  #define zCURRENT_II (ii)
+  
+  // type walk targets
+  // 
+  $TYPEWALKTARGETS
+  
+  // type walks
+  // 
+  zTYPEWALK( zGc__indirection( gc, ii )->objectType );
+  $TYPEWALKS
+  zPASTEVALUE( zTYPEWALK_PREFIX, typeWalkExit ):;
+  
+  #undef zCURRENT_II
+  #undef zTYPEWALK_PREFIX
+  #undef yield
+  
+  return young ;
+}
+
+static inline
+void
+zGc__collect__mark_reserved_in_livemap(
+  uint64_t * livemap ,
+  struct zII floorII
+){
+  // everything below the floor is alive without being looked at. for a full
+  // collection that's just the reserved objects, for a minor collection it's
+  // the entire old generation. we only mark the part of it sharing a livemap
+  // chunk with the floor, the chunks before that are never read.
+  // 
+  for(
+    uint64_t jj = ( floorII.indirectionIndex / 64 ) * 64 ;
+    jj < floorII.indirectionIndex ;
+    jj++
+  ){
+    // skip finalmap entries, other than zOT_NULL
+    if( jj && jj % 64 == 0 ){
+      continue ;
+    }
+    
+    zLM__mark( livemap, jj );
+  }
+}
+
+static inline
+void
+zGc__collect__push_registers_to_descent_array(
+  struct zGc * gc                ,
+  struct zII * rewrites          ,
+  uint64_t *   livemap           ,
+  struct zII   floorII           ,
+  uint32_t *   finalDescentIndex
+){
+  // first preload the descent array with whatevers in the current registers
+  for( uint64_t registerIndex = 0 ; registerIndex < zNUM_REGISTERS ; registerIndex ++ ){
+    if(
+      gc->registers[ registerIndex ].indirectionIndex >= floorII.indirectionIndex
+      && ! zLM__marked( livemap, gc->registers[ registerIndex ].indirectionIndex )
+    ){
+      if( ! zGc__is_leaf( gc, gc->registers[ registerIndex ] ) ){
+        rewrites[ (*finalDescentIndex)++ ].indirectionIndex
+          = gc->registers[ registerIndex ].indirectionIndex
+          ;
+      }
+      zLM__mark( livemap, gc->registers[ registerIndex ].indirectionIndex );
+    }
+  }
+}
+
+static inline
+void
+zGc__collect__push_roots_to_descent_array(
+  struct zGc * gc                ,
+  struct zII * rewrites          ,
+  uint64_t *   livemap           ,
+  struct zII   floorII           ,
+  uint32_t *   finalDescentIndex
+){
+  // the root stack is marked from just like the registers, see ROOTS-NOTES
+  for( uint64_t jj = 0 ; jj < gc->numRoots ; jj ++ ){
+    if(
+      gc->roots[ jj ].indirectionIndex >= floorII.indirectionIndex
+      && ! zLM__marked( livemap, gc->roots[ jj ].indirectionIndex )
+    ){
+      if( ! zGc__is_leaf( gc, gc->roots[ jj ] ) ){
+        rewrites[ (*finalDescentIndex)++ ] = gc->roots[ jj ] ;
+      }
+      zLM__mark( livemap, gc->roots[ jj ].indirectionIndex );
+    }
+  }
+}
+
+static inline
+void
+zGc__collect__push_remembered_to_descent_array(
+  struct zGc * gc                ,
+  struct zII * rewrites          ,
+  uint32_t *   finalDescentIndex
+){
+  // remembered objects are old and so already alive, they're pushed without
+  // being marked just so the descent walks them and finds their young children.
+  // weak ones are left for after the descent, see WEAK-NOTES
+  for( uint64_t jj = 0 ; jj < gc->numRemembered ; jj ++ ){
+    if( ! zGc__is_leaf( gc, gc->remembered[ jj ] ) ){
+      rewrites[ (*finalDescentIndex)++ ] = gc->remembered[ jj ] ;
+    }
+  }
+}
+
+static inline
+void
+zGc__collect__push_pinned_to_descent_array(
+  struct zGc * gc                ,
+  struct zII * rewrites          ,
+  uint64_t *   livemap           ,
+  struct zII   floorII           ,
+  uint32_t *   finalDescentIndex
+){
+  // pinned objects are roots, see PINNING-NOTES
+  for( uint64_t jj = 0 ; jj < gc->numPinned ; jj ++ ){
+    if(
+      gc->pinned[ jj ].indirectionIndex >= floorII.indirectionIndex
+      && ! zLM__marked( livemap, gc->pinned[ jj ].indirectionIndex )
+    ){
+      if( ! zGc__is_leaf( gc, gc->pinned[ jj ] ) ){
+        rewrites[ (*finalDescentIndex)++ ] = gc->pinned[ jj ] ;
+      }
+      zLM__mark( livemap, gc->pinned[ jj ].indirectionIndex );
+    }
+  }
+}
+
+static inline
+void
+zGc__collect__create_livemap(
+  struct zGc * gc                ,
+  struct zII * rewrites          ,
+  uint64_t *   livemap           ,
+  struct zII   floorII           ,
+  struct zII   snapshotII        ,
+  uint32_t *   descentIndex      ,
+  uint32_t *   finalDescentIndex ,
+  uint64_t     budget
+){
+  // now we'll descend the current object heirarchy and create the livemap
+  // stopping after budget objects, so incremental collections can pick up where we left off
+  uint64_t currentDescentIndex = * descentIndex ;
+  while( currentDescentIndex < *finalDescentIndex && budget ){
+    struct zIndirection * indirection =
+      zGc__indirection( gc, (struct zII){ .indirectionIndex = rewrites[ currentDescentIndex ].indirectionIndex } )
+      ;
+    
+    // zGc__warn(
+    //   "descent/RW[%llu]=II[%llu]=[%p] ot=%llu",
+    //   (unsigned long long) currentDescentIndex,
+    //   (unsigned long long) rewrites[ currentDescentIndex ].indirectionIndex,
+    //   indirection ,
+    //   (unsigned long long) indirection->objectType.objectType
+    // );
+    
+    // anything below the floor is reserved or old, and so already alive
+    // anything past the snapshot was allocated during an incremental cycle, and is alive too
+    // 
+    #define yield( ptr ) \
+      do{ \
+        if( \
+          (ptr)->indirectionIndex >= floorII.indirectionIndex \
+          && (ptr)->indirectionIndex < snapshotII.indirectionIndex \
+        ){ \
+          if(! zLM__marked( livemap, (ptr)->indirectionIndex ) ){ \
+            if( ! zGc__is_leaf( gc, * (ptr) ) ){ \
+              rewrites[ (*finalDescentIndex)++ ].indirectionIndex \
+                = (ptr)->indirectionIndex \
+                ; \
+            } \
+            zLM__mark( livemap, (ptr)->indirectionIndex ); \
+          } \
+        } \
+      } while (0)
+    
+    #define zTYPEWALK_PREFIX zSCAN
+    
+    #define zCURRENT_II (rewrites[ currentDescentIndex ])
+    
+    // type walk targets
+    // 
+    $TYPEWALKTARGETS
+    
+    // type walks
+    // 
+    zTYPEWALK( indirection->objectType );
+    $TYPEWALKS
+    zPASTEVALUE( zTYPEWALK_PREFIX, typeWalkExit ):;
+    
+    #undef zCURRENT_II
+    #undef zTYPEWALK_PREFIX
+    #undef yield
+    
+    currentDescentIndex ++ ;
+    budget -- ;
+  }
+  
+  * descentIndex = currentDescentIndex ;
+}
+
+// renumbers the live objects in livemap chunks [firstLivemapChunk, numLivemapChunks),
+// returning the next ii to be handed out. when starting from the floor's chunk, the
+// part of it below the floor is marked alive, and so maps onto itself
+// 
+static inline
+uint32_t
+zGc__collect__create_rewrite_array(
+  struct zGc * gc                ,
+  uint64_t     firstLivemapChunk ,
+  uint64_t     numLivemapChunks  ,
+  struct zII * rewrites          ,
+  uint64_t *   livemap           ,
+  uint32_t     nextNewII
+){
+  (void) gc ;
+  
+  for(
+    uint64_t chunkIndex = firstLivemapChunk ;
+    chunkIndex < numLivemapChunks ;
+    chunkIndex ++
+  ){
+    // visit only the set bits, lowest first
+    for( uint64_t live = livemap[ chunkIndex ] ; live ; live &= live - 1 ){
+      uint64_t sourceII = chunkIndex * 64 + __builtin_ctzll( live );
+      
+      rewrites[ sourceII ].indirectionIndex
+        = zGc__take_and_increment_skipping_first_of_each_64_and_zeroing_if_skipped(
+            & nextNewII ,
+            NULL
+          );
+    }
+  }
+  
+  return nextNewII ;
+}
+
+// LARGE-NOTES
+// 
+// with zLARGE_OBJECT_BYTES set, objects at least that big aren't kept in the slots,
+// where every collection that frees something below them would memmove them down.
+// each gets an mmap of its own instead, and keeps just a single slot, holding the
+// address of its data, so the compactor only ever slides that pointer around. the
+// data is placed zLARGE_OBJECT_HEADER bytes into its mapping, after the mapping's
+// length, which munmap needs back. objects of cpinned types are kept the same way
+// whatever their size, see PINNING-NOTES.
+// 
+// large objects are always marked in the finalmap, so a sweep visits them when they
+// die the same as anything with a cfree, and zGc__finalize unmaps them after calling
+// their cfree, if they have one. neither their indirection nor their slot are special
+// to marking or renumbering.
+// 
+// their bytes don't use up the heap, so on their own they'd never cause a collection.
+// once the bytes mapped for them since the last collection come to the size of the
+// heap, the next large allocation collects first.
+// 
+
+#define zLARGE_OBJECT_HEADER 16
+
+static inline
+int
+zGc__is_large_object_size(
+  size_t requiredSpace
+){
+  #if zLARGE_OBJECT_BYTES
+    return requiredSpace >= zLARGE_OBJECT_BYTES ;
+  #else
+    zUNUSED( requiredSpace );
+    return 0 ;
+  #endif
+}
+
+static inline
+int
+zGc__large_objects_are_due(
+  struct zGc * gc
+){
+  return
+    gc->cycle.phase == zCYCLE_IDLE
+    && gc->largeBytesSinceCollection >= gc->numSlots * zSLOT_SIZE
+    ;
+}
+
+// maps zeroed space for a large object, returning where its data goes
+// 
+static inline
+char *
+zGc__map_large_object(
+  struct zGc * gc            ,
+  size_t       requiredSpace
+){
+  uintptr_t pageSize = sysconf( _SC_PAGESIZE );
+  size_t    length   = ( zLARGE_OBJECT_HEADER + requiredSpace + pageSize - 1 ) & ~ ( pageSize - 1 ) ;
+  
+  char * start = mmap( NULL, length, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS, -1, 0 );
+  if( zUNLIKELY( start == MAP_FAILED ) ){
+    zGc__panic( "failed to map memory for large object : %s", strerror( errno ) );
+  }
+  
+  * (size_t *) start = length ;
+  
+  gc->largeObjects              += 1      ;
+  gc->largeBytes                += length ;
+  gc->largeBytesSinceCollection += length ;
+  
+  return start + zLARGE_OBJECT_HEADER ;
+}
+
+// unmaps a dead large object's mapping and takes it off the books, see LARGE-NOTES
+// 
+static inline
+void
+zGc__unmap_large_object(
+  struct zGc * gc   ,
+  char *       data
+){
+  char * start  = data - zLARGE_OBJECT_HEADER ;
+  size_t length = * (size_t *) start ;
+  
+  munmap( start, length );
+  
+  __atomic_fetch_sub( & gc->largeObjects, 1, __ATOMIC_RELAXED );
+  __atomic_fetch_sub( & gc->largeBytes, length, __ATOMIC_RELAXED );
+}
+
+// takes a large object off the books without unmapping it, so its cfree still has its
+// data until it's run, see DEFER-NOTES
+// 
+static inline
+void
+zGc__forget_large_object(
+  struct zGc * gc   ,
+  char *       data
+){
+  size_t length = * (size_t *) ( data - zLARGE_OBJECT_HEADER ) ;
+  
+  __atomic_fetch_sub( & gc->largeObjects, 1, __ATOMIC_RELAXED );
+  __atomic_fetch_sub( & gc->largeBytes, length, __ATOMIC_RELAXED );
+}
+
+// PINNING-NOTES
+// 
+// zGc__data pointers are only good until the next allocation, since any allocation
+// may compact the heap. an object pinned with zGc__pin keeps its slot data where it
+// is until it's unpinned again, so a pointer to it can be handed to code that holds
+// on to it, and it stays alive meanwhile, the pinned list being part of the roots.
+// pins nest, the object is unpinned when every zGc__pin has had its zGc__unpin.
+// 
+// since slots are in the same order as indirections, everything before a pinned
+// object in the slots has been compacted by the time the compactor gets to it, and
+// can't have been moved past its start. the compactor leaves it be and carries on
+// after its end, wasting whatever was dead in the gap below it until it's unpinned.
+// while anything is pinned, compaction isn't done in parallel, since its ranges
+// each assume what they move packs down against the one before.
+// 
+// allocation only ever happens above the highest pinned object, so a pin on something
+// allocated recently holds the heap up to there until it's released, and if newer pins
+// are always taken before older ones are released, the heap can only grow. pins are
+// meant to be held across a handful of collections at most. objects of a type with
+// cpinned set are meant to stay put for their whole life, so they're given a mapping
+// of their own, just like large objects, see LARGE-NOTES, and never leave a gap in
+// the slots. pinning a large object just keeps it alive.
+// 
+// only indirections move while renumbering, so ii's of pinned objects still change.
+// immediate objects are kept in their indirection, so they can't be pinned.
+// 
+
+// pins ii, returning a pointer to its data that stays good until it's unpinned
+// 
+static inline
+void *
+zGc__pin(
+  struct zGc * gc ,
+  struct zII   ii
+){
+  struct zIndirection * indirection = zGc__indirection( gc, ii );
+  if( zUNLIKELY( indirection->immediate == 1 ) ){
+    zGc__panic( "cannot pin II[%" PRIu32 "], its data is kept in its indirection", ii.indirectionIndex );
+  }
+  
+  if( zUNLIKELY( gc->numPinned == gc->maxPinned ) ){
+    uint64_t     maxPinned = gc->maxPinned ? gc->maxPinned * 2 : 16 ;
+    struct zII * pinned    = realloc( gc->pinned, maxPinned * sizeof( struct zII ) );
+    if( zUNLIKELY( ! pinned ) ){
+      zGc__panic( "failed to grow pinned list : %s", strerror( errno ) );
+    }
+    
+    gc->pinned    = pinned    ;
+    gc->maxPinned = maxPinned ;
+  }
+  
+  if( indirection->immediate == 0 ){
+    indirection->immediate = zPINNED ;
+  }
+  
+  gc->pinned[ gc->numPinned ++ ] = ii ;
+  
+  return zGc__data( gc, ii );
+}
+
+static inline
+void
+zGc__unpin(
+  struct zGc * gc ,
+  struct zII   ii
+){
+  uint64_t found = gc->numPinned ;
+  int      again = 0 ;
+  
+  for( uint64_t jj = 0 ; jj < gc->numPinned ; jj ++ ){
+    if( gc->pinned[ jj ].indirectionIndex == ii.indirectionIndex ){
+      if( found == gc->numPinned ){
+        found = jj ;
+      } else {
+        again = 1 ;
+        break ;
+      }
+    }
+  }
+  
+  if( zUNLIKELY( found == gc->numPinned ) ){
+    zGc__panic( "cannot unpin II[%" PRIu32 "], it isn't pinned", ii.indirectionIndex );
+  }
+  
+  gc->pinned[ found ] = gc->pinned[ -- gc->numPinned ] ;
+  
+  struct zIndirection * indirection = zGc__indirection( gc, ii );
+  if( ! again && indirection->immediate == zPINNED ){
+    indirection->immediate = 0 ;
+  }
+}
+
+// how many slots zGc__collect__move_slot_data will move for the given object
+// 
+static inline
+uint64_t
+zGc__collect__slots_to_move(
+  struct zGc *          gc          ,
+  struct zIndirection * indirection
+){
+  char * source = (char *) gc->slots[ indirection->as_slotIndex.slotIndex ].as_chardata ;
+  zUNUSED( source );
+  
+  if( indirection->immediate == zLARGE_OBJECT ){
+    return 1 ;
+  }
+  
+  $TYPESIZETARGETS
+  
+  goto * typeSizeTargets[ indirection->objectType.objectType ] ;
+  $TYPESIZES
+  typeSizeExit:;
+  
+  return 0 ;
+}
+
+// runs the cfree, if any, of an object of the given type whose data is at data
+// 
+static inline
+void
+zGc__run_cfree(
+  struct zOT objectType ,
+  void *     data
+){
+  zUNUSED( data );
+  
+  #define zPREFIX zINLIVE
+  #define zCURRENT_DATA (data)
+  
+  static void * zInlineJumps [] = { && zINLIVEcFreeExit $CFREETARGETS } ;
+  (void) zInlineJumps ;
+  
+  goto * zInlineJumps[ objectType.objectType ];
+  $CFREES
+  zINLIVEcFreeExit:;
+  
+  #undef zPREFIX
+  #undef zCURRENT_DATA
+}
+
+// DEFER-NOTES
+// 
+// with @deferFinalizers, the cfrees of what a collection finds dead aren't run in its
+// pause. zGc__finalize copies each dead object's data onto a queue kept outside the
+// heap instead, and its cfree is run on the copy later, by zGc__run_finalizers, for
+// about as long as it's given. the object's indirection and slots are reclaimed by the
+// collection as usual, and it's counted as finalized then. so are large objects, whose
+// data isn't copied, only where it is, and whose mappings are kept until their cfree
+// has run.
+// 
+// with @finalizerThread as well, the end of each pause hands whatever was queued to a
+// thread of its own, started the first time there's anything for it, which runs them
+// while the mutator carries on. if the thread can't be started, they're left for
+// zGc__run_finalizers. either way, how many are still waiting is in the stats as
+// finalizing.
+// 
+// a cfree only ever sees a copy of its object, so it mustn't hold on to the pointer it's
+// given, nor touch the gc, which may be in the middle of anything by the time it runs.
+// the queue belongs to the process, so a heap opened again drops what was left in it,
+// see PERSIST-NOTES.
+// 
+
+// makes room for bytes more at the end of queue, returning where they go
+// 
+static inline
+char *
+zGc__finalizer_queue__reserve(
+  struct zFinalizerQueue * queue ,
+  uint64_t                 bytes
+){
+  if( zUNLIKELY( queue->size + bytes > queue->max ) ){
+    // what's already been run makes room first
+    if( queue->start ){
+      memmove( queue->entries, queue->entries + queue->start, queue->size - queue->start );
+      queue->size  -= queue->start ;
+      queue->start  = 0            ;
+    }
+    
+    if( queue->size + bytes > queue->max ){
+      uint64_t max = queue->max ? queue->max : 4096 ;
+      while( max < queue->size + bytes ){
+        max *= 2 ;
+      }
+      
+      char * entries = realloc( queue->entries, max );
+      if( zUNLIKELY( ! entries ) ){
+        zGc__panic( "failed to grow finalizer queue : %s", strerror( errno ) );
+      }
+      
+      queue->entries = entries ;
+      queue->max     = max     ;
+    }
+  }
+  
+  char * end = queue->entries + queue->size ;
+  queue->size += bytes ;
+  return end ;
+}
+
+// puts count objects' worth of data on the end of the queue, see DEFER-NOTES
+// 
+static inline
+void
+zGc__finalizer_queue__push(
+  struct zGc * gc         ,
+  struct zOT   objectType ,
+  int          large      ,
+  uint64_t     count      ,
+  void *       data       ,
+  uint64_t     bytes
+){
+  // whole headers, so the data of every entry is as aligned as the queue itself
+  uint64_t size =
+    ( bytes + sizeof( struct zFinalizerEntry ) - 1 )
+    / sizeof( struct zFinalizerEntry )
+    * sizeof( struct zFinalizerEntry )
+    ;
+  
+  struct zFinalizerEntry * entry =
+    (struct zFinalizerEntry *) zGc__finalizer_queue__reserve(
+      & gc->finalizing                        ,
+      sizeof( struct zFinalizerEntry ) + size
+    );
+  
+  entry->objectType = objectType.objectType ;
+  entry->large      = large                 ;
+  entry->count      = count                 ;
+  entry->size       = size                  ;
+  
+  memcpy( entry->data, data, bytes );
+  
+  __atomic_fetch_add( & gc->pendingFinalizers, count, __ATOMIC_RELAXED );
+}
+
+// copies what the dead object at ii needs for its cfree onto the queue, see DEFER-NOTES
+// 
+static inline
+void
+zGc__defer_finalizer(
+  struct zGc * gc ,
+  struct zII   ii
+){
+  struct zIndirection * indirection = zGc__indirection( gc, ii );
+  char *                data        = zGc__data( gc, ii );
+  
+  if( indirection->immediate == zLARGE_OBJECT ){
+    zGc__finalizer_queue__push( gc, indirection->objectType, 1, 1, & data, sizeof( char * ) );
+    zGc__forget_large_object( gc, data );
+    return ;
+  }
+  
+  uint64_t bytes =
+    indirection->immediate == 1
+    ? sizeof( indirection->as_immediateData )
+    : zGc__collect__slots_to_move( gc, indirection ) * zSLOT_SIZE
+    ;
+  
+  zGc__finalizer_queue__push( gc, indirection->objectType, 0, 1, data, bytes );
+}
+
+// BATCHFREE-NOTES
+// 
+// a type can have a cfreebatch instead of a cfree, which each collection runs just once
+// for all of the type's dead, with these pointing at count copies of their data laid
+// out as an array of the type. it suits types whose objects hold on to something that's
+// cheaper to give back all at once, like mappings to be unmapped together, or buffers
+// to be returned to a pool.
+// 
+// while compacting, each dead object of such a type only has its data copied onto the
+// end of its type's batch, a large object's mapping being unmapped right after. once
+// compaction is done, each type's batch is run, and its objects counted as finalized,
+// in one go. with @deferFinalizers, each batch is queued as a single entry instead, see
+// DEFER-NOTES. the batches are kept from one collection to the next, so they only grow
+// to the most of a type that ever died at once.
+// 
+// the copies are only good while the cfreebatch runs. the type has to be of a fixed
+// size, so it can't have a csize.
+// 
+
+// how big each object in a type's batch is, 0 if the type has no cfreebatch
+// 
+static inline
+uint64_t
+zGc__free_batch_size(
+  struct zOT objectType
+){
+  static const uint32_t freeBatchSizes [] = { 0 $FREEBATCHSIZES } ;
+  return freeBatchSizes[ objectType.objectType ] ;
+}
+
+// runs the cfreebatch of the given type on numObjects copies of its objects' data
+// 
+static inline
+void
+zGc__run_cfree_batch(
+  struct zOT objectType ,
+  void *     objects    ,
+  uint64_t   numObjects
+){
+  zUNUSED( objects );
+  zUNUSED( numObjects );
+  
+  #define zPREFIX zBATCH
+  #define zCURRENT_BATCH (objects)
+  #define zCURRENT_COUNT (numObjects)
+  
+  static void * zBatchJumps [] = { && zBATCHcFreeBatchExit $CFREEBATCHTARGETS } ;
+  (void) zBatchJumps ;
+  
+  goto * zBatchJumps[ objectType.objectType ];
+  $CFREEBATCHES
+  zBATCHcFreeBatchExit:;
+  
+  #undef zPREFIX
+  #undef zCURRENT_BATCH
+  #undef zCURRENT_COUNT
+}
+
+// copies the data of a dead object of a cfreebatch type onto the end of its type's batch
+// 
+static inline
+void
+zGc__batch_finalizer(
+  struct zGc *          gc          ,
+  struct zIndirection * indirection ,
+  char *                data
+){
+  uint64_t            size  = zGc__free_batch_size( indirection->objectType );
+  struct zFreeBatch * batch = & gc->freeBatches[ indirection->objectType.objectType ];
+  
+  if( zUNLIKELY( batch->count == batch->max ) ){
+    uint64_t max     = batch->max ? batch->max * 2 : 64 ;
+    char *   objects = realloc( batch->objects, max * size );
+    if( zUNLIKELY( ! objects ) ){
+      zGc__panic( "failed to grow the batch of %s : %s", zGc__type_name( indirection->objectType ), strerror( errno ) );
+    }
+    
+    batch->objects = objects ;
+    batch->max     = max     ;
+  }
+  
+  memcpy( batch->objects + batch->count * size, data, size );
+  batch->count ++ ;
+  
+  // with its data copied, its mapping can go right away
+  if( indirection->immediate == zLARGE_OBJECT ){
+    zGc__unmap_large_object( gc, data );
+  }
+}
+
+// runs, or queues, the batch of each type that had any of its objects die, see
+// BATCHFREE-NOTES
+// 
+static inline
+void
+zGc__run_free_batches(
+  struct zGc * gc
+){
+  for( uint64_t tt = 1 ; zFREE_BATCH_TYPES && tt <= zNUM_OBJECT_TYPES ; tt ++ ){
+    struct zFreeBatch * batch      = & gc->freeBatches[ tt ];
+    struct zOT          objectType = { .objectType = tt };
+    
+    if( ! batch->count ){
+      continue ;
+    }
+    
+    #if zDEFER_FINALIZERS
+    zGc__finalizer_queue__push(
+      gc                                                ,
+      objectType                                        ,
+      0                                                 ,
+      batch->count                                      ,
+      batch->objects                                    ,
+      batch->count * zGc__free_batch_size( objectType )
+    );
+    #else
+    zGc__run_cfree_batch( objectType, batch->objects, batch->count );
+    #endif
+    
+    gc->finalizers              += batch->count ;
+    gc->types[ tt ].finalizers += batch->count ;
+    
+    batch->count = 0 ;
+  }
+}
+
+// finalizes the dead object at ii. its finalmap bit is left for the caller to clear,
+// along with those of the rest of its chunk
+// 
+static inline
+void
+zGc__finalize(
+  struct zGc * gc ,
+  struct zII   ii
+){
+  // zGc__warn(
+  //   "finalize II[%llu] OT[%llu]",
+  //   (unsigned long long) ii.indirectionIndex,
+  //   (unsigned long long) zGc__indirection( gc, ii )->objectType.objectType
+  // );
+  
+  struct zIndirection * indirection = zGc__indirection( gc, ii );
+  
+  // counted once their batch is run, see BATCHFREE-NOTES
+  if( zFREE_BATCH_TYPES && zGc__free_batch_size( indirection->objectType ) ){
+    zGc__batch_finalizer( gc, indirection, zGc__data( gc, ii ) );
+    return ;
+  }
+  
+  #if zDEFER_FINALIZERS
+  zGc__defer_finalizer( gc, ii );
+  #else
+  zGc__run_cfree( indirection->objectType, zGc__data( gc, ii ) );
+  
+  if( indirection->immediate == zLARGE_OBJECT ){
+    zGc__unmap_large_object( gc, zGc__data( gc, ii ) );
+  }
+  #endif
+  
+  gc->finalizers ++ ;
+  gc->types[ indirection->objectType.objectType ].finalizers ++ ;
+}
+
+// runs entries from the start of queue until at least count objects have been
+// finalized, returning how many were. this is all a finalizer thread does, so it
+// mustn't touch the gc beyond its counter
+// 
+static inline
+uint64_t
+zGc__finalizer_queue__run(
+  struct zGc *             gc    ,
+  struct zFinalizerQueue * queue ,
+  uint64_t                 count
+){
+  uint64_t ran = 0 ;
+  
+  while( ran < count && queue->start < queue->size ){
+    struct zFinalizerEntry * entry      = (struct zFinalizerEntry *) ( queue->entries + queue->start ) ;
+    struct zOT               objectType = { .objectType = entry->objectType } ;
+    
+    if( entry->large ){
+      char * data ;
+      memcpy( & data, entry->data, sizeof( char * ) );
+      
+      zGc__run_cfree( objectType, data );
+      
+      char * start = data - zLARGE_OBJECT_HEADER ;
+      munmap( start, * (size_t *) start );
+    } else if( zFREE_BATCH_TYPES && zGc__free_batch_size( objectType ) ){
+      zGc__run_cfree_batch( objectType, entry->data, entry->count );
+    } else {
+      zGc__run_cfree( objectType, entry->data );
+    }
+    
+    queue->start += sizeof( struct zFinalizerEntry ) + entry->size ;
+    ran          += entry->count ;
+  }
+  
+  if( queue->start == queue->size ){
+    queue->start = 0 ;
+    queue->size  = 0 ;
+  }
+  
+  __atomic_fetch_sub( & gc->pendingFinalizers, ran, __ATOMIC_RELAXED );
+  return ran ;
+}
+
+// runs queued finalizers for about budgetNs nanoseconds, returning how many are still
+// waiting, see DEFER-NOTES
+// 
+static inline
+uint64_t
+zGc__run_finalizers(
+  struct zGc * gc       ,
+  uint64_t     budgetNs
+){
+  uint64_t start = zGc__now();
+  
+  while( zGc__finalizer_queue__run( gc, & gc->finalizing, 64 ) ){
+    if( zGc__now() - start >= budgetNs ){
+      break ;
+    }
+  }
+  
+  return __atomic_load_n( & gc->pendingFinalizers, __ATOMIC_RELAXED );
+}
+
+#if zFINALIZER_THREAD
+
+static
+void *
+zGc__finalizer_thread(
+  void * context
+){
+  struct zGc *           gc      = context ;
+  struct zFinalizerQueue running = { 0 } ;
+  
+  pthread_mutex_lock( & gc->finalizerLock );
+  
+  for( ;; ){
+    while( gc->handedOff.start == gc->handedOff.size ){
+      pthread_cond_wait( & gc->finalizerWake, & gc->finalizerLock );
+    }
+    
+    // trade the queue just emptied for what's been handed off
+    struct zFinalizerQueue handedOff = gc->handedOff ;
+    gc->handedOff = running   ;
+    running       = handedOff ;
+    
+    pthread_mutex_unlock( & gc->finalizerLock );
+    
+    zGc__finalizer_queue__run( gc, & running, UINT64_MAX );
+    
+    pthread_mutex_lock( & gc->finalizerLock );
+  }
+  
+  return NULL ;
+}
+
+// hands what the collection queued to the finalizer thread, see DEFER-NOTES
+// 
+static inline
+void
+zGc__hand_off_finalizers(
+  struct zGc * gc
+){
+  struct zFinalizerQueue * queue = & gc->finalizing ;
+  
+  if( queue->start == queue->size ){
+    return ;
+  }
+  
+  if( zUNLIKELY( ! gc->finalizerStarted ) ){
+    pthread_mutex_init( & gc->finalizerLock, NULL );
+    pthread_cond_init( & gc->finalizerWake, NULL );
+    
+    // if we can't get a thread, they're left for zGc__run_finalizers
+    gc->finalizerStarted = pthread_create( & gc->finalizer, NULL, zGc__finalizer_thread, gc ) ? -1 : 1 ;
+    
+    if( zUNLIKELY( gc->finalizerStarted < 0 ) ){
+      zGc__warn( "failed to start finalizer thread, leaving finalizers for zGc__run_finalizers" );
+    } else {
+      pthread_detach( gc->finalizer );
+    }
+  }
+  
+  if( gc->finalizerStarted < 0 ){
+    return ;
+  }
+  
+  pthread_mutex_lock( & gc->finalizerLock );
+  
+  if( gc->handedOff.start == gc->handedOff.size ){
+    struct zFinalizerQueue emptied = gc->handedOff ;
+    gc->handedOff = * queue  ;
+    * queue       = emptied  ;
+  } else {
+    // the thread hasn't gotten to the last of them yet, so these go after
+    uint64_t bytes = queue->size - queue->start ;
+    memcpy( zGc__finalizer_queue__reserve( & gc->handedOff, bytes ), queue->entries + queue->start, bytes );
+  }
+  
+  queue->start = 0 ;
+  queue->size  = 0 ;
+  
+  pthread_cond_signal( & gc->finalizerWake );
+  pthread_mutex_unlock( & gc->finalizerLock );
+}
+
+#endif
+
+static inline
+void
+zGc__collect__move_slot_data(
+  struct zGc *          gc                     ,
+  struct zIndirection * newIndirectionLocation ,
+  uint32_t *            nextNewSlot            ,
+  uint64_t *            slotShifts
+){
+  // everything before a pinned object has been packed down below it, see PINNING-NOTES
+  if( newIndirectionLocation->immediate == zPINNED ){
+    *nextNewSlot =
+      newIndirectionLocation->as_slotIndex.slotIndex
+      + zGc__collect__slots_to_move( gc, newIndirectionLocation )
+      ;
+    return ;
+  }
+  
+  char * destination = (char *) gc->slots[ *nextNewSlot ].as_chardata ;
+  char * source = (char *) gc->slots[ newIndirectionLocation->as_slotIndex.slotIndex ].as_chardata ;
+  
+  // a gc with no variable sized items will fail if these aren't ignorable
+  zUNUSED( destination );
+  zUNUSED( source );
+  
+  newIndirectionLocation->as_slotIndex.slotIndex = *nextNewSlot ;
+  
+  // only the pointer to a large object's data moves, see LARGE-NOTES
+  if( newIndirectionLocation->immediate == zLARGE_OBJECT ){
+    if( destination != source ){
+      * (char **) destination = * (char **) source ;
+      (*slotShifts) ++ ;
+    }
+    (*nextNewSlot) += 1 ;
+    return ;
+  }
+  
+  // 
+  // !!! TYPESHIFTS increment nextNewSlot from within the type specific inclusions
+  // !!! TYPESHIFTS increment slotShifts from within type specific inclusions
+  // 
+  
+  $TYPESHIFTTARGETS
+  
+  goto * typeShiftTargets[ newIndirectionLocation->objectType.objectType ] ;
+  $TYPESHIFTS
+  typeShiftExit:;
+}
+
+static inline
+void
+zGc__collect__update_references(
+  struct zGc *          gc                     ,
+  struct zII *          rewrites               ,
+  struct zIndirection * newIndirectionLocation ,
+  struct zII            floorII                ,
+  uint64_t *            referenceRewrites
+){
+  #define zTYPEWALK_PREFIX zREWRITE
+  
+  // references below the floor are reserved or old, and never move
+  // 
+  #define yield( ptr ) \
+    do{ \
+      if( (ptr)->indirectionIndex >= floorII.indirectionIndex ){ \
+        (ptr)->indirectionIndex = rewrites[ (ptr)->indirectionIndex ].indirectionIndex ; \
+        (*referenceRewrites) ++ ; \
+      } \
+    } while( 0 )
+  
+  #define zCURRENT_II (zGc__ii( gc, newIndirectionLocation ))
+  
+  // type walk targets
+  // 
+  $TYPEWALKTARGETS
+  
+  // type walks
+  zTYPEWALK( newIndirectionLocation->objectType );
+  $TYPEWALKS
+  zPASTEVALUE( zTYPEWALK_PREFIX, typeWalkExit ) :;
+  
+  #undef zCURRENT_II
+  #undef yield
+  #undef zTYPEWALK_PREFIX
+}
+
+// starts the live counts over, from the old generation below floorII, see CENSUS-NOTES
+// 
+static inline
+void
+zGc__census__reset(
+  struct zGc * gc      ,
+  struct zII   floorII
+){
+  int full = floorII.indirectionIndex == zNUM_UNIQUE_TYPES + 1 ;
+  
+  for( uint64_t tt = 0 ; tt <= zNUM_OBJECT_TYPES ; tt ++ ){
+    struct zTypeCounts * counts = & gc->types[ tt ] ;
+    
+    counts->liveObjects = full ? 0 : counts->oldObjects ;
+    counts->liveBytes   = full ? 0 : counts->oldBytes   ;
+    counts->oldObjects  = counts->liveObjects ;
+    counts->oldBytes    = counts->liveBytes   ;
+  }
+}
+
+// counts a survivor into counts, indexed by objectType, once it's been moved. slots is how
+// far moving it took nextNewSlot, see CENSUS-NOTES
+// 
+static inline
+void
+zGc__census__count(
+  struct zGc *          gc          ,
+  struct zTypeCounts *  counts      ,
+  struct zIndirection * indirection ,
+  uint64_t              slots       ,
+  int                   old
+){
+  // moving a pinned object also skips nextNewSlot past the gap in front of it, see PINNING-NOTES
+  if( indirection->immediate == zPINNED ){
+    slots = zGc__collect__slots_to_move( gc, indirection );
+  }
+  
+  uint64_t bytes = zSLOT_SIZE + slots * zSLOT_SIZE ;
+  if( indirection->immediate == zLARGE_OBJECT ){
+    bytes += * (size_t *) ( (char *) zGc__data( gc, zGc__ii( gc, indirection ) ) - zLARGE_OBJECT_HEADER ) ;
+  }
+  
+  counts = & counts[ indirection->objectType.objectType ] ;
+  
+  counts->liveObjects ++ ;
+  counts->liveBytes += bytes ;
+  
+  if( old ){
+    counts->oldObjects ++ ;
+    counts->oldBytes += bytes ;
+  }
+}
+
+// works out how many weak objects there are from the live counts, see WEAK-NOTES
+// 
+static inline
+void
+zGc__census__count_weak(
+  struct zGc * gc
+){
+  #if zWEAK_TYPES
+  gc->weakObjects = 0 ;
+  for( uint64_t tt = 0 ; tt <= zNUM_OBJECT_TYPES ; tt ++ ){
+    if( zGc__type_weakness( (struct zOT){ .objectType = tt } ) ){
+      gc->weakObjects += gc->types[ tt ].liveObjects ;
+    }
+  }
+  #else
+  zUNUSED( gc );
+  #endif
+}
+
+// moves a live object's indirection and slot data to where they're being compacted to,
+// rewrites its references, and counts it into counts, as old if it's being promoted,
+// returning its new indirection
+// 
+static inline
+struct zIndirection *
+zGc__collect__compact_object(
+  struct zGc *         gc                ,
+  struct zII *         rewrites          ,
+  struct zII           sourceII          ,
+  struct zII           floorII           ,
+  uint32_t *           nextNewSlot       ,
+  uint64_t *           indirectionShifts ,
+  uint64_t *           slotShifts        ,
+  uint64_t *           referenceRewrites ,
+  struct zTypeCounts * counts            ,
+  int                  old
+){
+  // move indirection
+  
+  struct zIndirection * newIndirectionLocation =
+    zGc__indirection(
+      gc,
+      (struct zII){
+        .indirectionIndex =
+          rewrites[ sourceII.indirectionIndex ].indirectionIndex
+      }
+    );
+  
+  struct zIndirection * oldIndirectionLocation =
+    zGc__indirection( gc, sourceII ) ;
+  
+  // zGc__warn(
+  //   "shifting %llu -> %llu ( %llu->objectType )" ,
+  //   (unsigned long long) zGc__ii( gc, oldIndirectionLocation ).indirectionIndex ,
+  //   (unsigned long long) zGc__ii( gc, newIndirectionLocation ).indirectionIndex ,
+  //   (unsigned long long) oldIndirectionLocation->objectType.objectType
+  // );
+  
+  if( newIndirectionLocation != oldIndirectionLocation ){
+    * newIndirectionLocation = * oldIndirectionLocation ;
+    (*indirectionShifts) ++ ;
+    
+    if( zGc__finalmap__marked( gc, sourceII ) ){
+      zGc__finalmap__move( gc, sourceII, rewrites[ sourceII.indirectionIndex ] );
+    }
+  }
+  
+  // move slotdata
+  
+  uint32_t firstNewSlot = *nextNewSlot ;
+  
+  if( newIndirectionLocation->immediate != 1 ){
+    zGc__collect__move_slot_data(
+      gc                     ,
+      newIndirectionLocation ,
+      nextNewSlot            ,
+      slotShifts
+    );
+  }
+  
+  zGc__census__count( gc, counts, newIndirectionLocation, *nextNewSlot - firstNewSlot, old );
+  
+  // update references, of which leaves have none, unless they're weak, see LEAF-NOTES
+  
+  if(
+    ! zGc__type_is_leaf( newIndirectionLocation->objectType )
+    || zGc__type_weakness( newIndirectionLocation->objectType )
+  ){
+    zGc__collect__update_references(
+      gc                     ,
+      rewrites               ,
+      newIndirectionLocation ,
+      floorII                ,
+      referenceRewrites
+    );
+  }
+  
+  return newIndirectionLocation ;
+}
+
+static inline
+uint32_t
+zGc__collect__compact_objects_and_rewrite_references(
+  struct zGc *  gc                ,
+  uint64_t      numLivemapChunks  ,
+  struct zII *  rewrites          ,
+  uint64_t *    livemap           ,
+  struct zII    floorII           ,
+  struct zSI    floorSI           ,
+  uint32_t      promoteAfter      ,
+
+  struct zII *  promotedII        ,
+  struct zSI *  promotedSI        ,
+  uint64_t *    promotions        ,
+  uint64_t *    indirectionShifts ,
+  uint64_t *    slotShifts        ,
+  uint64_t *    referenceRewrites
+){
+  uint32_t nextNewSlot = floorSI.slotIndex ;
+  
+  // survivors old enough to be promoted are always a prefix of those we move, see GENERATION-NOTES
+  int promoting = 1 ;
+  * promotedII = floorII ;
+  * promotedSI = floorSI ;
+  
+  for(
+    uint32_t chunkIndex = floorII.indirectionIndex / 64 ;
+    chunkIndex < numLivemapChunks ;
+    chunkIndex ++
+  ){
+    // we always skip bitIndex = 0, since that's where our finalmap chunks are located
+    // we'll skip zOT_NULL as well, but who cares since it's static and needs nothing done
+    // anything below the floor in the chunk it shares is left as is
+    // 
+    uint64_t mask = zLM__chunk_mask( chunkIndex, floorII );
+    
+    // the dead are read from the finalmap up front, and their bits cleared all at once.
+    // moving the live only ever sets bits below the one being moved, which have already
+    // been visited
+    // 
+    uint64_t * finalmap = zGc__finalmap( gc, (struct zII){ .indirectionIndex = chunkIndex * 64 } );
+    uint64_t   live     = livemap[ chunkIndex ] & mask ;
+    uint64_t   dead     = * finalmap & ~ livemap[ chunkIndex ] & mask ;
+    
+    * finalmap &= ~ dead ;
+    
+    for( uint64_t visit = live | dead ; visit ; visit &= visit - 1 ){
+      uint64_t bit = visit & - visit ;
+      struct zII sourceII = (struct zII){ .indirectionIndex = chunkIndex * 64 + __builtin_ctzll( visit ) };
+      
+      if( ! ( live & bit ) ){
+        zGc__finalize( gc, sourceII );
+        continue ;
+      }
+      
+      // age and promote, deciding before the move so it's counted as old, see CENSUS-NOTES
+      
+      promoting = promoting && zGc__indirection( gc, sourceII )->age + 1 >= (int) promoteAfter ;
+      
+      struct zIndirection * newIndirectionLocation =
+        zGc__collect__compact_object(
+          gc                ,
+          rewrites          ,
+          sourceII          ,
+          floorII           ,
+          & nextNewSlot     ,
+          indirectionShifts ,
+          slotShifts        ,
+          referenceRewrites ,
+          gc->types         ,
+          promoting
+        );
+      
+      if( promoting ){
+        newIndirectionLocation->age = 0 ;
+        
+        * promotedII = (struct zII){ .indirectionIndex = zGc__ii( gc, newIndirectionLocation ).indirectionIndex + 1 };
+        * promotedSI = (struct zSI){ .slotIndex = nextNewSlot };
+        (*promotions) ++ ;
+      } else {
+        newIndirectionLocation->age ++ ;
+      }
+    }
+  }
+  
+  return nextNewSlot ;
+}
+
+// STABLE-NOTES
+// 
+// with @stableHandles, an object keeps the ii it was allocated with for as long as it
+// lives. collections don't renumber the survivors, so they never have to rewrite the
+// references to them either, whether in other objects, the registers, the root stack,
+// the pinned list, or anywhere outside the heap the program kept an ii. only the slot
+// data is compacted, with each survivor's as_slotIndex following its data down.
+// 
+// the dead are put on a free list instead, linked through the as_slotIndex of their
+// indirections, which are given zOT_NULL and no slot data. each collection builds the
+// list anew, lowest ii first, giving back the dead above the highest survivor by
+// lowering nextII rather than listing them. allocations take from the list before
+// taking new ii's. a cycle in progress counts everything allocated after its snapshot
+// as alive by it being above the snapshot, which those taken from the list aren't, so
+// they're marked in its livemap as they're taken instead.
+// 
+// with the slots no longer in the same order as the indirections, compaction goes
+// through them by a bitmap of where each survivor's data starts, kept in the scratch
+// space after the rewrite array, a bit for every slot in the heap. each survivor's ii
+// is written over the start of its data to find it by from there, with the bytes it
+// displaces kept in its as_slotIndex until the data is moved.
+// 
+// generations rely on the indirections staying in the order they were allocated in, as
+// does splitting them into ranges between @compactThreads, so neither can be used along
+// with it, and zGc__collect_minor does a full collection. an ii kept past the death of
+// its object may be handed out again to a new one.
+// 
+
+// finalizes the dead at or above floorII and puts them on the free list, returning
+// what nextII comes down to, see STABLE-NOTES
+// 
+static inline
+uint32_t
+zGc__collect__sweep(
+  struct zGc * gc               ,
+  uint64_t     numLivemapChunks ,
+  uint64_t *   livemap          ,
+  struct zII   floorII
+){
+  uint32_t topII = 0 ; // one past the highest survivor, once one is found
+  
+  gc->freeII  = zRESERVED_NULL ;
+  gc->numFree = 0 ;
+  
+  // from the top down, so the list comes out lowest first, and the highest survivor is
+  // found before anything below it is listed
+  // 
+  for(
+    uint64_t chunkIndex = numLivemapChunks ;
+    chunkIndex -- > floorII.indirectionIndex / 64 ;
+  ){
+    uint64_t mask = zLM__chunk_mask( chunkIndex, floorII );
+    
+    // the last chunk may run past nextII
+    if( ( chunkIndex + 1 ) * 64 > gc->nextII.indirectionIndex ){
+      mask &= ~ 0llu >> ( ( chunkIndex + 1 ) * 64 - gc->nextII.indirectionIndex );
+    }
+    
+    uint64_t * finalmap = zGc__finalmap( gc, (struct zII){ .indirectionIndex = chunkIndex * 64 } );
+    uint64_t   live     = livemap[ chunkIndex ] & mask ;
+    uint64_t   dead     = ~ livemap[ chunkIndex ] & mask ;
+    uint64_t   final    = * finalmap & dead ;
+    
+    * finalmap &= ~ dead ;
+    
+    if( live && ! topII ){
+      topII = chunkIndex * 64 + 64 - __builtin_clzll( live );
+    }
+    
+    while( dead ){
+      uint64_t   bitIndex = 63 - __builtin_clzll( dead );
+      struct zII ii       = (struct zII){ .indirectionIndex = chunkIndex * 64 + bitIndex };
+      
+      dead &= ~ ( 1llu << bitIndex );
+      
+      if( final & ( 1llu << bitIndex ) ){
+        zGc__finalize( gc, ii );
+      }
+      
+      struct zIndirection * indirection = zGc__indirection( gc, ii );
+      indirection->objectType = zOT_NULL ;
+      indirection->immediate  = 1 ;
+      indirection->age        = 0 ;
+      
+      if( ii.indirectionIndex < topII ){
+        indirection->as_slotIndex = (struct zSI){ .slotIndex = gc->freeII.indirectionIndex };
+        gc->freeII = ii ;
+        gc->numFree ++ ;
+      }
+    }
+  }
+  
+  return topII ? topII : floorII.indirectionIndex ;
+}
+
+// compacts the survivors' slot data at or above floorSI in slot order, leaving their
+// indirections where they are, counting them into counts, and returns the slot after the
+// last, see STABLE-NOTES
+// 
+static inline
+uint32_t
+zGc__collect__compact_slots(
+  struct zGc *         gc               ,
+  uint64_t             numLivemapChunks ,
+  uint64_t *           livemap          ,
+  uint64_t *           slotmap          ,
+  struct zII           floorII          ,
+  struct zSI           floorSI          ,
+  uint64_t *           slotShifts       ,
+  struct zTypeCounts * counts
+){
+  uint64_t firstSlotChunk = floorSI.slotIndex / 64 ;
+  uint64_t numSlotChunks  = gc->nextSI.slotIndex / 64 + 1 ;
+  
+  memset( slotmap + firstSlotChunk, 0, ( numSlotChunks - firstSlotChunk ) * sizeof( uint64_t ) );
+  
+  // mark where each survivor's data starts, and leave its ii there
+  for(
+    uint64_t chunkIndex = floorII.indirectionIndex / 64 ;
+    chunkIndex < numLivemapChunks ;
+    chunkIndex ++
+  ){
+    for(
+      uint64_t live = livemap[ chunkIndex ] & zLM__chunk_mask( chunkIndex, floorII ) ;
+      live ;
+      live &= live - 1
+    ){
+      struct zII            ii          = (struct zII){ .indirectionIndex = chunkIndex * 64 + __builtin_ctzll( live ) };
+      struct zIndirection * indirection = zGc__indirection( gc, ii );
+      
+      // nothing is renumbered, so the survivors are all old, see CENSUS-NOTES
+      if( indirection->immediate == 1 ){
+        zGc__census__count( gc, counts, indirection, 0, 1 );
+        continue ;
+      }
+      
+      struct zII * start = (struct zII *) gc->slots[ indirection->as_slotIndex.slotIndex ].as_chardata ;
+      
+      zLM__mark( slotmap, indirection->as_slotIndex.slotIndex );
+      indirection->as_slotIndex.slotIndex = start->indirectionIndex ;
+      * start = ii ;
+    }
+  }
+  
+  // then move them down in the order their data is in
+  uint32_t nextNewSlot = floorSI.slotIndex ;
+  
+  for( uint64_t chunkIndex = firstSlotChunk ; chunkIndex < numSlotChunks ; chunkIndex ++ ){
+    for( uint64_t starts = slotmap[ chunkIndex ] ; starts ; starts &= starts - 1 ){
+      struct zSI            si          = (struct zSI){ .slotIndex = chunkIndex * 64 + __builtin_ctzll( starts ) };
+      struct zII *          start       = (struct zII *) gc->slots[ si.slotIndex ].as_chardata ;
+      struct zIndirection * indirection = zGc__indirection( gc, * start );
+      
+      start->indirectionIndex   = indirection->as_slotIndex.slotIndex ;
+      indirection->as_slotIndex = si ;
+      
+      uint32_t firstNewSlot = nextNewSlot ;
+      
+      zGc__collect__move_slot_data( gc, indirection, & nextNewSlot, slotShifts );
+      zGc__census__count( gc, counts, indirection, nextNewSlot - firstNewSlot, 1 );
+    }
+  }
+  
+  return nextNewSlot ;
+}
+
+#if zCOMPACT_THREADS > 1
+
+// COMPACTION-NOTES
+// 
+// with @compactThreads, renumbering and compacting are shared between that many threads
+// once there are at least zPARALLEL_COMPACT_MIN chunks of the livemap to go through.
+// 
+// the chunks are split into ranges. since we never reorder anything, the ii's and slots
+// a range's objects end up in only depend on how many ii's and slots the ranges before
+// it are keeping. so we count those up first, each range on its own, and a prefix sum
+// over them gives each range where to start. renumbering then fills in the rewrite
+// array for every range at once.
+// 
+// compacting is a little more involved, since objects only ever slide down, and a range
+// may be sliding its objects over ones an earlier range hasn't gotten to moving yet. so
+// ranges are handed out in order, and each waits for any earlier range whose indirections
+// or slot data it would overwrite. the lowest range still going never has to wait, so
+// they can't deadlock.
+// 
+// finalizers for the dead are run beforehand, on the collecting thread, so that the
+// finalmap only holds the live when the ranges start moving bits around in it.
+// 
+// cwalks are run on all of the threads at once, and must only touch the object they're
+// given. cfrees are still run on the collecting thread alone.
+// 
+
+#define zPARALLEL_COMPACT_MIN  1024
+#define zCOMPACT_RANGES        ( zCOMPACT_THREADS * 16 )
+
+struct zCompactRange {
+  uint64_t firstChunk        ;
+  uint64_t endChunk          ;
+  
+  // counted up separately for each range
+  uint64_t numLive           ;
+  uint64_t numSlots          ;
+  uint32_t firstDestinationII ;
+  uint32_t lowSourceSI       ;
+  uint32_t highSourceSI      ;
+  uint64_t numPromotable     ;
+  uint64_t promotableSlots   ;
+  
+  // from the prefix sums
+  uint32_t firstNewII        ; // when renumbering
+  uint32_t firstNewSI        ; // when compacting
+  uint64_t numPromoted       ;
+  
+  uint64_t indirectionShifts ;
+  uint64_t slotShifts        ;
+  uint64_t referenceRewrites ;
+  
+  // what it moved, see CENSUS-NOTES
+  struct zTypeCounts types [ zNUM_OBJECT_TYPES + 1 ] ;
+  
+  int      done              ;
+};
+
+struct zCompactors {
+  struct zGc *           gc           ;
+  struct zII *           rewrites     ;
+  uint64_t *             livemap      ;
+  struct zII             floorII      ;
+  uint32_t               promoteAfter ;
+  
+  uint32_t               numRanges    ;
+  uint32_t               nextRange    ;
+  struct zCompactRange * ranges       ;
+};
+
+static inline
+int
+zGc__collect__worth_compacting_in_parallel(
+  uint64_t firstLivemapChunk ,
+  uint64_t numLivemapChunks
+){
+  return numLivemapChunks - firstLivemapChunk >= zPARALLEL_COMPACT_MIN ;
+}
+
+// splits livemap chunks [firstLivemapChunk, numLivemapChunks) into ranges
+// 
+static inline
+struct zCompactRange *
+zGc__collect__compact_ranges(
+  uint64_t   firstLivemapChunk ,
+  uint64_t   numLivemapChunks  ,
+  uint32_t * numRanges
+){
+  struct zCompactRange * ranges = calloc( zCOMPACT_RANGES, sizeof( struct zCompactRange ) );
+  if( zUNLIKELY( ! ranges ) ){
+    return NULL ;
+  }
+  
+  uint64_t chunks = numLivemapChunks - firstLivemapChunk ;
+  
+  for( uint32_t rr = 0 ; rr < zCOMPACT_RANGES ; rr ++ ){
+    ranges[ rr ].firstChunk = firstLivemapChunk + chunks * rr / zCOMPACT_RANGES ;
+    ranges[ rr ].endChunk   = firstLivemapChunk + chunks * ( rr + 1 ) / zCOMPACT_RANGES ;
+  }
+  
+  * numRanges = zCOMPACT_RANGES ;
+  return ranges ;
+}
+
+// runs pass on the collecting thread and zCOMPACT_THREADS - 1 others, each taking ranges
+// in order until they run out. if some can't be started, the rest just take more ranges
+// 
+static inline
+void
+zGc__collect__run_compactors(
+  struct zCompactors * compactors ,
+  void *            (* pass)( void * )
+){
+  compactors->nextRange = 0 ;
+  
+  pthread_t threads [ zCOMPACT_THREADS ] ;
+  int       started [ zCOMPACT_THREADS ] ;
+  
+  for( uint32_t tt = 1 ; tt < zCOMPACT_THREADS ; tt ++ ){
+    started[ tt ] = ! pthread_create( & threads[ tt ], NULL, pass, compactors );
+  }
+  
+  pass( compactors );
+  
+  for( uint32_t tt = 1 ; tt < zCOMPACT_THREADS ; tt ++ ){
+    if( started[ tt ] ){
+      pthread_join( threads[ tt ], NULL );
+    }
+  }
+}
+
+static inline
+struct zCompactRange *
+zGc__collect__claim_range(
+  struct zCompactors * compactors
+){
+  uint32_t range = __atomic_fetch_add( & compactors->nextRange, 1, __ATOMIC_ACQ_REL );
+  
+  if( range >= compactors->numRanges ){
+    return NULL ;
+  }
+  
+  return & compactors->ranges[ range ];
+}
+
+static
+void *
+zGc__collect__renumber_worker(
+  void * argument
+){
+  struct zCompactors *   compactors = argument ;
+  struct zCompactRange * range      ;
+  
+  while( ( range = zGc__collect__claim_range( compactors ) ) ){
+    zGc__collect__create_rewrite_array(
+      compactors->gc       ,
+      range->firstChunk    ,
+      range->endChunk      ,
+      compactors->rewrites ,
+      compactors->livemap  ,
+      range->firstNewII
+    );
+  }
+  
+  return NULL ;
+}
+
+// renumbers like zGc__collect__create_rewrite_array, see COMPACTION-NOTES. returns whether
+// it did, and if so, the next ii to be handed out through finalNewII
+// 
+static inline
+int
+zGc__collect__create_rewrite_array_in_parallel(
+  struct zGc * gc                ,
+  uint64_t     firstLivemapChunk ,
+  uint64_t     numLivemapChunks  ,
+  struct zII * rewrites          ,
+  uint64_t *   livemap           ,
+  uint32_t     nextNewII         ,
+  uint32_t *   finalNewII
+){
+  struct zCompactors compactors = {
+    .gc       = gc       ,
+    .rewrites = rewrites ,
+    .livemap  = livemap  ,
+  };
+  
+  compactors.ranges = zGc__collect__compact_ranges( firstLivemapChunk, numLivemapChunks, & compactors.numRanges );
+  if( zUNLIKELY( ! compactors.ranges ) ){
+    return 0 ;
+  }
+  
+  for( uint32_t rr = 0 ; rr < compactors.numRanges ; rr ++ ){
+    struct zCompactRange * range = & compactors.ranges[ rr ];
+    
+    range->firstNewII = nextNewII ;
+    
+    uint64_t numLive = 0 ;
+    for( uint64_t chunk = range->firstChunk ; chunk < range->endChunk ; chunk ++ ){
+      numLive += __builtin_popcountll( livemap[ chunk ] );
+    }
+    
+    nextNewII = zGc__advance_ii( nextNewII, numLive );
+  }
+  
+  zGc__collect__run_compactors( & compactors, zGc__collect__renumber_worker );
+  
+  free( compactors.ranges );
+  
+  * finalNewII = nextNewII ;
+  return 1 ;
+}
+
+// runs the finalizers of everything dead in livemap chunks [firstLivemapChunk, numLivemapChunks)
+// 
+static inline
+void
+zGc__collect__finalize_dead(
+  struct zGc * gc                ,
+  uint64_t *   livemap           ,
+  struct zII   floorII           ,
+  uint64_t     firstLivemapChunk ,
+  uint64_t     numLivemapChunks
+){
+  for( uint64_t chunk = firstLivemapChunk ; chunk < numLivemapChunks ; chunk ++ ){
+    uint64_t * finalmap = zGc__finalmap( gc, (struct zII){ .indirectionIndex = chunk * 64 } );
+    uint64_t   dead     = * finalmap & ~ livemap[ chunk ] & zLM__chunk_mask( chunk, floorII );
+    
+    * finalmap &= ~ dead ;
+    
+    for( ; dead ; dead &= dead - 1 ){
+      zGc__finalize( gc, (struct zII){ .indirectionIndex = chunk * 64 + __builtin_ctzll( dead ) } );
+    }
+  }
+}
+
+// calls body for each live ii in the range, skipping finalmap chunks and anything below
+// the floor, just as zGc__collect__compact_objects_and_rewrite_references does
+// 
+#define zCOMPACT_RANGE_FOREACH( compactors, range, sourceII, ... ) \
+  do{ \
+    for( uint64_t chunkIndex = (range)->firstChunk ; chunkIndex < (range)->endChunk ; chunkIndex ++ ){ \
+      uint64_t bits = (compactors)->livemap[ chunkIndex ] & zLM__chunk_mask( chunkIndex, (compactors)->floorII ); \
+      while( bits ){ \
+        struct zII sourceII = { .indirectionIndex = chunkIndex * 64 + __builtin_ctzll( bits ) }; \
+        bits &= bits - 1 ; \
+        __VA_ARGS__ \
+      } \
+    } \
+  } while( 0 )
+
+static
+void *
+zGc__collect__measure_worker(
+  void * argument
+){
+  struct zCompactors *   compactors = argument ;
+  struct zCompactRange * range      ;
+  
+  while( ( range = zGc__collect__claim_range( compactors ) ) ){
+    int promoting = 1 ;
+    
+    range->lowSourceSI  = UINT32_MAX ;
+    range->highSourceSI = 0          ;
+    
+    zCOMPACT_RANGE_FOREACH( compactors, range, sourceII, {
+      struct zIndirection * indirection = zGc__indirection( compactors->gc, sourceII );
+      
+      if( ! range->numLive ){
+        range->firstDestinationII = compactors->rewrites[ sourceII.indirectionIndex ].indirectionIndex ;
+      }
+      range->numLive ++ ;
+      
+      uint64_t slots = 0 ;
+      if( indirection->immediate != 1 ){
+        slots = zGc__collect__slots_to_move( compactors->gc, indirection );
+        
+        uint32_t sourceSI = indirection->as_slotIndex.slotIndex ;
+        range->lowSourceSI  = sourceSI < range->lowSourceSI ? sourceSI : range->lowSourceSI ;
+        range->highSourceSI = sourceSI + slots > range->highSourceSI ? sourceSI + slots : range->highSourceSI ;
+        range->numSlots += slots ;
+      }
+      
+      if( promoting && indirection->age + 1 >= (int) compactors->promoteAfter ){
+        range->numPromotable ++ ;
+        range->promotableSlots += slots ;
+      } else {
+        promoting = 0 ;
+      }
+    });
+  }
+  
+  return NULL ;
+}
+
+// whether compacting range would overwrite anything earlier hasn't moved yet
+// 
+static inline
+int
+zGc__collect__range_overlaps(
+  struct zCompactRange * range   ,
+  struct zCompactRange * earlier
+){
+  if( ! earlier->numLive ){
+    return 0 ;
+  }
+  
+  return
+    ( range->numLive && earlier->endChunk * 64 > range->firstDestinationII )
+    || ( range->numSlots && earlier->highSourceSI > range->firstNewSI )
+    ;
+}
+
+static
+void *
+zGc__collect__compact_worker(
+  void * argument
+){
+  struct zCompactors *   compactors = argument ;
+  struct zCompactRange * range      ;
+  
+  while( ( range = zGc__collect__claim_range( compactors ) ) ){
+    for( struct zCompactRange * earlier = compactors->ranges ; earlier < range ; earlier ++ ){
+      if( zGc__collect__range_overlaps( range, earlier ) ){
+        while( ! __atomic_load_n( & earlier->done, __ATOMIC_ACQUIRE ) ){
+          sched_yield();
+        }
+      }
+    }
+    
+    uint32_t nextNewSlot = range->firstNewSI ;
+    uint64_t moved       = 0                 ;
+    
+    zCOMPACT_RANGE_FOREACH( compactors, range, sourceII, {
+      struct zIndirection * newIndirectionLocation =
+        zGc__collect__compact_object(
+          compactors->gc              ,
+          compactors->rewrites        ,
+          sourceII                    ,
+          compactors->floorII         ,
+          & nextNewSlot               ,
+          & range->indirectionShifts  ,
+          & range->slotShifts         ,
+          & range->referenceRewrites  ,
+          range->types                ,
+          moved < range->numPromoted
+        );
+      
+      if( moved < range->numPromoted ){
+        newIndirectionLocation->age = 0 ;
+      } else {
+        newIndirectionLocation->age ++ ;
+      }
+      
+      moved ++ ;
+    });
+    
+    __atomic_store_n( & range->done, 1, __ATOMIC_RELEASE );
+  }
+  
+  return NULL ;
+}
+
+// compacts like zGc__collect__compact_objects_and_rewrite_references, see COMPACTION-NOTES.
+// returns whether it did, and if so, the next slot to be handed out through nextNewSlot
+// 
+static inline
+int
+zGc__collect__compact_in_parallel(
+  struct zGc *  gc                ,
+  uint64_t      numLivemapChunks  ,
+  struct zII *  rewrites          ,
+  uint64_t *    livemap           ,
+  struct zII    floorII           ,
+  struct zSI    floorSI           ,
+  uint32_t      promoteAfter      ,
+  
+  struct zII *  promotedII        ,
+  struct zSI *  promotedSI        ,
+  uint64_t *    promotions        ,
+  uint64_t *    indirectionShifts ,
+  uint64_t *    slotShifts        ,
+  uint64_t *    referenceRewrites ,
+  uint32_t *    nextNewSlot
+){
+  uint64_t firstLivemapChunk = floorII.indirectionIndex / 64 ;
+  
+  struct zCompactors compactors = {
+    .gc           = gc           ,
+    .rewrites     = rewrites     ,
+    .livemap      = livemap      ,
+    .floorII      = floorII      ,
+    .promoteAfter = promoteAfter ,
+  };
+  
+  compactors.ranges = zGc__collect__compact_ranges( firstLivemapChunk, numLivemapChunks, & compactors.numRanges );
+  if( zUNLIKELY( ! compactors.ranges ) ){
+    return 0 ;
+  }
+  
+  zGc__collect__finalize_dead( gc, livemap, floorII, firstLivemapChunk, numLivemapChunks );
+  
+  zGc__collect__run_compactors( & compactors, zGc__collect__measure_worker );
+  
+  // survivors old enough to be promoted are always a prefix of those we move, see GENERATION-NOTES
+  int promoting = 1 ;
+  * promotedII = floorII ;
+  * promotedSI = floorSI ;
+  
+  uint32_t nextSI = floorSI.slotIndex ;
+  
+  for( uint32_t rr = 0 ; rr < compactors.numRanges ; rr ++ ){
+    struct zCompactRange * range = & compactors.ranges[ rr ];
+    
+    range->firstNewSI = nextSI ;
+    
+    if( promoting ){
+      range->numPromoted = range->numPromotable ;
+      
+      if( range->numPromotable ){
+        * promotedII = (struct zII){ .indirectionIndex = zGc__advance_ii( range->firstDestinationII, range->numPromotable ) };
+        * promotedSI = (struct zSI){ .slotIndex = nextSI + range->promotableSlots };
+        (*promotions) += range->numPromotable ;
+      }
+      
+      promoting = range->numPromotable == range->numLive ;
+    }
+    
+    nextSI += range->numSlots ;
+  }
+  
+  zGc__collect__run_compactors( & compactors, zGc__collect__compact_worker );
+  
+  for( uint32_t rr = 0 ; rr < compactors.numRanges ; rr ++ ){
+    (*indirectionShifts) += compactors.ranges[ rr ].indirectionShifts ;
+    (*slotShifts)        += compactors.ranges[ rr ].slotShifts        ;
+    (*referenceRewrites) += compactors.ranges[ rr ].referenceRewrites ;
+    
+    for( uint64_t tt = 0 ; tt <= zNUM_OBJECT_TYPES ; tt ++ ){
+      struct zTypeCounts * counts = & compactors.ranges[ rr ].types[ tt ] ;
+      
+      gc->types[ tt ].liveObjects += counts->liveObjects ;
+      gc->types[ tt ].liveBytes   += counts->liveBytes   ;
+      gc->types[ tt ].oldObjects  += counts->oldObjects  ;
+      gc->types[ tt ].oldBytes    += counts->oldBytes    ;
+    }
+  }
+  
+  free( compactors.ranges );
+  
+  * nextNewSlot = nextSI ;
+  return 1 ;
+}
+
+#endif
+
+static inline
+void
+zGc__collect__record_pause(
+  struct zGc * gc    ,
+  uint64_t     start
+){
+  uint64_t stop = zGc__now();
+  uint64_t total = stop - start ;
+  
+  gc->sumGc += total ;
+  gc->longestGc = total > gc->longestGc ? total : gc->longestGc ;
+  
+  gc->pauses ++ ;
+  gc->pauseHistogram[ zGc__pause_bucket( total ) ] ++ ;
+}
+
+// begins collecting everything at or above floorII / floorSI, treating everything below them
+// as alive. the livemap and rewrite array are placed at scratchSI, and are sized to handle
+// indirections up to limitII.
+// 
+static inline
+void
+zGc__collect__begin(
+  struct zGc * gc           ,
+  struct zII   floorII      ,
+  struct zSI   floorSI      ,
+  uint32_t     promoteAfter ,
+  struct zSI   scratchSI    ,
+  struct zII   limitII      ,
+  struct zSI   limitSI
+){
+  // allocate liveness bitmaps
+  // allocate slot rewrite arrays
+  
+  // we first use the rewrite array as a stack for live item descent
+  // for each root
+  //   mark root item in live map, push to live item descent
+  // while items in live item descent
+  //   pop item
+  //   for each child of item
+  //     if child not live
+  //       mark child live
+  //       push to item descent
+  
+  // scan liveness bitmaps
+  // determine and record new location to rewrite array
+  
+  // scan liveness bitmaps
+  // rewrite indirections and slots
+  
+  // rewrite registers
+  
+  // puts("");
+  // puts("pre-collect");
+  // zGc__stats( gc );
+  // zGc__registers( gc );
+  // zGc__dump( gc );
+  
+  uint64_t enteredAt = zGc__trace__enter( gc, zTRACE_ROOTS );
+  
+  uint64_t livemapSlots = zGc__slots_needed_for_collection_livemaps( gc, limitII.indirectionIndex );
+  uint64_t rewriteSlots = zGc__slots_needed_for_collection_rewrites( gc, limitII.indirectionIndex );
+  
+  // allocations pay for the cycle from here on, see ALLOCATION-NOTES
+  gc->allocationLimitII = 0 ;
+  
+  // zGc__slots_needed_for_collection leaves room for these, see HUGEPAGE-NOTES
+  struct zSI livemapSI  = zGc__huge_page_align( gc, scratchSI );
+  struct zSI rewritesSI = zGc__huge_page_align( gc, (struct zSI){ .slotIndex = livemapSI.slotIndex + livemapSlots } );
+  struct zSI slotmapSI  = (struct zSI){ .slotIndex = rewritesSI.slotIndex + rewriteSlots };
+  
+  gc->cycle = (struct zCycle){
+    .phase             = zCYCLE_MARKING ,
+    .floorII           = floorII        ,
+    .floorSI           = floorSI        ,
+    .promoteAfter      = promoteAfter   ,
+    .snapshotII        = gc->nextII     ,
+    .limitII           = limitII        ,
+    .limitSI           = limitSI        ,
+    .livemapSI         = livemapSI      ,
+    .rewritesSI        = rewritesSI     ,
+    .slotmapSI         = slotmapSI      ,
+    .livemapSlots      = livemapSlots   ,
+    .descentIndex      = 0              ,
+    .finalDescentIndex = 0              ,
+    .renumberChunk     = 0              ,
+    .nextNewII         = 0              ,
+    .trace             = { .startedAt = enteredAt } ,
+  };
+  
+  // zGc__warn(
+  //   "livemapSlots:%llu rewriteSlots:%llu "
+  //   "rewrites(%p-%p) slots(%p-%p) registers(%p-%p) livemap(%p-%p) indirections(%p-%p)",
+  //   (unsigned long long ) livemapSlots,
+  //   (unsigned long long ) rewriteSlots,
+  //   (struct zII *) & gc->slots[ gc->nextSI.slotIndex + livemapSlots ].as_chardata[0] ,
+  //   (union zSlot *) & gc->slots[ gc->nextSI.slotIndex + livemapSlots ].as_chardata[0]
+  //     + rewriteSlots,
+  //   gc->slots,
+  //   gc->slots + gc->numSlots,
+  //   gc->registers,
+  //   gc->registers + zNUM_REGISTERS,
+  //   (unsigned char *) & gc->slots[ gc->nextSI.slotIndex ].as_chardata[0] ,
+  //   (unsigned char *) & gc->slots[ gc->nextSI.slotIndex ].as_chardata[0] + livemapSlots * sizeof( union zSlot ),
+  //   zGc__indirection( gc, (struct zII){ .indirectionIndex = gc->nextII.indirectionIndex }),
+  //   zGc__indirection( gc, (struct zII){ .indirectionIndex = 1 })
+  // );
+  
+  uint64_t * livemap = zGc__cycle__livemap( gc );
+  struct zII * rewrites = zGc__cycle__rewrites( gc );
+  
+  // only the chunks from the floor onwards are ever looked at
+  uint64_t firstLivemapChunk = floorII.indirectionIndex / 64 ;
+  
+  memset( livemap + firstLivemapChunk, 0, livemapSlots * sizeof( union zSlot ) - firstLivemapChunk * sizeof( uint64_t ) );
+  memset( rewrites, 0, rewriteSlots * sizeof( struct zII ) );
+  
+  // we first use the rewrite array as a stack for live item descent
+  // we'll keep track of what's alive in the livemap, which is a big fat bitmap
+  
+  // finalDescentIndex records how many live objects we come across, acts as index into descent array
+  
+  zGc__collect__mark_reserved_in_livemap(
+    livemap ,
+    floorII
+  );
+  
+  zGc__collect__push_registers_to_descent_array(
+    gc                                 ,
+    rewrites                           ,
+    livemap                            ,
+    floorII                            ,
+    & gc->cycle.finalDescentIndex
+  );
+  
+  zGc__collect__push_roots_to_descent_array(
+    gc                                 ,
+    rewrites                           ,
+    livemap                            ,
+    floorII                            ,
+    & gc->cycle.finalDescentIndex
+  );
+  
+  zGc__collect__push_remembered_to_descent_array(
+    gc                                 ,
+    rewrites                           ,
+    & gc->cycle.finalDescentIndex
+  );
+  
+  zGc__collect__push_pinned_to_descent_array(
+    gc                                 ,
+    rewrites                           ,
+    livemap                            ,
+    floorII                            ,
+    & gc->cycle.finalDescentIndex
+  );
+  
+  zGc__trace__leave( gc, zTRACE_ROOTS, enteredAt );
+}
+
+#if zCONCURRENT_MARKING
+
+// CONCURRENT-NOTES
+// 
+// with @concurrent, a collection cycle's marking is done by a helper thread while the
+// mutator keeps running. it builds on the incremental machinery ( see INCREMENTAL-NOTES ),
+// the snapshot-at-the-beginning barrier in zGc__store being what keeps it correct.
+// 
+// while marking, the mutator only allocates past the snapshot, which the marker never
+// looks at, and shades objects through zGc__store. livemap bits are set atomically by
+// both threads, and whoever sets an object's bit is responsible for scanning it. the
+// marker pushes onto the descent array as usual, while the mutator stacks what it
+// shades down from the far end of the rewrite array, publishing the count for the
+// marker to follow. both stacks together never hold more than the number of marked
+// objects, so they can't run into one another.
+// 
+// when the marker runs out of work it says so and exits. the next time the mutator
+// checks in, it joins the thread and remarks : whatever it shaded since is moved onto
+// the descent array and marked on the spot. if the mutator needs the cycle finished
+// before the marker is done, it stops the marker early and finishes marking itself.
+// 
+// type cwalks are run on the marker thread, and must not write to the objects.
+// 
+
+static inline
+void
+zGc__collect__scan_concurrently(
+  struct zGc * gc       ,
+  struct zII * rewrites ,
+  uint64_t *   livemap  ,
+  struct zII   ii
+){
+  struct zII floorII    = gc->cycle.floorII    ;
+  struct zII snapshotII = gc->cycle.snapshotII ;
+  
+  #define yield( ptr ) \
+    do{ \
+      uint32_t childII = __atomic_load_n( & (ptr)->indirectionIndex, __ATOMIC_RELAXED ); \
+      if( \
+        childII >= floorII.indirectionIndex \
+        && childII < snapshotII.indirectionIndex \
+      ){ \
+        uint64_t bit = 1llu << ( childII % 64 ); \
+        if( \
+          ! ( __atomic_fetch_or( & livemap[ childII / 64 ], bit, __ATOMIC_RELAXED ) & bit ) \
+          && ! zGc__is_leaf( gc, (struct zII){ .indirectionIndex = childII } ) \
+        ){ \
+          rewrites[ gc->cycle.finalDescentIndex ++ ].indirectionIndex = childII ; \
+        } \
+      } \
+    } while( 0 )
+  
+  #define zTYPEWALK_PREFIX zCMARK
+  
+  #define zCURRENT_II (ii)
+  
+  // type walk targets
+  // 
+  $TYPEWALKTARGETS
+  
+  // type walks
+  // 
+  zTYPEWALK( zGc__indirection( gc, ii )->objectType );
+  $TYPEWALKS
+  zPASTEVALUE( zTYPEWALK_PREFIX, typeWalkExit ):;
+  
+  #undef zCURRENT_II
+  #undef zTYPEWALK_PREFIX
+  #undef yield
+}
+
+static
+void *
+zGc__collect__marker(
+  void * argument
+){
+  struct zGc * gc       = argument ;
+  struct zII * rewrites = zGc__cycle__rewrites( gc );
+  uint64_t *   livemap  = zGc__cycle__livemap( gc );
+  
+  while( ! __atomic_load_n( & gc->cycle.stopMarker, __ATOMIC_ACQUIRE ) ){
+    if( gc->cycle.descentIndex < gc->cycle.finalDescentIndex ){
+      zGc__collect__scan_concurrently( gc, rewrites, livemap, rewrites[ gc->cycle.descentIndex ] );
+      gc->cycle.descentIndex ++ ;
+      continue ;
+    }
+    
+    uint32_t numShaded = __atomic_load_n( & gc->cycle.numShaded, __ATOMIC_ACQUIRE );
+    if( gc->cycle.shadedConsumed < numShaded ){
+      zGc__collect__scan_concurrently(
+        gc       ,
+        rewrites ,
+        livemap  ,
+        rewrites[ gc->cycle.limitII.indirectionIndex - 1 - gc->cycle.shadedConsumed ]
+      );
+      gc->cycle.shadedConsumed ++ ;
+      continue ;
+    }
+    
+    break ;
+  }
+  
+  __atomic_store_n( & gc->cycle.markerDone, 1, __ATOMIC_RELEASE );
+  return NULL ;
+}
+
+static inline
+void
+zGc__collect__start_marker(
+  struct zGc * gc
+){
+  gc->cycle.markerDone     = 0 ;
+  gc->cycle.stopMarker     = 0 ;
+  gc->cycle.numShaded      = 0 ;
+  gc->cycle.shadedConsumed = 0 ;
+  
+  // if we can't get a thread, the cycle just continues incrementally
+  gc->cycle.markerRunning = ! pthread_create( & gc->cycle.marker, NULL, zGc__collect__marker, gc );
+  
+  if( zUNLIKELY( ! gc->cycle.markerRunning ) ){
+    zGc__warn( "failed to start marker thread, marking incrementally instead" );
+  }
+}
+
+// stops the marker, if it hasn't already, and moves anything shaded that it didn't
+// get to onto the descent array for the mutator to finish marking
+// 
+static inline
+void
+zGc__collect__join_marker(
+  struct zGc * gc
+){
+  __atomic_store_n( & gc->cycle.stopMarker, 1, __ATOMIC_RELEASE );
+  pthread_join( gc->cycle.marker, NULL );
+  gc->cycle.markerRunning = 0 ;
+  
+  struct zII * rewrites = zGc__cycle__rewrites( gc );
+  
+  while( gc->cycle.numShaded > gc->cycle.shadedConsumed ){
+    gc->cycle.numShaded -- ;
+    rewrites[ gc->cycle.finalDescentIndex ++ ] =
+      rewrites[ gc->cycle.limitII.indirectionIndex - 1 - gc->cycle.numShaded ]
+      ;
+  }
+}
+
+#endif
+
+#if zMARK_THREADS > 1
+
+// PARALLEL-NOTES
+// 
+// with @markThreads, marking that has to be done all at once is shared between that many
+// threads, the collecting thread being one of them, provided there are at least
+// zPARALLEL_MARK_MIN objects that could need marking. the threads are started for each
+// such collection and joined before it goes on to renumbering.
+// 
+// each thread has a fixed size work-stealing deque ( chase-lev, without the growing ).
+// the roots waiting on the descent array are dealt out between them, and livemap bits
+// are set atomically, so whoever sets an object's bit is the one to scan it. a thread
+// whose deque fills up spills half of it onto an overflow stack shared under a mutex,
+// kept in the rewrite array past the roots. each object is pushed at most once, so the
+// overflow can never run past the end of the rewrite array.
+// 
+// a thread that runs out of work takes from the overflow, then tries stealing from the
+// others, and failing that counts itself idle. once every thread is idle, no work is
+// left anywhere, and marking is done.
+// 
+// type cwalks are run on all of the threads at once, and must not write to the objects.
+// 
+
+#define zPARALLEL_MARK_MIN 65536
+#define zMARK_DEQUE_SIZE   4096
+#define zMARK_TAKE         256
+
+struct zMarkDeque {
+  int64_t  top                        ;
+  char     _topPadding [ 56 ]         ; // keep thieves off the owner's cache line
+  int64_t  bottom                     ;
+  char     _bottomPadding [ 56 ]      ;
+  uint32_t items [ zMARK_DEQUE_SIZE ] ;
+};
+
+struct zMarkers ;
+
+struct zMarkWorker {
+  struct zMarkers * markers ;
+  uint32_t          index   ;
+  pthread_t         thread  ;
+  struct zMarkDeque deque   ;
+};
+
+struct zMarkers {
+  struct zGc *       gc             ;
+  struct zII *       rewrites       ;
+  uint64_t *         livemap        ;
+  struct zII         floorII        ;
+  struct zII         snapshotII     ;
+  uint32_t           rootsBegin     ;
+  uint32_t           rootsEnd       ;
+  
+  pthread_mutex_t    overflowLock   ;
+  uint32_t           overflowBegin  ;
+  uint32_t           numOverflow    ;
+  
+  int                numWorkers     ;
+  int                numIdle        ;
+  int                started [ zMARK_THREADS ] ;
+  
+  struct zMarkWorker workers [ zMARK_THREADS ] ;
+};
+
+// only the owner pushes
+// 
+static inline
+int
+zMarkDeque__push(
+  struct zMarkDeque * deque ,
+  uint32_t            ii
+){
+  int64_t bottom = __atomic_load_n( & deque->bottom, __ATOMIC_RELAXED );
+  int64_t top    = __atomic_load_n( & deque->top,    __ATOMIC_ACQUIRE );
+  
+  if( bottom - top >= zMARK_DEQUE_SIZE ){
+    return 0 ;
+  }
+  
+  __atomic_store_n( & deque->items[ bottom % zMARK_DEQUE_SIZE ], ii, __ATOMIC_RELAXED );
+  __atomic_store_n( & deque->bottom, bottom + 1, __ATOMIC_RELEASE );
+  return 1 ;
+}
+
+// only the owner pops, from the same end it pushes to
+// 
+static inline
+int
+zMarkDeque__pop(
+  struct zMarkDeque * deque ,
+  uint32_t *          ii
+){
+  int64_t bottom = __atomic_load_n( & deque->bottom, __ATOMIC_RELAXED ) - 1 ;
+  __atomic_store_n( & deque->bottom, bottom, __ATOMIC_RELAXED );
+  __atomic_thread_fence( __ATOMIC_SEQ_CST );
+  int64_t top = __atomic_load_n( & deque->top, __ATOMIC_RELAXED );
+  
+  if( top > bottom ){
+    __atomic_store_n( & deque->bottom, bottom + 1, __ATOMIC_RELAXED );
+    return 0 ;
+  }
+  
+  * ii = __atomic_load_n( & deque->items[ bottom % zMARK_DEQUE_SIZE ], __ATOMIC_RELAXED );
+  
+  if( top < bottom ){
+    return 1 ;
+  }
+  
+  // last item, race any thieves for it
+  int won =
+    __atomic_compare_exchange_n(
+      & deque->top      ,
+      & top             ,
+      top + 1           ,
+      0                 ,
+      __ATOMIC_SEQ_CST  ,
+      __ATOMIC_RELAXED
+    );
+  
+  __atomic_store_n( & deque->bottom, bottom + 1, __ATOMIC_RELAXED );
+  return won ;
+}
+
+// anyone may steal, from the other end
+// 
+static inline
+int
+zMarkDeque__steal(
+  struct zMarkDeque * deque ,
+  uint32_t *          ii
+){
+  int64_t top = __atomic_load_n( & deque->top, __ATOMIC_ACQUIRE );
+  __atomic_thread_fence( __ATOMIC_SEQ_CST );
+  int64_t bottom = __atomic_load_n( & deque->bottom, __ATOMIC_ACQUIRE );
+  
+  if( top >= bottom ){
+    return 0 ;
+  }
+  
+  * ii = __atomic_load_n( & deque->items[ top % zMARK_DEQUE_SIZE ], __ATOMIC_RELAXED );
+  
+  return
+    __atomic_compare_exchange_n(
+      & deque->top      ,
+      & top             ,
+      top + 1           ,
+      0                 ,
+      __ATOMIC_SEQ_CST  ,
+      __ATOMIC_RELAXED
+    );
+}
+
+static inline
+int
+zMarkDeque__is_empty(
+  struct zMarkDeque * deque
+){
+  return
+    __atomic_load_n( & deque->top, __ATOMIC_ACQUIRE )
+    >= __atomic_load_n( & deque->bottom, __ATOMIC_ACQUIRE )
+    ;
+}
+
+// moves half of a full deque onto the overflow stack, making room for more
+// 
+static inline
+void
+zGc__collect__spill(
+  struct zMarkWorker * worker
+){
+  struct zMarkers * markers = worker->markers ;
+  
+  pthread_mutex_lock( & markers->overflowLock );
+  
+  uint32_t ii ;
+  for(
+    uint64_t spilled = 0 ;
+    spilled < zMARK_DEQUE_SIZE / 2 && zMarkDeque__pop( & worker->deque, & ii ) ;
+    spilled ++
+  ){
+    markers->rewrites[ markers->overflowBegin + markers->numOverflow ].indirectionIndex = ii ;
+    __atomic_store_n( & markers->numOverflow, markers->numOverflow + 1, __ATOMIC_RELAXED );
+  }
+  
+  pthread_mutex_unlock( & markers->overflowLock );
+}
+
+// moves up to zMARK_TAKE objects from the overflow stack onto the worker's deque
+// 
+static inline
+int
+zGc__collect__take_overflow(
+  struct zMarkWorker * worker
+){
+  struct zMarkers * markers = worker->markers ;
+  
+  if( ! __atomic_load_n( & markers->numOverflow, __ATOMIC_RELAXED ) ){
+    return 0 ;
+  }
+  
+  int took = 0 ;
+  
+  pthread_mutex_lock( & markers->overflowLock );
+  
+  while( markers->numOverflow && took < zMARK_TAKE ){
+    uint32_t ii = markers->rewrites[ markers->overflowBegin + markers->numOverflow - 1 ].indirectionIndex ;
+    if( ! zMarkDeque__push( & worker->deque, ii ) ){
+      break ;
+    }
+    __atomic_store_n( & markers->numOverflow, markers->numOverflow - 1, __ATOMIC_RELAXED );
+    took ++ ;
+  }
+  
+  pthread_mutex_unlock( & markers->overflowLock );
+  
+  return took ;
+}
+
+static inline
+void
+zGc__collect__push_in_parallel(
+  struct zMarkWorker * worker ,
+  uint32_t             ii
+){
+  while( ! zMarkDeque__push( & worker->deque, ii ) ){
+    zGc__collect__spill( worker );
+  }
+}
+
+static inline
+void
+zGc__collect__scan_in_parallel(
+  struct zMarkWorker * worker ,
+  struct zII           ii
+){
+  struct zMarkers * markers    = worker->markers     ;
+  struct zGc *      gc         = markers->gc         ;
+  uint64_t *        livemap    = markers->livemap    ;
+  struct zII        floorII    = markers->floorII    ;
+  struct zII        snapshotII = markers->snapshotII ;
+  
+  #define yield( ptr ) \
+    do{ \
+      uint32_t childII = (ptr)->indirectionIndex ; \
+      if( \
+        childII >= floorII.indirectionIndex \
+        && childII < snapshotII.indirectionIndex \
+      ){ \
+        uint64_t bit = 1llu << ( childII % 64 ); \
+        if( \
+          ! ( __atomic_fetch_or( & livemap[ childII / 64 ], bit, __ATOMIC_RELAXED ) & bit ) \
+          && ! zGc__is_leaf( gc, (struct zII){ .indirectionIndex = childII } ) \
+        ){ \
+          zGc__collect__push_in_parallel( worker, childII ); \
+        } \
+      } \
+    } while( 0 )
+  
+  #define zTYPEWALK_PREFIX zPMARK
+  
+  #define zCURRENT_II (ii)
+  
+  // type walk targets
+  // 
+  $TYPEWALKTARGETS
+  
+  // type walks
+  // 
+  zTYPEWALK( zGc__indirection( gc, ii )->objectType );
+  $TYPEWALKS
+  zPASTEVALUE( zTYPEWALK_PREFIX, typeWalkExit ):;
+  
+  #undef zCURRENT_II
+  #undef zTYPEWALK_PREFIX
+  #undef yield
+}
+
+// whether there's anything left for an idle worker to pick up
+// 
+static inline
+int
+zGc__collect__work_remains(
+  struct zMarkers * markers
+){
+  if( __atomic_load_n( & markers->numOverflow, __ATOMIC_RELAXED ) ){
+    return 1 ;
+  }
+  
+  for( uint32_t ww = 0 ; ww < zMARK_THREADS ; ww ++ ){
+    if( ! zMarkDeque__is_empty( & markers->workers[ ww ].deque ) ){
+      return 1 ;
+    }
+  }
+  
+  return 0 ;
+}
+
+static
+void *
+zGc__collect__mark_worker(
+  void * argument
+){
+  struct zMarkWorker * worker  = argument        ;
+  struct zMarkers *    markers = worker->markers ;
+  
+  // deal out the roots, the collecting thread taking those of any worker that couldn't be started
+  for( uint32_t root = markers->rootsBegin ; root < markers->rootsEnd ; root ++ ){
+    uint32_t owner = ( root - markers->rootsBegin ) % zMARK_THREADS ;
+    if( owner == worker->index || ( worker->index == 0 && ! markers->started[ owner ] ) ){
+      zGc__collect__push_in_parallel( worker, markers->rewrites[ root ].indirectionIndex );
+    }
+  }
+  
+  uint32_t victim = worker->index ;
+  uint32_t ii ;
+  
+  for(;;){
+    if( zMarkDeque__pop( & worker->deque, & ii ) ){
+      zGc__collect__scan_in_parallel( worker, (struct zII){ .indirectionIndex = ii } );
+      continue ;
+    }
+    
+    if( zGc__collect__take_overflow( worker ) ){
+      continue ;
+    }
+    
+    int stole = 0 ;
+    for( uint32_t tries = 1 ; tries < zMARK_THREADS && ! stole ; tries ++ ){
+      victim = ( victim + 1 ) % zMARK_THREADS ;
+      if( victim != worker->index ){
+        stole = zMarkDeque__steal( & markers->workers[ victim ].deque, & ii );
+      }
+    }
+    
+    if( stole ){
+      zGc__collect__scan_in_parallel( worker, (struct zII){ .indirectionIndex = ii } );
+      continue ;
+    }
+    
+    // nothing to be had, wait until there is or everyone else has given up too
+    __atomic_add_fetch( & markers->numIdle, 1, __ATOMIC_SEQ_CST );
+    for(;;){
+      if(
+        __atomic_load_n( & markers->numIdle, __ATOMIC_SEQ_CST )
+        == __atomic_load_n( & markers->numWorkers, __ATOMIC_SEQ_CST )
+      ){
+        return NULL ;
+      }
+      
+      if( zGc__collect__work_remains( markers ) ){
+        __atomic_sub_fetch( & markers->numIdle, 1, __ATOMIC_SEQ_CST );
+        break ;
+      }
+      
+      sched_yield();
+    }
+  }
+}
+
+static inline
+int
+zGc__collect__worth_marking_in_parallel(
+  struct zGc * gc
+){
+  return
+    gc->cycle.snapshotII.indirectionIndex - gc->cycle.floorII.indirectionIndex
+    >= zPARALLEL_MARK_MIN
+    ;
+}
+
+// marks everything reachable from the roots waiting on the descent array, see PARALLEL-NOTES
+// 
+static inline
+void
+zGc__collect__mark_in_parallel(
+  struct zGc * gc
+){
+  struct zMarkers * markers = malloc( sizeof( struct zMarkers ) );
+  if( zUNLIKELY( ! markers ) ){
+    // the single threaded descent will manage
+    return ;
+  }
+  
+  markers->gc            = gc                              ;
+  markers->rewrites      = zGc__cycle__rewrites( gc )      ;
+  markers->livemap       = zGc__cycle__livemap( gc )       ;
+  markers->floorII       = gc->cycle.floorII               ;
+  markers->snapshotII    = gc->cycle.snapshotII            ;
+  markers->rootsBegin    = gc->cycle.descentIndex          ;
+  markers->rootsEnd      = gc->cycle.finalDescentIndex     ;
+  markers->overflowBegin = gc->cycle.finalDescentIndex     ;
+  markers->numOverflow   = 0                               ;
+  markers->numWorkers    = zMARK_THREADS                   ;
+  markers->numIdle       = 0                               ;
+  
+  pthread_mutex_init( & markers->overflowLock, NULL );
+  
+  for( uint32_t ww = 0 ; ww < zMARK_THREADS ; ww ++ ){
+    markers->workers[ ww ].markers      = markers ;
+    markers->workers[ ww ].index        = ww      ;
+    markers->workers[ ww ].deque.top    = 0       ;
+    markers->workers[ ww ].deque.bottom = 0       ;
+  }
+  
+  // the collecting thread is worker 0
+  markers->started[ 0 ] = 1 ;
+  for( uint32_t ww = 1 ; ww < zMARK_THREADS ; ww ++ ){
+    markers->started[ ww ] = 0 ;
+  }
+  
+  for( uint32_t ww = 1 ; ww < zMARK_THREADS ; ww ++ ){
+    markers->started[ ww ] =
+      ! pthread_create(
+        & markers->workers[ ww ].thread ,
+        NULL                            ,
+        zGc__collect__mark_worker       ,
+        & markers->workers[ ww ]
+      );
+    
+    if( zUNLIKELY( ! markers->started[ ww ] ) ){
+      __atomic_sub_fetch( & markers->numWorkers, 1, __ATOMIC_SEQ_CST );
+    }
+  }
+  
+  zGc__collect__mark_worker( & markers->workers[ 0 ] );
+  
+  for( uint32_t ww = 1 ; ww < zMARK_THREADS ; ww ++ ){
+    if( markers->started[ ww ] ){
+      pthread_join( markers->workers[ ww ].thread, NULL );
+    }
+  }
+  
+  pthread_mutex_destroy( & markers->overflowLock );
+  free( markers );
+  
+  gc->cycle.descentIndex = gc->cycle.finalDescentIndex ;
+}
+
+#endif
+
+#if zWEAK_TYPES
+
+// whether ii will be collected, going by the marking so far
+// 
+static inline
+int
+zGc__collect__unmarked(
+  struct zGc * gc ,
+  struct zII   ii
+){
+  return
+    ii.indirectionIndex >= gc->cycle.floorII.indirectionIndex
+    && ii.indirectionIndex < gc->cycle.snapshotII.indirectionIndex
+    && ! zLM__marked( zGc__cycle__livemap( gc ), ii.indirectionIndex )
+    ;
+}
+
+// for a live object of any type, marks the value of an ephemeron whose key is marked,
+// or when clearing, clears a weak reference or ephemeron whose key isn't. returns
+// whether it did either, see WEAK-NOTES
+// 
+static inline
+uint64_t
+zGc__collect__weak_object(
+  struct zGc * gc       ,
+  struct zII   ii       ,
+  int          clearing
+){
+  struct zOT objectType = zGc__indirection( gc, ii )->objectType ;
+  uint32_t   weakness   = zGc__type_weakness( objectType );
+  
+  if( ! weakness ){
+    return 0 ;
+  }
+  
+  struct zII * fields = (struct zII *) zGc__data( gc, ii );
+  struct zII * key    = & fields[ zGc__weak_key( objectType ) ];
+  
+  if( clearing ){
+    if( ! zGc__collect__unmarked( gc, * key ) ){
+      return 0 ;
+    }
+    
+    * key = zRESERVED_NULL ;
+    if( weakness == zEPHEMERON ){
+      fields[ zGc__weak_value( objectType ) ] = zRESERVED_NULL ;
+    }
+    return 1 ;
+  }
+  
+  struct zII value = fields[ zGc__weak_value( objectType ) ];
+  
+  if(
+    weakness != zEPHEMERON
+    || zGc__collect__unmarked( gc, * key )
+    || ! zGc__collect__unmarked( gc, value )
+  ){
+    return 0 ;
+  }
+  
+  zLM__mark( zGc__cycle__livemap( gc ), value.indirectionIndex );
+  if( ! zGc__is_leaf( gc, value ) ){
+    zGc__cycle__rewrites( gc )[ gc->cycle.finalDescentIndex ++ ] = value ;
+  }
+  return 1 ;
+}
+
+// looks over the live weak objects of the collection, and the old ones it reaches
+// through the remembered set, returning how many zGc__collect__weak_object acted on
+// 
+static inline
+uint64_t
+zGc__collect__visit_weak(
+  struct zGc * gc       ,
+  int          clearing
+){
+  uint64_t * livemap    = zGc__cycle__livemap( gc );
+  uint64_t   floorII    = gc->cycle.floorII.indirectionIndex ;
+  uint64_t   snapshotII = gc->cycle.snapshotII.indirectionIndex ;
+  uint64_t   acted      = 0 ;
+  
+  if( ! gc->weakObjects ){
+    return 0 ;
+  }
+  
+  for( uint64_t chunk = floorII / 64 ; chunk * 64 < snapshotII ; chunk ++ ){
+    for( uint64_t live = livemap[ chunk ] ; live ; live &= live - 1 ){
+      uint64_t ii = chunk * 64 + __builtin_ctzll( live );
+      if( ii % 64 && ii >= floorII && ii < snapshotII ){
+        acted += zGc__collect__weak_object( gc, (struct zII){ .indirectionIndex = ii }, clearing );
+      }
+    }
+  }
+  
+  for( uint64_t jj = 0 ; jj < gc->numRemembered ; jj ++ ){
+    if( gc->remembered[ jj ].indirectionIndex < floorII ){
+      acted += zGc__collect__weak_object( gc, gc->remembered[ jj ], clearing );
+    }
+  }
+  
+  return acted ;
+}
+
+#endif
+
+// whether marking is still being left to the marker thread
+// 
+static inline
+int
+zGc__collect__marker_is_busy(
+  struct zGc * gc
+){
+  #if zCONCURRENT_MARKING
+    return
+      gc->cycle.markerRunning
+      && ! __atomic_load_n( & gc->cycle.markerDone, __ATOMIC_ACQUIRE )
+      ;
+  #else
+    zUNUSED( gc );
+    return 0 ;
+  #endif
+}
+
+// marks up to budget objects, returning whether marking has finished
+// 
+static inline
+int
+zGc__collect__mark(
+  struct zGc * gc     ,
+  uint64_t     budget
+){
+  #if zCONCURRENT_MARKING
+  if( gc->cycle.markerRunning ){
+    // unless we're being made to finish, leave the marker be until it's done
+    if( budget != UINT64_MAX && zGc__collect__marker_is_busy( gc ) ){
+      return 0 ;
+    }
+    
+    zGc__collect__join_marker( gc );
+  }
+  #endif
+  
+  uint64_t enteredAt = zGc__trace__enter( gc, zTRACE_MARK );
+  
+  #if zMARK_THREADS > 1
+  if( budget == UINT64_MAX && zGc__collect__worth_marking_in_parallel( gc ) ){
+    zGc__collect__mark_in_parallel( gc );
+  }
+  #endif
+  
+  for( ;; ){
+    zGc__collect__create_livemap(
+      gc                            ,
+      zGc__cycle__rewrites( gc )    ,
+      zGc__cycle__livemap( gc )     ,
+      gc->cycle.floorII             ,
+      gc->cycle.snapshotII          ,
+      & gc->cycle.descentIndex      ,
+      & gc->cycle.finalDescentIndex ,
+      budget
+    );
+    
+    if( gc->cycle.descentIndex < gc->cycle.finalDescentIndex ){
+      zGc__trace__leave( gc, zTRACE_MARK, enteredAt );
+      return 0 ;
+    }
+    
+    #if zEPHEMERON_TYPES
+    // values of ephemerons with marked keys are marked in turn, until there are
+    // no more, see WEAK-NOTES
+    if( zGc__collect__visit_weak( gc, 0 ) ){
+      if( budget == UINT64_MAX ){
+        continue ;
+      }
+      
+      zGc__trace__leave( gc, zTRACE_MARK, enteredAt );
+      return 0 ;
+    }
+    #endif
+    
+    break ;
+  }
+  
+  #if zWEAK_TYPES
+  gc->weakCleared += zGc__collect__visit_weak( gc, 1 );
+  #endif
+  
+  zGc__trace__leave( gc, zTRACE_MARK, enteredAt );
+  
+  // now we need to create to create a rewrite array, overwriting the descent array info
+  //   previously stored into it
+  
+  gc->cycle.phase         = zCYCLE_RENUMBERING ;
+  gc->cycle.renumberChunk = gc->cycle.floorII.indirectionIndex / 64 ;
+  gc->cycle.nextNewII     = gc->cycle.renumberChunk * 64 ;
+  
+  return 1 ;
+}
+
+// renumbers up to budget livemap chunks, returning whether everything from before the
+// snapshot has been renumbered. the chunk the snapshot falls in is left for the end.
+// 
+static inline
+int
+zGc__collect__renumber(
+  struct zGc * gc     ,
+  uint64_t     budget
+){
+  // nothing is renumbered with @stableHandles, see STABLE-NOTES
+  if( zSTABLE_HANDLES ){
+    return 1 ;
+  }
+  
+  uint64_t snapshotChunk = gc->cycle.snapshotII.indirectionIndex / 64 ;
+  
+  uint64_t endChunk =
+    snapshotChunk - gc->cycle.renumberChunk > budget
+    ? gc->cycle.renumberChunk + budget
+    : snapshotChunk
+    ;
+  
+  if( gc->cycle.renumberChunk < endChunk ){
+    uint64_t enteredAt = zGc__trace__enter( gc, zTRACE_RENUMBER );
+    
+    gc->cycle.nextNewII =
+      zGc__collect__create_rewrite_array(
+        gc                         ,
+        gc->cycle.renumberChunk    ,
+        endChunk                   ,
+        zGc__cycle__rewrites( gc ) ,
+        zGc__cycle__livemap( gc )  ,
+        gc->cycle.nextNewII
+      );
+    
+    gc->cycle.renumberChunk = endChunk ;
+    
+    zGc__trace__leave( gc, zTRACE_RENUMBER, enteredAt );
+  }
+  
+  return gc->cycle.renumberChunk >= snapshotChunk ;
+}
+
+// HEAPSIZE-NOTES
+// 
+// a gc made with zGc__create_growable reserves address space for its maximum size up
+// front, but only uses its initial size to begin with. since the indirections grow down
+// from the top of the slots in use, resizing means moving the indirection table to the
+// new top. the slots stay where they are and ii's don't change, and as it only happens
+// at the end of a collection, there aren't any pointers into the indirections left to
+// invalidate.
+// 
+// the heap doubles whenever a collection can't free up enough for an allocation. with
+// @liveRatio, full collections also resize it so that what survived takes up about that
+// percentage of it, never going below the size it was created with, and hand the dead
+// middle between the slots and the indirections back to the os with MADV_DONTNEED, so
+// a heap that was mostly garbage stops costing its peak rss.
+// 
+
+// returns the pages wholly within slots [firstSlot, endSlot) to the os. they read back as zeroes.
+// a file backed heap punches them out of its file instead, as they'd read back from it otherwise
+// 
+static inline
+void
+zGc__release_slots(
+  struct zGc * gc        ,
+  uint64_t     firstSlot ,
+  uint64_t     endSlot
+){
+  uintptr_t pageSize = sysconf( _SC_PAGESIZE );
+  uintptr_t first    = ( (uintptr_t) & gc->slots[ firstSlot ] + pageSize - 1 ) & ~ ( pageSize - 1 ) ;
+  uintptr_t end      = (uintptr_t) & gc->slots[ endSlot ] & ~ ( pageSize - 1 ) ;
+  
+  if( first < end ){
+    madvise( (void *) first, end - first, ( gc->options & zCREATE_FILE ) ? MADV_REMOVE : MADV_DONTNEED );
+  }
+}
+
+// moves the indirections to the top of numSlots slots. there can't be a cycle in
+// progress, and numSlots must fit what's in use
+// 
+static inline
+void
+zGc__resize(
+  struct zGc * gc       ,
+  uint64_t     numSlots
+){
+  uint64_t numIndirections = gc->nextII.indirectionIndex ;
+  uint64_t oldNumSlots     = gc->numSlots ;
+  
+  memmove(
+    & gc->slots[ numSlots - numIndirections ]    ,
+    & gc->slots[ oldNumSlots - numIndirections ] ,
+    numIndirections * sizeof( union zSlot )
+  );
+  
+  gc->numSlots = numSlots ;
+  
+  gc->allocationLimitII = 0 ;
+  
+  if( numSlots < oldNumSlots ){
+    zGc__release_slots( gc, numSlots, oldNumSlots );
+  }
+}
+
+// grows the heap enough for the allocation, if it can, returning whether it did
+// 
+static inline
+int
+zGc__grow_for_allocation(
+  struct zGc * gc            ,
+  uint64_t     numObjects    ,
+  uint64_t     requiredSlots
+){
+  uint64_t requiredIndirections = zGc__indirections_required_for_new( gc, numObjects );
+  
+  uint64_t neededSlots =
+    gc->nextII.indirectionIndex + requiredIndirections
+    + gc->nextSI.slotIndex + requiredSlots
+    + zGc__slots_needed_for_collection( gc, gc->nextII.indirectionIndex + requiredIndirections )
+    ;
+  
+  uint64_t numSlots = gc->numSlots * 2 > neededSlots ? gc->numSlots * 2 : neededSlots ;
+  numSlots = numSlots < gc->maxSlots ? numSlots : gc->maxSlots ;
+  
+  if( numSlots < neededSlots ){
+    return 0 ;
+  }
+  
+  zGc__resize( gc, numSlots );
+  return 1 ;
+}
+
+// sizes the heap after a full collection to the target live ratio, see HEAPSIZE-NOTES
+// 
+static inline
+void
+zGc__size_for_live_ratio(
+  struct zGc * gc
+){
+  uint64_t used = gc->nextII.indirectionIndex + gc->nextSI.slotIndex ;
+  
+  uint64_t numSlots =
+    used * 100 / ( zTARGET_LIVE_RATIO ? zTARGET_LIVE_RATIO : 100 )
+    + zGc__slots_needed_for_collection( gc, gc->nextII.indirectionIndex )
+    ;
+  numSlots = numSlots > gc->minSlots ? numSlots : gc->minSlots ;
+  numSlots = numSlots < gc->maxSlots ? numSlots : gc->maxSlots ;
+  
+  // shrinking only once it's worth it keeps a steady heap from bouncing around
+  if( numSlots > gc->numSlots || numSlots < gc->numSlots / 2 ){
+    zGc__resize( gc, numSlots );
+  }
+  
+  zGc__release_slots(
+    gc                                         ,
+    gc->nextSI.slotIndex                       ,
+    gc->numSlots - gc->nextII.indirectionIndex
+  );
+}
+
+// finishes renumbering, then compacts, all in one go, since the mutator can't run
+// while its ii's are being changed out from under it
+// 
+static inline
+void
+zGc__collect__finish(
+  struct zGc * gc
+){
+  uint64_t * livemap = zGc__cycle__livemap( gc );
+  struct zII * rewrites = zGc__cycle__rewrites( gc );
+  
+  struct zII floorII = gc->cycle.floorII ;
+  
+  uint64_t usedBefore       = gc->nextII.indirectionIndex + gc->nextSI.slotIndex ;
+  uint64_t largeBytesBefore = gc->largeBytes ;
+  uint64_t finalizersBefore = gc->finalizers ;
+  
+  uint64_t enteredAt = zGc__trace__enter( gc, zTRACE_RENUMBER );
+  
+  // everything allocated since the snapshot is alive
+  zLM__mark_range( livemap, gc->cycle.snapshotII.indirectionIndex, gc->nextII.indirectionIndex );
+  
+  // scan the liveness map and record where to relocate each indirection
+  
+  uint64_t numLivemapChunks =
+    gc->nextII.indirectionIndex / 64
+    + !! ( gc->nextII.indirectionIndex % 64 )
+    ;
+  
+  uint32_t finalNewII ;
+  int      renumbered = zSTABLE_HANDLES ; // nothing is, see STABLE-NOTES
+  
+  #if zCOMPACT_THREADS > 1
+  if( zGc__collect__worth_compacting_in_parallel( gc->cycle.renumberChunk, numLivemapChunks ) ){
+    renumbered =
+      zGc__collect__create_rewrite_array_in_parallel(
+        gc                      ,
+        gc->cycle.renumberChunk ,
+        numLivemapChunks        ,
+        rewrites                ,
+        livemap                 ,
+        gc->cycle.nextNewII     ,
+        & finalNewII
+      );
+  }
+  #endif
+  
+  if( ! renumbered ){
+    finalNewII =
+      zGc__collect__create_rewrite_array(
+        gc                      ,
+        gc->cycle.renumberChunk ,
+        numLivemapChunks        ,
+        rewrites                ,
+        livemap                 ,
+        gc->cycle.nextNewII
+      );
+  }
+  
+  zGc__trace__leave( gc, zTRACE_RENUMBER, enteredAt );
+  
+  // now we have our rewrite table, we need to shift everything and rewrite their references
+  
+  enteredAt = zGc__trace__enter( gc, zTRACE_COMPACT );
+  
+  struct zII promotedII ;
+  struct zSI promotedSI ;
+  
+  uint64_t promotions        = 0 ;
+  uint64_t indirectionShifts = 0 ;
+  uint64_t slotShifts        = 0 ;
+  uint64_t referenceRewrites = 0 ;
+  
+  uint32_t nextNewSlot ;
+  int      compacted = 0 ;
+  
+  // the survivors are counted as they're moved, see CENSUS-NOTES
+  zGc__census__reset( gc, floorII );
+  
+  // only the slot data moves, see STABLE-NOTES
+  if( zSTABLE_HANDLES ){
+    finalNewII = zGc__collect__sweep( gc, numLivemapChunks, livemap, floorII );
+    
+    nextNewSlot =
+      zGc__collect__compact_slots(
+        gc                        ,
+        numLivemapChunks          ,
+        livemap                   ,
+        zGc__cycle__slotmap( gc ) ,
+        floorII                   ,
+        gc->cycle.floorSI         ,
+        & slotShifts              ,
+        gc->types
+      );
+    
+    promotedII = (struct zII){ .indirectionIndex = finalNewII };
+    promotedSI = (struct zSI){ .slotIndex = nextNewSlot };
+    compacted  = 1 ;
+  }
+  
+  // pinned objects leave gaps the parallel compactor doesn't know about, see PINNING-NOTES
+  #if zCOMPACT_THREADS > 1
+  if(
+    zGc__collect__worth_compacting_in_parallel( floorII.indirectionIndex / 64, numLivemapChunks )
+    && ! gc->numPinned
+  ){
+    compacted =
+      zGc__collect__compact_in_parallel(
+        gc                     ,
+        numLivemapChunks       ,
+        rewrites               ,
+        livemap                ,
+        floorII                ,
+        gc->cycle.floorSI      ,
+        gc->cycle.promoteAfter ,
+        
+        & promotedII           ,
+        & promotedSI           ,
+        & promotions           ,
+        & indirectionShifts    ,
+        & slotShifts           ,
+        & referenceRewrites    ,
+        & nextNewSlot
+      );
+  }
+  #endif
+  
+  if( ! compacted ){
+    nextNewSlot =
+      zGc__collect__compact_objects_and_rewrite_references(
+        gc                     ,
+        numLivemapChunks       ,
+        rewrites               ,
+        livemap                ,
+        floorII                ,
+        gc->cycle.floorSI      ,
+        gc->cycle.promoteAfter ,
+        
+        & promotedII           ,
+        & promotedSI           ,
+        & promotions           ,
+        & indirectionShifts    ,
+        & slotShifts           ,
+        & referenceRewrites
+      );
+  }
+  
+  zGc__census__count_weak( gc );
+  
+  // the dead of cfreebatch types were only gathered up, see BATCHFREE-NOTES
+  zGc__run_free_batches( gc );
+  
+  zGc__trace__leave( gc, zTRACE_COMPACT, enteredAt );
+  
+  enteredAt = zGc__trace__enter( gc, zTRACE_REWRITE );
+  
+  // with @stableHandles nothing was renumbered, so there's nothing to rewrite, see STABLE-NOTES
+  if( ! zSTABLE_HANDLES ){
+    // rewrite remembered objects, which didn't move, but may reference young objects that did
+    for( uint64_t jj = 0 ; jj < gc->numRemembered ; jj ++ ){
+      zGc__collect__update_references(
+        gc                                            ,
+        rewrites                                      ,
+        zGc__indirection( gc, gc->remembered[ jj ] ) ,
+        floorII                                       ,
+        & referenceRewrites
+      );
+    }
+    
+    // rewrite registers
+    for(
+      uint64_t registerIndex = 0 ;
+      registerIndex < zNUM_REGISTERS ;
+      registerIndex ++
+    ){
+      if( gc->registers[ registerIndex ].indirectionIndex >= floorII.indirectionIndex ){
+        gc->registers[ registerIndex ].indirectionIndex =
+          rewrites[ gc->registers[ registerIndex ].indirectionIndex ].indirectionIndex
+          ;
+      }
+    }
+    
+    // the root stack
+    for( uint64_t jj = 0 ; jj < gc->numRoots ; jj ++ ){
+      if( gc->roots[ jj ].indirectionIndex >= floorII.indirectionIndex ){
+        gc->roots[ jj ] = rewrites[ gc->roots[ jj ].indirectionIndex ] ;
+      }
+    }
+    
+    // and the pinned list
+    for( uint64_t jj = 0 ; jj < gc->numPinned ; jj ++ ){
+      if( gc->pinned[ jj ].indirectionIndex >= floorII.indirectionIndex ){
+        gc->pinned[ jj ] = rewrites[ gc->pinned[ jj ].indirectionIndex ] ;
+      }
+    }
+  }
+  
+  gc->indirectionShifts += indirectionShifts ;
+  gc->slotShifts        += slotShifts        ;
+  gc->referenceRewrites += referenceRewrites ;
+  gc->promotions        += promotions        ;
+  
+  gc->nextII.indirectionIndex = finalNewII  ;
+  gc->nextSI.slotIndex        = nextNewSlot ;
+  
+  gc->oldII = promotedII ;
+  gc->oldSI = promotedSI ;
+  
+  // drop remembered objects that no longer reference anything young, and remember
+  // newly promoted objects that do. when everything got promoted there's nothing
+  // young left to reference at all.
+  // 
+  if( gc->oldII.indirectionIndex == gc->nextII.indirectionIndex ){
+    for( uint64_t jj = 0 ; jj < gc->numRemembered ; jj ++ ){
+      zGc__indirection( gc, gc->remembered[ jj ] )->age = 0 ;
+    }
+    gc->numRemembered = 0 ;
+  } else {
+    uint64_t numKept = 0 ;
+    for( uint64_t jj = 0 ; jj < gc->numRemembered ; jj ++ ){
+      if( zGc__references_young( gc, gc->remembered[ jj ] ) ){
+        gc->remembered[ numKept ++ ] = gc->remembered[ jj ] ;
+      } else {
+        zGc__indirection( gc, gc->remembered[ jj ] )->age = 0 ;
+      }
+    }
+    gc->numRemembered = numKept ;
+    
+    for( uint32_t jj = floorII.indirectionIndex ; jj < gc->oldII.indirectionIndex ; jj ++ ){
+      if( jj % 64 == 0 ){
+        continue ;
+      }
+      
+      if( zGc__references_young( gc, (struct zII){ .indirectionIndex = jj } ) ){
+        zGc__remember( gc, (struct zII){ .indirectionIndex = jj } );
+      }
+    }
+  }
+  
+  gc->cycle.phase = zCYCLE_IDLE ;
+  
+  if( zTARGET_LIVE_RATIO && floorII.indirectionIndex == zNUM_UNIQUE_TYPES + 1 ){
+    zGc__size_for_live_ratio( gc );
+  }
+  
+  gc->usedAfterCollection = gc->nextII.indirectionIndex + gc->nextSI.slotIndex ;
+  
+  gc->lastBytesReclaimed =
+    ( usedBefore - gc->usedAfterCollection ) * zSLOT_SIZE
+    + ( largeBytesBefore - gc->largeBytes )
+    ;
+  gc->bytesReclaimed += gc->lastBytesReclaimed ;
+  
+  gc->largeBytesSinceCollection = 0 ;
+  
+  // the limits were worked out for a heap that's just changed, see ALLOCATION-NOTES
+  gc->allocationLimitII = 0 ;
+  
+  zGc__trace__leave( gc, zTRACE_REWRITE, enteredAt );
+  
+  struct zGcTrace * trace = & gc->cycle.trace ;
+  
+  trace->collection        = gc->collections                                    ;
+  trace->minor             = floorII.indirectionIndex != zNUM_UNIQUE_TYPES + 1 ;
+  trace->finishedAt        = zGc__now()                                         ;
+  trace->indirectionShifts = indirectionShifts                                  ;
+  trace->slotShifts        = slotShifts                                         ;
+  trace->referenceRewrites = referenceRewrites                                  ;
+  trace->promotions        = promotions                                         ;
+  trace->finalizers        = gc->finalizers - finalizersBefore                  ;
+  trace->bytesReclaimed    = gc->lastBytesReclaimed                             ;
+  
+  trace->liveObjects = 0 ;
+  for( uint64_t tt = 0 ; tt <= zNUM_OBJECT_TYPES ; tt ++ ){
+    trace->liveObjects += gc->types[ tt ].liveObjects ;
+  }
+  
+  gc->traces[ gc->numTraces % zTRACE_RING ] = * trace ;
+  gc->numTraces ++ ;
+  
+  gc->collections ++ ;
+  
+  #if zFINALIZER_THREAD
+  zGc__hand_off_finalizers( gc );
+  #endif
+  
+  // puts("");
+  // puts("post-collect");
+  // zGc__stats( gc );
+  // zGc__registers( gc );
+  // zGc__dump( gc );
+}
+
+// collects everything at or above floorII / floorSI in one pause
+// 
+static inline
+void
+zGc__collect__above_floor(
+  struct zGc * gc           ,
+  struct zII   floorII      ,
+  struct zSI   floorSI      ,
+  uint32_t     promoteAfter
+){
+  uint64_t start = zGc__now();
+  
+  zGc__collect__begin(
+    gc           ,
+    floorII      ,
+    floorSI      ,
+    promoteAfter ,
+    gc->nextSI   ,
+    gc->nextII   ,
+    gc->nextSI
+  );
+  
+  zGc__collect__mark( gc, UINT64_MAX );
+  zGc__collect__renumber( gc, UINT64_MAX );
+  zGc__collect__finish( gc );
+  
+  zGc__collect__record_pause( gc, start );
+}
+
+// does a slice of work on the cycle in progress, returning whether the cycle completed.
+// work is in objects marked, or in livemap chunks of 64 objects when renumbering.
+// 
+static inline
+int
+zGc__collect__slice(
+  struct zGc * gc   ,
+  uint64_t     work
+){
+  uint64_t start = zGc__now();
+  int      done  = 0 ;
+  
+  if( gc->cycle.phase == zCYCLE_MARKING ){
+    zGc__collect__mark( gc, work );
+  } else if( zGc__collect__renumber( gc, work / 64 + 1 ) ){
+    zGc__collect__finish( gc );
+    done = 1 ;
+  }
+  
+  zGc__collect__record_pause( gc, start );
+  return done ;
+}
+
+// runs the cycle in progress to completion in a single pause
+// 
+static inline
+void
+zGc__collect__complete_cycle(
+  struct zGc * gc
+){
+  uint64_t start = zGc__now();
+  
+  if( gc->cycle.phase == zCYCLE_MARKING ){
+    zGc__collect__mark( gc, UINT64_MAX );
+  }
+  
+  zGc__collect__renumber( gc, UINT64_MAX );
+  zGc__collect__finish( gc );
+  
+  zGc__collect__record_pause( gc, start );
+}
+
+// full collection, promotes everything that survives it
+// 
+static inline
+void
+zGc__collect(
+  struct zGc * gc
+){
+  // a cycle in progress is a full collection already
+  if( gc->cycle.phase != zCYCLE_IDLE ){
+    zGc__collect__complete_cycle( gc );
+    return ;
+  }
+  
+  // everything gets traced, so the remembered set isn't needed. survivors will
+  // have their remembered flag cleared when they're promoted.
+  gc->numRemembered = 0 ;
+  
+  zGc__collect__above_floor(
+    gc                                                           ,
+    (struct zII){ .indirectionIndex = zNUM_UNIQUE_TYPES + 1 }    ,
+    (struct zSI){ .slotIndex = 0 }                               ,
+    1
+  );
+}
+
+// minor collection, only looks at the young generation
+// 
+static inline
+void
+zGc__collect_minor(
+  struct zGc * gc
+){
+  // without a nursery, the write barrier remembers nothing, so there's no knowing which
+  // old objects reference young ones, see GENERATION-NOTES
+  if( ! zNURSERY_SLOTS ){
+    zGc__collect( gc );
+    return ;
+  }
+  
+  if( gc->cycle.phase != zCYCLE_IDLE ){
+    zGc__collect__complete_cycle( gc );
+    return ;
+  }
+  
+  // reused indirections are young wherever they are, see STABLE-NOTES
+  if( zSTABLE_HANDLES ){
+    zGc__collect( gc );
+    return ;
+  }
+  
+  zGc__collect__above_floor(
+    gc             ,
+    gc->oldII      ,
+    gc->oldSI      ,
+    zPROMOTE_AFTER
+  );
+  
+  gc->minorCollections ++ ;
+}
+
+// begins an incremental full collection, placing its scratch space between the slots
+// and the indirections, see INCREMENTAL-NOTES. returns 0 if there isn't room for it.
+// 
+static inline
+int
+zGc__collect__begin_cycle(
+  struct zGc * gc
+){
+  uint64_t freeSlots =
+    gc->numSlots
+    - gc->nextII.indirectionIndex
+    - gc->nextSI.slotIndex
+    ;
+  
+  // let the indirections grow into a quarter of the free space, and the slots into whatever
+  // is left after that and the scratch space
+  // 
+  uint64_t growth = freeSlots / 4 ;
+  uint64_t limit  = gc->nextII.indirectionIndex + growth ;
+  
+  if( limit > UINT32_MAX ){
+    return 0 ;
+  }
+  
+  uint64_t scratchSlots = zGc__slots_needed_for_collection( gc, limit );
+  
+  if( scratchSlots + growth > freeSlots ){
+    return 0 ;
+  }
+  
+  struct zSI scratchSI = (struct zSI){ .slotIndex = gc->numSlots - limit - scratchSlots };
+  
+  gc->numRemembered = 0 ;
+  
+  uint64_t start = zGc__now();
+  
+  zGc__collect__begin(
+    gc                                                         ,
+    (struct zII){ .indirectionIndex = zNUM_UNIQUE_TYPES + 1 }  ,
+    (struct zSI){ .slotIndex = 0 }                             ,
+    1                                                          ,
+    scratchSI                                                  ,
+    (struct zII){ .indirectionIndex = limit }                  ,
+    scratchSI
+  );
+  
+  #if zCONCURRENT_MARKING
+  zGc__collect__start_marker( gc );
+  #endif
+  
+  zGc__collect__record_pause( gc, start );
+  
+  return 1 ;
+}
+
+// works on an incremental collection for about budgetNs nanoseconds, beginning one if
+// none is in progress. returns whether a collection completed. the final compaction
+// isn't divisible, and may run over the budget, see INCREMENTAL-NOTES
+// 
+static inline
+int
+zGc__collect_step(
+  struct zGc * gc       ,
+  uint64_t     budgetNs
+){
+  uint64_t start = zGc__now();
+  
+  if( gc->cycle.phase == zCYCLE_IDLE && ! zGc__collect__begin_cycle( gc ) ){
+    zGc__collect( gc );
+    return 1 ;
+  }
+  
+  while( zGc__now() - start < budgetNs ){
+    // no use waiting around on the marker thread
+    if( zGc__collect__marker_is_busy( gc ) ){
+      return 0 ;
+    }
+    
+    if( zGc__collect__slice( gc, 1024 ) ){
+      return 1 ;
+    }
+  }
+  
+  return 0 ;
+}
+
+// PERSIST-NOTES
+// 
+// everything in the heap refers to everything else by ii or si rather than by address,
+// so zGc__open can map a heap from a file, and map it back in wherever it lands the
+// next time, without anything in it needing to be fixed up. an empty file is made into
+// a new heap of the size asked for. a file with a heap in it keeps the size it was made
+// with, and is checked against the header at the start of struct zGc, which records the
+// spec, slot size and register count the heap was made for, along with the size of the
+// header itself, which changes whenever the generator adds to it.
+// 
+// the heap is written straight to the file's pages, and zGc__sync waits for them to
+// reach the disk. the remembered set and the pinned list live outside the heap, so
+// before syncing, zGc__sync finishes any cycle in progress and, if anything old refers
+// to something young, promotes the young generation, so nothing in the file depends on
+// them. opening a heap that wasn't synced before its last process let go of it costs
+// a full collection, or a pass over the indirections if anything was left pinned. a
+// process that died partway through a collection leaves a heap that can't be trusted.
+// 
+// large objects would be left behind in mappings of their own, so a file backed heap
+// keeps them in its slots like everything else. cpinned types still need a mapping,
+// and a heap can't be opened again while any are alive in it. anything pointing out of
+// the heap, like what a cinit mallocs, is only good for the process that made it. heap
+// files don't grow.
+// 
+
+// checks the header of a heap mapped from a file, then puts back what didn't outlive
+// the process that last had it open
+// 
+static inline
+void
+zGc__reopen(
+  struct zGc * gc   ,
+  const char * path ,
+  size_t       size
+){
+  if( zUNLIKELY( gc->magic != zHEAP_MAGIC ) ){
+    zGc__panic( "%s doesn't hold a gc", path );
+  }
+  
+  if(
+    zUNLIKELY(
+      gc->headerSize != sizeof( struct zGc )
+      || gc->slotSize != zSLOT_SIZE
+      || gc->numRegisters != zNUM_REGISTERS
+    )
+  ){
+    zGc__panic( "%s holds a gc with a different layout, or from a different version of the generator", path );
+  }
+  
+  if( zUNLIKELY( gc->specHash != zSPEC_HASH ) ){
+    zGc__panic( "%s holds a gc made with a different spec", path );
+  }
+  
+  if( zUNLIKELY( sizeof( struct zGc ) + gc->maxSlots * zSLOT_SIZE > size ) ){
+    zGc__panic( "%s is smaller than the gc it holds", path );
+  }
+  
+  if( zUNLIKELY( gc->largeObjects ) ){
+    zGc__panic( "%s was left holding cpinned objects, whose data wasn't kept in it", path );
+  }
+  
+  gc->remembered    = NULL ;
+  gc->maxRemembered = 0    ;
+  
+  gc->pinned    = NULL ;
+  gc->maxPinned = 0    ;
+  
+  // nor does the root stack
+  gc->roots    = NULL ;
+  gc->numRoots = 0    ;
+  gc->maxRoots = 0    ;
+  
+  // nor do queued finalizers, the buffers kept for cfreebatches, or the finalizer thread,
+  // see DEFER-NOTES and BATCHFREE-NOTES
+  gc->finalizing        = (struct zFinalizerQueue){ 0 } ;
+  gc->pendingFinalizers = 0                              ;
+  
+  memset( gc->freeBatches, 0, sizeof( gc->freeBatches ) );
+  
+  #if zFINALIZER_THREAD
+  gc->finalizerStarted = 0                              ;
+  gc->handedOff        = (struct zFinalizerQueue){ 0 } ;
+  #endif
+  
+  gc->allocationLimitII = 0 ;
+  
+  // pause times are kept for the process that has the heap, see STATS-NOTES
+  gc->longestGc = 0           ;
+  gc->sumGc     = 0           ;
+  gc->pauses    = 0           ;
+  gc->startedAt = zGc__now() ;
+  
+  memset( gc->pauseHistogram, 0, sizeof( gc->pauseHistogram ) );
+  
+  // as are traces, and the hook was a pointer into the process that set it, see TRACE-NOTES
+  gc->numTraces    = 0    ;
+  gc->traceHook    = NULL ;
+  gc->traceContext = NULL ;
+  
+  // pins don't outlive the process that took them
+  if( gc->numPinned ){
+    for( uint32_t jj = zNUM_UNIQUE_TYPES + 1 ; jj < gc->nextII.indirectionIndex ; jj ++ ){
+      struct zIndirection * indirection = zGc__indirection( gc, (struct zII){ .indirectionIndex = jj } );
+      if( jj % 64 && indirection->immediate == zPINNED ){
+        indirection->immediate = 0 ;
+      }
+    }
+    
+    gc->numPinned = 0 ;
+  }
+  
+  // nor does the remembered set. a cycle in progress hasn't touched anything outside
+  // its scratch space yet, so it can be dropped, but it will have emptied the remembered
+  // set while leaving the flags of its members for the end of the cycle to clear
+  // 
+  if( gc->numRemembered || gc->cycle.phase != zCYCLE_IDLE ){
+    gc->cycle.phase = zCYCLE_IDLE ;
+    #if zCONCURRENT_MARKING
+    gc->cycle.markerRunning = 0 ;
+    #endif
+    
+    gc->numRemembered = 0 ;
+    zGc__collect( gc );
+  }
+}
+
+// maps the heap in the file at path, first making a new heap of size bytes in it if the
+// file is empty or doesn't exist yet, see PERSIST-NOTES
+// 
+static inline
+struct zGc *
+zGc__open(
+  const char * path ,
+  size_t       size
+){
+  int fd = open( path, O_RDWR | O_CREAT | O_CLOEXEC, 0666 );
+  if( zUNLIKELY( fd < 0 ) ){
+    zGc__panic( "failed to open gc file %s : %s", path, strerror( errno ) );
+  }
+  
+  struct stat info ;
+  if( zUNLIKELY( fstat( fd, & info ) ) ){
+    zGc__panic( "failed to stat gc file %s : %s", path, strerror( errno ) );
+  }
+  
+  int fresh = info.st_size == 0 ;
+  
+  if( fresh ){
+    if( size < sizeof( struct zGc ) ){
+      zGc__panic( "size is insufficient to hold gc metadata structure" );
+    }
+    
+    if( zUNLIKELY( ( size - sizeof( struct zGc ) ) / zSLOT_SIZE < zMINSLOTS ) ){
+      zGc__panic( "you cannot specify a gc of fewer than " zSTRINGVALUE( zMINSLOTS ) " SLOTS" );
+    }
+    
+    if( zUNLIKELY( ftruncate( fd, size ) ) ){
+      zGc__panic( "failed to size gc file %s : %s", path, strerror( errno ) );
+    }
+  } else {
+    size = info.st_size ;
+    
+    if( zUNLIKELY( size < sizeof( struct zGc ) ) ){
+      zGc__panic( "%s doesn't hold a gc", path );
+    }
+  }
+  
+  char * start = mmap( NULL, size, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0 );
+  if( zUNLIKELY( start == MAP_FAILED ) ){
+    zGc__panic( "failed to map gc file %s : %s", path, strerror( errno ) );
+  }
+  
+  // the mapping keeps its own reference to the file
+  close( fd );
+  
+  struct zGc * gc = (struct zGc *) start ;
+  
+  if( fresh ){
+    uint64_t numSlots = ( size - sizeof( struct zGc ) ) / zSLOT_SIZE ;
+    zGc__initialize( gc, numSlots, numSlots, zCREATE_FILE );
+  } else {
+    zGc__reopen( gc, path, size );
+  }
+  
+  return gc ;
+}
+
+// writes a heap opened with zGc__open out to its file, see PERSIST-NOTES
+// 
+static inline
+void
+zGc__sync(
+  struct zGc * gc
+){
+  if( zUNLIKELY( ! ( gc->options & zCREATE_FILE ) ) ){
+    zGc__panic( "cannot sync a gc that wasn't opened from a file" );
+  }
+  
+  if( gc->cycle.phase != zCYCLE_IDLE ){
+    zGc__collect__complete_cycle( gc );
+  }
+  
+  // with nothing young left, there's nothing for the remembered set to remember
+  if( gc->numRemembered ){
+    zGc__collect__above_floor( gc, gc->oldII, gc->oldSI, 1 );
+    gc->minorCollections ++ ;
+  }
+  
+  if( zUNLIKELY( msync( gc, sizeof( struct zGc ) + gc->maxSlots * zSLOT_SIZE, MS_SYNC ) ) ){
+    zGc__panic( "failed to sync gc file : %s", strerror( errno ) );
+  }
+}
+
+static inline
+int
+zGc__has_sufficient_space_for_allocation(
+  struct zGc * gc            ,
+  uint64_t     numObjects    ,
+  uint64_t     requiredSlots
+){
+  uint64_t requiredIndirections =
+    zGc__indirections_required_for_new( gc, numObjects )
+    ;
+  
+  // a cycle in progress already has its scratch space, we just can't run into it
+  if( gc->cycle.phase != zCYCLE_IDLE ){
+    return
+      gc->nextII.indirectionIndex + requiredIndirections <= gc->cycle.limitII.indirectionIndex
+      && gc->nextSI.slotIndex + requiredSlots <= gc->cycle.limitSI.slotIndex
+      ;
+  }
+  
+  uint64_t availableSlots =
+    gc->numSlots
+    - gc->nextII.indirectionIndex
+    - gc->nextSI.slotIndex
+    ;
+  
+  uint64_t collectSlots =
+    zGc__slots_needed_for_collection(
+      gc                                                 ,
+      gc->nextII.indirectionIndex + requiredIndirections
+    );
+  
+  return requiredIndirections + requiredSlots + collectSlots <= availableSlots ;
+}
+
+static inline
+int
+zGc__nursery_is_full(
+  struct zGc * gc
+){
+  // minor collections wait for any cycle in progress to finish
+  #if zNURSERY_SLOTS
+    return
+      gc->cycle.phase == zCYCLE_IDLE
+      && gc->nextII.indirectionIndex + gc->nextSI.slotIndex - gc->usedAfterCollection >= zNURSERY_SLOTS
+      ;
+  #else
+    zUNUSED( gc );
+    return 0 ;
+  #endif
+}
+
+// has allocations do their share of an incremental collection, beginning one
+// once half of the space left free by the last collection has been used up
+// 
+static inline
+void
+zGc__collect__pay_for_allocation(
+  struct zGc * gc         ,
+  uint64_t     numObjects
+){
+  if( gc->cycle.phase != zCYCLE_IDLE ){
+    if( ! zINCREMENTAL_WORK ){
+      // with only a marker thread doing the work, whatever's left once it's done happens at once
+      if( ! zGc__collect__marker_is_busy( gc ) ){
+        zGc__collect__slice( gc, UINT64_MAX );
+      }
+      return ;
+    }
+    
+    zGc__collect__slice( gc, zINCREMENTAL_WORK * numObjects );
+    return ;
+  }
+  
+  uint64_t used = gc->nextII.indirectionIndex + gc->nextSI.slotIndex ;
+  if( used - gc->usedAfterCollection >= ( gc->numSlots - gc->usedAfterCollection ) / 2 ){
+    zGc__collect__begin_cycle( gc );
+  }
+}
+
+static inline
+void
+zGc__collect_for_allocation(
+  struct zGc * gc            ,
+  uint64_t     numObjects    ,
+  uint64_t     requiredSlots
+){
+  // we've run into the scratch space of the cycle in progress, so it has to finish now
+  if( gc->cycle.phase != zCYCLE_IDLE ){
+    zGc__collect__complete_cycle( gc );
+    
+    if( zLIKELY( zGc__has_sufficient_space_for_allocation( gc, numObjects, requiredSlots ) ) ){
+      return ;
+    }
+  }
+  
+  if( zNURSERY_SLOTS ){
+    zGc__collect_minor( gc );
+    
+    if( zLIKELY( zGc__has_sufficient_space_for_allocation( gc, numObjects, requiredSlots ) ) ){
+      return ;
+    }
+  }
+  
+  zGc__collect( gc );
+  
+  if( zUNLIKELY( ! zGc__has_sufficient_space_for_allocation( gc, numObjects, requiredSlots ) ) ){
+    if( ! zGc__grow_for_allocation( gc, numObjects, requiredSlots ) ){
+      zGc__panic( "could not free sufficient space for requested allocation during gc collection" );
+    }
+  }
+}
+
+// where an object of the given type and size keeps its data, 1 for in its indirection,
+// zLARGE_OBJECT for in a mapping of its own, or 0 for in the slots
+// 
+static inline
+char
+zGc__storage_for(
+  struct zGc * gc            ,
+  struct zOT   objectType    ,
+  size_t       requiredSpace
+){
+  uint64_t immediateBytes = sizeof( ((struct zIndirection){0}).as_immediateData ) ;
+  
+  // cpinned types are kept out of the slots, see PINNING-NOTES
+  static const unsigned char alwaysPinned [] = { 0 $ISCPINNEDS } ;
+  
+  if( alwaysPinned[ objectType.objectType ] ){
+    return zLARGE_OBJECT ;
+  }
+  
+  if( requiredSpace <= immediateBytes ){
+    return 1 ;
+  }
+  
+  // a mapping of its own wouldn't be kept in a heap file, see PERSIST-NOTES
+  if( zGc__is_large_object_size( requiredSpace ) && ! ( gc->options & zCREATE_FILE ) ){
+    return zLARGE_OBJECT ;
+  }
+  
+  return 0 ;
+}
+
+static inline
+uint64_t
+zGc__slots_for(
+  char   storage       ,
+  size_t requiredSpace
+){
+  if( storage == 1 ){
+    return 0 ;
+  }
+  
+  if( storage == zLARGE_OBJECT ){
+    return 1 ;
+  }
+  
+  return requiredSpace / zSLOT_SIZE + ( !! (requiredSpace % zSLOT_SIZE) ) ;
+}
+
+// ALLOCATION-NOTES
+// 
+// whether an allocation can go ahead without collecting depends on the scratch space
+// a collection would need, on the nursery, and on how far along the heap is towards
+// starting an incremental cycle. rather than work all of that out for every object,
+// zGc__refresh_allocation_limit works out how far the indirections and slots in use
+// together can get before any of it could matter, and zGc__new only goes down its
+// slow path once an allocation would pass that, or would take the ii at the end of
+// the current finalmap chunk, after which the scratch space needed could be larger
+// than was allowed for. the limit is only refreshed on the slow path, and anything
+// changing what it depends on, collections, cycles beginning and the heap resizing,
+// sets allocationLimitII to 0 to send the next allocation there. while a cycle runs,
+// every allocation does its share of it on the slow path.
+// 
+// zGc__new and the zGc__new_<type>'s are inline, so for types of a fixed size, the
+// check, and where and in how many slots their data goes, all fold away.
+// 
+
+static inline
+void
+zGc__refresh_allocation_limit(
+  struct zGc * gc
+){
+  gc->allocationLimitII = 0 ;
+  gc->allocationLimit   = 0 ;
+  
+  uint32_t nextII = gc->nextII.indirectionIndex ;
+  
+  if( gc->cycle.phase != zCYCLE_IDLE || nextII % 64 == 0 ){
+    return ;
+  }
+  
+  uint32_t limitII      = ( nextII / 64 + 1 ) * 64 ;
+  uint64_t collectSlots = zGc__slots_needed_for_collection( gc, limitII );
+  
+  if( collectSlots >= gc->numSlots ){
+    return ;
+  }
+  
+  uint64_t limit = gc->numSlots - collectSlots ;
+  
+  if( zNURSERY_SLOTS && gc->usedAfterCollection + zNURSERY_SLOTS < limit ){
+    limit = gc->usedAfterCollection + zNURSERY_SLOTS ;
+  }
+  
+  // the same point zGc__collect__pay_for_allocation begins a cycle at
+  uint64_t beginCycle = gc->usedAfterCollection + ( gc->numSlots - gc->usedAfterCollection ) / 2 ;
+  if( ( zINCREMENTAL_WORK || zCONCURRENT_MARKING ) && beginCycle < limit ){
+    limit = beginCycle ;
+  }
+  
+  gc->allocationLimitII = limitII ;
+  gc->allocationLimit   = limit   ;
+}
+
+// makes room for numObjects new objects taking up requiredSlots slots between them,
+// collecting at most once, so they can all be taken with zGc__take
+// 
+static inline
+void
+zGc__reserve(
+  struct zGc * gc            ,
+  uint64_t     numObjects    ,
+  uint64_t     requiredSlots ,
+  int          anyLarge
+){
+  if( zINCREMENTAL_WORK || zCONCURRENT_MARKING ){
+    zGc__collect__pay_for_allocation( gc, numObjects );
+  }
+  
+  if(
+    zUNLIKELY(
+      ! zGc__has_sufficient_space_for_allocation( gc, numObjects, requiredSlots )
+      || zGc__nursery_is_full( gc )
+      || ( anyLarge && zGc__large_objects_are_due( gc ) )
+    )
+  ){
+    zGc__collect_for_allocation( gc, numObjects, requiredSlots );
+  }
+  
+  zGc__refresh_allocation_limit( gc );
+}
+
+// takes one of the objects made room for by zGc__reserve. the caller keeps the stats.
+// it's the whole of zGc__new's fast path, so it's always inlined, see ALLOCATION-NOTES
+// 
+static inline
+__attribute__(( always_inline ))
+struct zII
+zGc__take(
+  struct zGc * gc            ,
+  struct zOT   objectType    ,
+  size_t       requiredSpace ,
+  char         storage
+){
+  struct zII newII ;
+  
+  // free ones first, see STABLE-NOTES
+  if( zSTABLE_HANDLES && gc->numFree ){
+    newII = gc->freeII ;
+    gc->freeII.indirectionIndex = zGc__indirection( gc, newII )->as_slotIndex.slotIndex ;
+    gc->numFree -- ;
+    
+    if( gc->cycle.phase != zCYCLE_IDLE ){
+      zGc__collect__mark_allocated( gc, newII );
+    }
+  } else {
+    newII =
+      (struct zII){
+        .indirectionIndex =
+          zGc__take_and_increment_skipping_first_of_each_64_and_zeroing_if_skipped(
+            & gc->nextII.indirectionIndex ,
+            zGc__finalmap( gc, gc->nextII )
+          )
+      };
+  }
+  
+  static const unsigned char requiresFinalization [] = { 0 $ISCFREES } ;
+  
+  struct zIndirection * indirection = zGc__indirection( gc, newII );
+  indirection->objectType = objectType ;
+  indirection->immediate  = storage ;
+  indirection->age        = 0 ;
+  
+  if( requiresFinalization[ objectType.objectType ] || storage == zLARGE_OBJECT ){
+    zGc__finalmap__mark( gc, newII );
+  }
+  
+  if( storage == 1 ){
+    memset( indirection->as_immediateData, 0, sizeof( indirection->as_immediateData ) );
+  } else {
+    uint64_t requiredSlots = zGc__slots_for( storage, requiredSpace );
+    
+    // objects allocated during an incremental cycle are alive whether or not they're
+    // reachable, so they'll be walked before their cinit has necessarily set them up
+    memset( zGc__slot( gc, gc->nextSI ), 0, requiredSlots * sizeof( union zSlot ) );
+    
+    if( storage == zLARGE_OBJECT ){
+      * (char **) zGc__slot( gc, gc->nextSI ) = zGc__map_large_object( gc, requiredSpace );
+    }
+    
+    indirection->as_slotIndex = gc->nextSI ;
+    gc->nextSI.slotIndex += requiredSlots ;
+  }
+  
+  return newII ;
+}
+
+// numObjects of objectType were allocated, see CENSUS-NOTES for the per type counts
+// 
+static inline
+void
+zGc__count_allocations(
+  struct zGc * gc            ,
+  struct zOT   objectType    ,
+  uint64_t     numObjects    ,
+  uint64_t     requiredSlots ,
+  uint64_t     requiredBytes
+){
+  gc->bytesAllocated        += requiredBytes ;
+  gc->indirectionsAllocated += numObjects    ; // don't count finalmaps
+  gc->slotsAllocated        += requiredSlots ;
+  gc->allocations           += numObjects    ;
   
-  #define zPREFIX zINLIVE
-  #define zCURRENT_II (ii)
+  gc->types[ objectType.objectType ].allocations    += numObjects    ;
+  gc->types[ objectType.objectType ].bytesAllocated += requiredBytes ;
   
-  static void * zInlineJumps [] = { && zINLIVEcFreeExit $CFREETARGETS } ;
-  (void) zInlineJumps ;
+  #if zWEAK_TYPES
+  if( zGc__type_weakness( objectType ) ){
+    gc->weakObjects += numObjects ;
+  }
+  #endif
+}
+
+static
+__attribute__(( noinline ))
+struct zII
+zGc__new__slow(
+  struct zGc * gc            ,
+  struct zOT   objectType    ,
+  size_t       requiredSpace
+){
+  char     storage       = zGc__storage_for( gc, objectType, requiredSpace );
+  uint64_t requiredSlots = zGc__slots_for( storage, requiredSpace );
   
-  goto * zInlineJumps[ zGc__indirection( gc, ii )->objectType.objectType ];
-  $CFREES
-  zINLIVEcFreeExit:;
+  zGc__reserve( gc, 1, requiredSlots, storage == zLARGE_OBJECT );
   
-  #undef zPREFIX
-  #undef zCURRENT_II
+  struct zII newII = zGc__take( gc, objectType, requiredSpace, storage );
   
-  zGc__finalmap__unmark( gc, ii );
+  zGc__count_allocations( gc, objectType, 1, requiredSlots, requiredSpace );
   
-  gc->finalizers ++ ;
+  return newII ;
 }
 
+// see ALLOCATION-NOTES
+// 
 static inline
-void
-zGc__collect__move_slot_data(
-  struct zGc *          gc                     ,
-  struct zIndirection * newIndirectionLocation ,
-  uint32_t *            nextNewSlot            ,
-  uint64_t *            slotShifts
+struct zII
+zGc__new(
+  struct zGc * gc            ,
+  struct zOT   objectType    ,
+  size_t       requiredSpace
 ){
-  if( ! newIndirectionLocation->immediate && newIndirectionLocation->as_slotIndex.slotIndex != *nextNewSlot ){
-    char * destination = (char *) gc->slots[ *nextNewSlot ].as_chardata ;
-    char * source = (char *) gc->slots[ newIndirectionLocation->as_slotIndex.slotIndex ].as_chardata ;
-    
-    // a gc with no variable sized items will fail if these aren't ignorable
-    zUNUSED( destination );
-    zUNUSED( source );
-    
-    // 
-    // !!! TYPESHIFTS increment nextNewSlot from within the type specific inclusions
-    // !!! TYPESHIFTS increment slotShifts from within type specific inclusions
-    // 
+  char     storage       = zGc__storage_for( gc, objectType, requiredSpace );
+  uint64_t requiredSlots = zGc__slots_for( storage, requiredSpace );
+  
+  if(
+    zUNLIKELY(
+      storage == zLARGE_OBJECT
+      || gc->nextII.indirectionIndex >= gc->allocationLimitII
+      || gc->nextII.indirectionIndex + 1 + gc->nextSI.slotIndex + requiredSlots > gc->allocationLimit
+    )
+  ){
+    return zGc__new__slow( gc, objectType, requiredSpace );
+  }
+  
+  struct zII newII = zGc__take( gc, objectType, requiredSpace, storage );
+  
+  zGc__count_allocations( gc, objectType, 1, requiredSlots, requiredSpace );
+  
+  return newII ;
+}
+
+// BATCH-NOTES
+// 
+// every type also gets a zGc__new_many_<type>( gc, numObjects, out, ... ) that makes
+// numObjects of them at once, writing their ii's to out. each of the type's cargs is
+// passed as an array instead, named for the carg with Each on the end, holding one
+// value for each object, so variable sized types can be made in batches as well. it
+// works out how much room they all need, makes it with a single zGc__reserve, which
+// collects once at most, and then takes and cinits them one after another, keeping
+// the stats only at the end. as with any other ii's, those written to out are only
+// good until the next allocation, and cinits mustn't allocate.
+// 
+
+// SERIALIZE-NOTES
+// 
+// zGc__serialize writes root and everything reachable from it to a buffer, and
+// zGc__deserialize makes a copy of all of it in a heap made from the same spec,
+// returning the copy of root. the writer follows each type's cwalk out from root the
+// way marking does, but keeps its livemap sparsely, as a table holding only the chunks
+// that have something in them. that and the descent array grow with what's reached,
+// rather than being sized for the whole heap, so serializing a small graph costs
+// little however big the heap is. the chunks are then sorted, and what was found in
+// them numbered densely in ii order, the way renumbering would. each object is written
+// as its type, its size in bytes, and its data padded out to 8 bytes, with the ii's in
+// its data swapped for their new numbers. the reserved ii's are written as they are.
+// 
+// the reader checks the whole buffer before allocating anything, makes room for
+// every object with a single zGc__reserve, copies their data in, and then fixes up
+// their references in a single pass over what it made.
+// 
+// data is copied byte for byte and cinits aren't run, so anything pointing outside
+// the heap would end up shared between the copies, and objects of types with a cfree
+// or cfreebatch can't be serialized at all, nor read back from a buffer that has them. buffers are written in the byte order of the machine
+// that wrote them, and have to be read from 8 byte aligned memory.
+// 
+// a buffer is reused from one zGc__serialize to the next, growing as need be, and its
+// data is the caller's to free. zGc__serialize doesn't allocate from the heap, so ii's
+// stay good across it, but zGc__deserialize does.
+// 
+
+#define zSERIALIZE_MAGIC  0x313072655363477allu // "zGcSer01"
+#define zSERIALIZE_HEADER ( 4 * sizeof( uint64_t ) ) // magic, spec hash, number of objects, root
+#define zSERIALIZE_RECORD ( 2 * sizeof( uint64_t ) ) // type and size, before each object's data
+
+struct zBuffer {
+  char *   data ;
+  uint64_t size ;
+  uint64_t max  ;
+};
+
+// makes room for bytes more at the end of the buffer, returning where they go
+// 
+static inline
+char *
+zBuffer__grow(
+  struct zBuffer * buffer ,
+  uint64_t         bytes
+){
+  if( zUNLIKELY( buffer->size + bytes > buffer->max ) ){
+    uint64_t max = buffer->max ? buffer->max * 2 : 4096 ;
+    while( max < buffer->size + bytes ){
+      max *= 2 ;
+    }
     
-    $TYPESHIFTTARGETS
+    char * data = realloc( buffer->data, max );
+    if( zUNLIKELY( ! data ) ){
+      zGc__panic( "failed to grow buffer : %s", strerror( errno ) );
+    }
     
-    goto * typeShiftTargets[ newIndirectionLocation->objectType.objectType ] ;
-    $TYPESHIFTS
-    typeShiftExit:;
+    buffer->data = data ;
+    buffer->max  = max  ;
   }
+  
+  char * end = buffer->data + buffer->size ;
+  buffer->size += bytes ;
+  return end ;
 }
 
+// how many bytes of data an object of the given type at source has, UINT64_MAX if fewer
+// than available bytes would have to be read to find out
+// 
 static inline
-void
-zGc__collect__update_references(
-  struct zGc *          gc                     ,
-  struct zII *          rewrites               ,
-  struct zIndirection * newIndirectionLocation ,
-  uint64_t *            referenceRewrites
+uint64_t
+zGc__data_size(
+  struct zOT objectType ,
+  char *     source     ,
+  uint64_t   available
 ){
-  #define zTYPEWALK_PREFIX zREWRITE
-  
-  #define yield( ptr ) \
-    do{ \
-      (ptr)->indirectionIndex = rewrites[ (ptr)->indirectionIndex ].indirectionIndex ; \
-      referenceRewrites ++ ; \
-    } while( 0 )
+  zUNUSED( source );
+  zUNUSED( available );
   
-  #define zCURRENT_II (zGc__ii( gc, newIndirectionLocation ).indirectionIndex)
-  
-  // type walk targets
-  // 
-  $TYPEWALKTARGETS
+  $TYPEBYTESTARGETS
   
-  // type walks
-  goto * zPASTEVALUE( zTYPEWALK_PREFIX, typeWalkTargets )[ newIndirectionLocation->objectType.objectType ];
-  $TYPEWALKS
-  zPASTEVALUE( zTYPEWALK_PREFIX, typeWalkExit ) :;
+  goto * typeBytesTargets[ objectType.objectType ] ;
+  $TYPEBYTES
+  typeBytesExit:;
   
-  #undef zCURRENT_II
-  #undef yield
-  #undef zTYPEWALK_PREFIX
+  return 0 ;
 }
 
+// what zGc__serialize has reached, see SERIALIZE-NOTES. chunks is an open addressed
+// table of the livemap chunks with anything marked in them, kept at most half full
+// 
+struct zSerializeChunk {
+  uint32_t key  ; // one more than the chunk's index, 0 where there's nothing
+  uint32_t rank ; // how many objects are marked in the chunks before it
+  uint64_t live ;
+};
+
+struct zSerializer {
+  struct zII *             descent    ;
+  uint64_t                 numReached ;
+  uint64_t                 maxReached ;
+  struct zSerializeChunk * chunks     ;
+  uint64_t                 numChunks  ;
+  uint64_t                 mask       ; // one less than the size of chunks
+};
+
+// the entry for livemap chunk chunkIndex, or the empty one it would go in
+// 
 static inline
-uint32_t
-zGc__collect__compact_objects_and_rewrite_references(
-  struct zGc *  gc                ,
-  uint64_t      numLivemapChunks  ,
-  struct zII *  rewrites          ,
-  uint64_t *    livemap           ,
-  
-  uint64_t *    indirectionShifts ,
-  uint64_t *    slotShifts        ,
-  uint64_t *    referenceRewrites
+struct zSerializeChunk *
+zGc__serialize__chunk(
+  struct zSerializeChunk * chunks     ,
+  uint64_t                 mask       ,
+  uint64_t                 chunkIndex
 ){
-  uint32_t nextNewSlot = 0 ;
+  uint64_t index = ( ( chunkIndex + 1 ) * 0x9e3779b97f4a7c15llu ) >> 32 ;
   
-  for(
-    uint32_t chunkIndex = 0 ;
-    chunkIndex < numLivemapChunks ;
-    chunkIndex ++
-  ){
-    if( livemap[ chunkIndex ] ){
-      
-      zGc__warn( "hbb chunk:%llu", (unsigned long long) chunkIndex );
-      
-      // we always skip bitIndex = 0, since that's where our finalmap chunks are located
-      // we'll skip zOT_NULL as well, but who cares since it's static and needs nothing done
-      // 
-      uint64_t bitIndex = 1 ;
-      
-      while( bitIndex < 64 ){
-        
-        unsigned calculatedIndex = chunkIndex * 64 + bitIndex ;
-        struct zII sourceII = (struct zII){ .indirectionIndex = calculatedIndex };
-        
-        if( zLM__marked( livemap, sourceII.indirectionIndex ) ){
-          
-          // move indirection
-          
-          struct zIndirection * newIndirectionLocation =
-            zGc__indirection(
-              gc,
-              (struct zII){
-                .indirectionIndex = 
-                  rewrites[ sourceII.indirectionIndex ].indirectionIndex
-              }
-            );
-          
-          struct zIndirection * oldIndirectionLocation =
-            zGc__indirection( gc, sourceII ) ;
-          
-          // zGc__warn(
-          //   "shifting %llu -> %llu ( %llu->objectType )" ,
-          //   (unsigned long long) zGc__ii( gc, oldIndirectionLocation ).indirectionIndex ,
-          //   (unsigned long long) zGc__ii( gc, newIndirectionLocation ).indirectionIndex ,
-          //   (unsigned long long) oldIndirectionLocation->objectType.objectType
-          // );
-          
-          if( newIndirectionLocation != oldIndirectionLocation ){
-            * newIndirectionLocation = * oldIndirectionLocation ;
-            indirectionShifts ++ ;
-            
-            if( zGc__finalmap__marked( gc, sourceII ) ){
-              zGc__finalmap__unmark( gc, sourceII );
-              zGc__finalmap__mark(
-                gc,
-                (struct zII){
-                  .indirectionIndex = rewrites[ sourceII.indirectionIndex ].indirectionIndex
-                }
-              );
-            }
-          }
-          
-          // move slotdata
-          
-          if(
-            (! newIndirectionLocation->immediate)
-            &&
-            ( newIndirectionLocation->as_slotIndex.slotIndex != nextNewSlot )
-          ){
-            zGc__collect__move_slot_data(
-              gc                     ,
-              newIndirectionLocation ,
-              & nextNewSlot          ,
-              slotShifts
-            );
-          }
-          
-          // update references
-          
-          zGc__collect__update_references(
-            gc                     ,
-            rewrites               ,
-            newIndirectionLocation ,
-            referenceRewrites
-          );
-          
-          // </if livemap[ chunkindex ]>
-          
-        } else if( zGc__finalmap__marked( gc, sourceII ) ){
-          zGc__finalize( gc, sourceII );
-        }
-        
-        bitIndex ++ ;
-      }
-    } else if( zGc__finalmap__any_in_same_chunk( gc, (struct zII){ .indirectionIndex = chunkIndex * 64 } ) ){
-      // the current chunk doesn't have anything alive in it,
-      // but does have items that need to have finalizers called
-      // on them before we're done with them
-      // 
-      
-      zGc__warn( "hmm" );
-      
-      // 1 to skip the finalmap entry at 0
-      uint32_t bitIndex = 1llu ;
-      while( bitIndex < 64 ){
-        struct zII target = (struct zII){ .indirectionIndex = chunkIndex * 64 + bitIndex } ;
-        
-        if( zGc__finalmap__marked( gc, target ) ){
-          zGc__finalize( gc, target );          
-        }
-        
-        bitIndex ++ ;
-      }
-      
-      zGc__finalmap__zero( gc, (struct zII){ .indirectionIndex = chunkIndex * 64 } );
+  for( ;; index ++ ){
+    struct zSerializeChunk * chunk = & chunks[ index & mask ] ;
+    
+    if( chunk->key == chunkIndex + 1 || ! chunk->key ){
+      return chunk ;
     }
   }
-  
-  return nextNewSlot ; 
 }
 
+// doubles the serializer's table of chunks
+// 
 static inline
-uint64_t
-zGc__now(
-  void
+void
+zGc__serialize__grow_chunks(
+  struct zSerializer * serializer
 ){
-  struct timespec spec ;
-  clock_gettime( CLOCK_MONOTONIC, & spec );
-  return (uint64_t) (spec.tv_sec) * 1000000000llu + (uint64_t) (spec.tv_nsec) ;
+  uint64_t                 size   = ( serializer->mask + 1 ) * 2 ;
+  struct zSerializeChunk * chunks = calloc( size, sizeof( struct zSerializeChunk ) );
+  
+  if( zUNLIKELY( ! chunks ) ){
+    zGc__panic( "failed to alloc memory for serializing : %s", strerror( errno ) );
+  }
+  
+  for( uint64_t jj = 0 ; serializer->chunks && jj <= serializer->mask ; jj ++ ){
+    if( serializer->chunks[ jj ].key ){
+      * zGc__serialize__chunk( chunks, size - 1, serializer->chunks[ jj ].key - 1 ) = serializer->chunks[ jj ] ;
+    }
+  }
+  
+  free( serializer->chunks );
+  
+  serializer->chunks = chunks   ;
+  serializer->mask   = size - 1 ;
 }
 
+// marks ii and adds it to the descent array, unless it's reserved or already marked
+// 
 static inline
 void
-zGc__collect(
-  struct zGc * gc
+zGc__serialize__reach(
+  struct zSerializer * serializer ,
+  struct zII           ii
 ){
-  // allocate liveness bitmaps
-  // allocate slot rewrite arrays
+  if( ii.indirectionIndex <= zNUM_UNIQUE_TYPES ){
+    return ;
+  }
   
-  // we first use the rewrite array as a stack for live item descent
-  // for each root
-  //   mark root item in live map, push to live item descent
-  // while items in live item descent
-  //   pop item
-  //   for each child of item
-  //     if child not live
-  //       mark child live
-  //       push to item descent
+  uint64_t                 chunkIndex = ii.indirectionIndex / 64 ;
+  uint64_t                 bit        = 1llu << ( ii.indirectionIndex % 64 ) ;
+  struct zSerializeChunk * chunk      = zGc__serialize__chunk( serializer->chunks, serializer->mask, chunkIndex );
   
-  // scan liveness bitmaps
-  // determine and record new location to rewrite array
+  if( chunk->live & bit ){
+    return ;
+  }
   
-  // scan liveness bitmaps
-  // rewrite indirections and slots
+  if( ! chunk->key ){
+    if( zUNLIKELY( ( serializer->numChunks + 1 ) * 2 > serializer->mask + 1 ) ){
+      zGc__serialize__grow_chunks( serializer );
+      chunk = zGc__serialize__chunk( serializer->chunks, serializer->mask, chunkIndex );
+    }
+    
+    chunk->key = chunkIndex + 1 ;
+    serializer->numChunks ++ ;
+  }
   
-  // rewrite registers
+  chunk->live |= bit ;
   
-  // puts("");
-  // puts("pre-collect");
-  // zGc__stats( gc );
-  // zGc__registers( gc );
-  // zGc__dump( gc );
+  if( zUNLIKELY( serializer->numReached == serializer->maxReached ) ){
+    uint64_t     maxReached = serializer->maxReached ? serializer->maxReached * 2 : 64 ;
+    struct zII * descent    = realloc( serializer->descent, maxReached * sizeof( struct zII ) );
+    
+    if( zUNLIKELY( ! descent ) ){
+      zGc__panic( "failed to alloc memory for serializing : %s", strerror( errno ) );
+    }
+    
+    serializer->descent    = descent    ;
+    serializer->maxReached = maxReached ;
+  }
   
-  uint64_t start = zGc__now();
+  serializer->descent[ serializer->numReached ++ ] = ii ;
+}
+
+// the number an ii is written out as, see SERIALIZE-NOTES
+// 
+static inline
+struct zII
+zGc__serialize__number(
+  struct zSerializer * serializer ,
+  struct zII           ii
+){
+  if( ii.indirectionIndex <= zNUM_UNIQUE_TYPES ){
+    return ii ;
+  }
   
-  uint64_t livemapSlots = zGc__slots_needed_for_collection_livemaps( gc, gc->nextII.indirectionIndex );
-  uint64_t rewriteSlots = zGc__slots_needed_for_collection_rewrites( gc, gc->nextII.indirectionIndex );
+  struct zSerializeChunk * chunk = zGc__serialize__chunk( serializer->chunks, serializer->mask, ii.indirectionIndex / 64 );
+  uint64_t                 below = chunk->live & ( ( 1llu << ( ii.indirectionIndex % 64 ) ) - 1 ) ;
   
-  // zGc__warn(
-  //   "livemapSlots:%llu rewriteSlots:%llu "
-  //   "rewrites(%p-%p) slots(%p-%p) registers(%p-%p) livemap(%p-%p) indirections(%p-%p)",
-  //   (unsigned long long ) livemapSlots,
-  //   (unsigned long long ) rewriteSlots,
-  //   (struct zII *) & gc->slots[ gc->nextSI.slotIndex + livemapSlots ].as_chardata[0] ,
-  //   (union zSlot *) & gc->slots[ gc->nextSI.slotIndex + livemapSlots ].as_chardata[0] 
-  //     + rewriteSlots,
-  //   gc->slots,
-  //   gc->slots + gc->numSlots,
-  //   gc->registers,
-  //   gc->registers + zNUM_REGISTERS,
-  //   (unsigned char *) & gc->slots[ gc->nextSI.slotIndex ].as_chardata[0] ,
-  //   (unsigned char *) & gc->slots[ gc->nextSI.slotIndex ].as_chardata[0] + livemapSlots * sizeof( union zSlot ),
-  //   zGc__indirection( gc, (struct zII){ .indirectionIndex = gc->nextII.indirectionIndex }),
-  //   zGc__indirection( gc, (struct zII){ .indirectionIndex = 1 })
-  // );
+  return (struct zII){
+    .indirectionIndex = zNUM_UNIQUE_TYPES + 1 + chunk->rank + __builtin_popcountll( below )
+  };
+}
+
+// orders chunk indexes for qsort
+// 
+static
+int
+zGc__serialize__compare(
+  const void * left  ,
+  const void * right
+){
+  uint32_t leftChunk  = * (const uint32_t *) left  ;
+  uint32_t rightChunk = * (const uint32_t *) right ;
   
-  uint64_t * livemap = (uint64_t *) & gc->slots[ gc->nextSI.slotIndex ].as_chardata[0] ;
-  struct zII * rewrites = (struct zII *) & gc->slots[ gc->nextSI.slotIndex + livemapSlots ].as_chardata[0] ;
+  return ( leftChunk > rightChunk ) - ( leftChunk < rightChunk ) ;
+}
+
+// appends ii to the buffer, see SERIALIZE-NOTES
+// 
+static inline
+void
+zGc__serialize__write(
+  struct zGc *         gc         ,
+  struct zII           ii         ,
+  struct zSerializer * serializer ,
+  struct zBuffer *     buffer
+){
+  struct zIndirection * indirection = zGc__indirection( gc, ii );
   
-  memset( livemap, 0, livemapSlots * sizeof( union zSlot ) );
-  memset( rewrites, 0, rewriteSlots * sizeof( struct zII ) );
+  char *   data   = zGc__data( gc, ii );
+  uint64_t size   = zGc__data_size( indirection->objectType, data, UINT64_MAX );
+  uint64_t padded = ( size + 7 ) & ~ 7llu ;
   
-  // we first use the rewrite array as a stack for live item descent
-  // we'll keep track of what's alive in the livemap, which is a big fat bitmap
+  char * record = zBuffer__grow( buffer, zSERIALIZE_RECORD + padded );
+  ( (uint64_t *) record )[ 0 ] = indirection->objectType.objectType ;
+  ( (uint64_t *) record )[ 1 ] = size ;
   
-  // records how many live objects we come across, acts as index into descent array
-  // 
-  uint32_t finalDescentIndex = 0 ;
+  char * copy = record + zSERIALIZE_RECORD ;
+  memcpy( copy, data, size );
+  memset( copy + size, 0, padded - size );
   
-  zGc__collect__mark_reserved_in_livemap(
-    livemap
-  );
+  // the copy's ii's are swapped for their new numbers
+  #define yield( ptr ) \
+    do{ \
+      struct zII number = zGc__serialize__number( serializer, * (ptr) ); \
+      memcpy( copy + ( (char *) (ptr) - data ), & number, sizeof( number ) ); \
+    } while( 0 )
   
-  zGc__collect__push_registers_to_descent_array(
-    gc                  ,
-    rewrites            ,
-    livemap             ,
-    & finalDescentIndex
-  );
+  #define zTYPEWALK_PREFIX zSERIALIZE_COPY
   
-  zGc__collect__create_livemap(
-    gc                  ,
-    rewrites            ,
-    livemap             ,
-    & finalDescentIndex
-  );
+  #define zCURRENT_II (ii)
   
-  // now we need to create to create a rewrite array, overwriting the descent array info
-  //   previously stored into it
-  // scan the liveness map and record where to relocate each indirection
+  // type walk targets
+  // 
+  $TYPEWALKTARGETS
   
-  uint64_t numLivemapChunks =
-    gc->nextII.indirectionIndex / 64
-    + !! ( gc->nextII.indirectionIndex % 64 )
-    ;
+  // type walks
+  // 
+  zTYPEWALK( indirection->objectType );
+  $TYPEWALKS
+  zPASTEVALUE( zTYPEWALK_PREFIX, typeWalkExit ):;
   
-  uint32_t finalNewII =
-    zGc__collect__create_rewrite_array(
-      gc               ,
-      numLivemapChunks ,
-      rewrites         ,
-      livemap
-    );
+  #undef zCURRENT_II
+  #undef zTYPEWALK_PREFIX
+  #undef yield
+}
+
+// writes root and everything reachable from it to buffer, replacing what was there
+// 
+static inline
+void
+zGc__serialize(
+  struct zGc *     gc     ,
+  struct zII       root   ,
+  struct zBuffer * buffer
+){
+  static const unsigned char requiresFinalization [] = { 0 $ISCFREES } ;
   
-  // now we have our rewrite table, we need to shift everything and rewrite their references
+  struct zSerializer serializer = { .mask = 31 } ;
+  zGc__serialize__grow_chunks( & serializer );
   
-  uint64_t indirectionShifts = 0 ;
-  uint64_t slotShifts        = 0 ;
-  uint64_t referenceRewrites = 0 ;
+  #define yield( ptr ) zGc__serialize__reach( & serializer, * (ptr) )
   
-  uint32_t nextNewSlot =
-    zGc__collect__compact_objects_and_rewrite_references(
-      gc                  ,
-      numLivemapChunks    ,
-      rewrites            ,
-      livemap             ,
-      
-      & indirectionShifts ,
-      & slotShifts        ,
-      & referenceRewrites
-    );
+  yield( & root );
   
-  // rewrite registers
-  for(
-    uint64_t registerIndex = 0 ;
-    registerIndex < zNUM_REGISTERS ;
-    registerIndex ++
-  ){
-    if( gc->registers[ registerIndex ].indirectionIndex > zNUM_UNIQUE_TYPES + 1 ){
-      gc->registers[ registerIndex ].indirectionIndex =
-        rewrites[ gc->registers[ registerIndex ].indirectionIndex ].indirectionIndex
-        ;
+  for( uint64_t descentIndex = 0 ; descentIndex < serializer.numReached ; descentIndex ++ ){
+    struct zII            current     = serializer.descent[ descentIndex ] ;
+    struct zIndirection * indirection = zGc__indirection( gc, current );
+    
+    if( zUNLIKELY( requiresFinalization[ indirection->objectType.objectType ] ) ){
+      zGc__panic( "cannot serialize II[%" PRIu32 "], its type has a cfree or cfreebatch", current.indirectionIndex );
     }
+    
+    #define zTYPEWALK_PREFIX zSERIALIZE
+    
+    #define zCURRENT_II (current)
+    
+    // type walk targets
+    // 
+    $TYPEWALKTARGETS
+    
+    // type walks
+    // 
+    zTYPEWALK( indirection->objectType );
+    $TYPEWALKS
+    zPASTEVALUE( zTYPEWALK_PREFIX, typeWalkExit ):;
+    
+    #undef zCURRENT_II
+    #undef zTYPEWALK_PREFIX
   }
   
-  uint64_t stop = zGc__now();
-  uint64_t total = stop - start ;
+  #undef yield
   
-  gc->sumGc += total ;
-  gc->longestGc = total > gc->longestGc ? total : gc->longestGc ;
+  // the descent array is done with, so it holds the marked chunks' indexes while they're
+  // put in order, there being no more of them than there are objects
+  // 
+  uint32_t * order     = (uint32_t *) serializer.descent ;
+  uint64_t   numChunks = 0 ;
   
-  gc->indirectionShifts += indirectionShifts ;
-  gc->slotShifts        += slotShifts        ;
-  gc->referenceRewrites += referenceRewrites ;
+  for( uint64_t jj = 0 ; jj <= serializer.mask ; jj ++ ){
+    if( serializer.chunks[ jj ].key ){
+      order[ numChunks ++ ] = serializer.chunks[ jj ].key - 1 ;
+    }
+  }
   
-  gc->nextII.indirectionIndex = finalNewII  ;
-  gc->nextSI.slotIndex        = nextNewSlot ;
+  if( numChunks > 1 ){
+    qsort( order, numChunks, sizeof( uint32_t ), zGc__serialize__compare );
+  }
   
-  gc->collections ++ ;
+  uint32_t numObjects = 0 ;
+  for( uint64_t jj = 0 ; jj < numChunks ; jj ++ ){
+    struct zSerializeChunk * chunk = zGc__serialize__chunk( serializer.chunks, serializer.mask, order[ jj ] );
+    
+    chunk->rank  = numObjects ;
+    numObjects  += __builtin_popcountll( chunk->live );
+  }
   
-  // puts("");
-  // puts("post-collect");
-  // zGc__stats( gc );
-  // zGc__registers( gc );
-  // zGc__dump( gc );
-}
-
-static inline
-int
-zGc__has_sufficient_space_for_allocation(
-  struct zGc * gc            ,
-  uint32_t     requiredSlots
-){
-  uint64_t availableSlots =
-    gc->numSlots
-    - gc->nextII.indirectionIndex
-    - gc->nextSI.slotIndex 
-    ;
+  buffer->size = 0 ;
   
-  uint64_t requiredIndirections =
-    zGc__indirections_required_for_new( gc )
-    ;
+  uint64_t * header = (uint64_t *) zBuffer__grow( buffer, zSERIALIZE_HEADER );
+  header[ 0 ] = zSERIALIZE_MAGIC ;
+  header[ 1 ] = zSPEC_HASH ;
+  header[ 2 ] = numObjects ;
+  header[ 3 ] = zGc__serialize__number( & serializer, root ).indirectionIndex ;
   
-  uint64_t collectSlots =
-    zGc__slots_needed_for_collection(
-      gc                                                 ,
-      gc->nextII.indirectionIndex + requiredIndirections 
-    );
+  for( uint64_t jj = 0 ; jj < numChunks ; jj ++ ){
+    uint64_t live = zGc__serialize__chunk( serializer.chunks, serializer.mask, order[ jj ] )->live ;
+    
+    for( ; live ; live &= live - 1 ){
+      zGc__serialize__write(
+        gc                                                                            ,
+        (struct zII){ .indirectionIndex = order[ jj ] * 64 + __builtin_ctzll( live ) } ,
+        & serializer                                                                  ,
+        buffer
+      );
+    }
+  }
   
-  return requiredIndirections + requiredSlots + collectSlots <= availableSlots ;
+  free( serializer.descent );
+  free( serializer.chunks  );
 }
 
+// makes a copy of what zGc__serialize wrote to buffer, returning the copy of its root
+// 
 static inline
 struct zII
-zGc__new(
-  struct zGc * gc            ,
-  struct zOT   objectType    ,
-  size_t       requiredSpace
+zGc__deserialize(
+  struct zGc *           gc     ,
+  const struct zBuffer * buffer
 ){
-  uint64_t immediateBytes = sizeof( ((struct zIndirection){0}).as_immediateData ) ;
+  static const unsigned char requiresFinalization [] = { 0 $ISCFREES } ;
   
-  uint64_t isImmediate = requiredSpace <= immediateBytes ;
-  uint64_t requiredSlots =
-    isImmediate
-    ? 0
-    : (requiredSpace / zSLOT_SIZE + ( !! (requiredSpace % zSLOT_SIZE) ) )
-    ;
+  const uint64_t * header = (const uint64_t *) buffer->data ;
   
-  if( zUNLIKELY( ! zGc__has_sufficient_space_for_allocation( gc, requiredSlots ) ) ){
-    zGc__collect( gc );
+  if( zUNLIKELY( buffer->size < zSERIALIZE_HEADER || header[ 0 ] != zSERIALIZE_MAGIC ) ){
+    zGc__panic( "buffer doesn't hold a serialized gc graph" );
+  }
+  
+  if( zUNLIKELY( header[ 1 ] != zSPEC_HASH ) ){
+    zGc__panic( "buffer was serialized from a gc with a different spec" );
+  }
+  
+  uint64_t numObjects = header[ 2 ] ;
+  uint64_t endNumber  = zNUM_UNIQUE_TYPES + 1 + numObjects ;
+  
+  if( zUNLIKELY( numObjects > UINT32_MAX || header[ 3 ] >= endNumber ) ){
+    zGc__panic( "buffer holds a malformed gc graph" );
+  }
+  
+  // everything is checked before anything is allocated
+  uint64_t requiredSlots = 0 ;
+  int      anyLarge      = 0 ;
+  
+  uint64_t offset = zSERIALIZE_HEADER ;
+  for( uint64_t jj = 0 ; jj < numObjects ; jj ++ ){
+    if( zUNLIKELY( buffer->size - offset < zSERIALIZE_RECORD ) ){
+      zGc__panic( "buffer holds a truncated gc graph" );
+    }
     
-    if( zUNLIKELY( ! zGc__has_sufficient_space_for_allocation( gc, requiredSlots ) ) ){
-      zGc__panic( "could not free sufficient space for requested allocation during gc collection" );
+    const uint64_t * record    = (const uint64_t *) ( buffer->data + offset );
+    uint64_t         available = buffer->size - offset - zSERIALIZE_RECORD ;
+    uint64_t         size      = record[ 1 ] ;
+    
+    if(
+      zUNLIKELY(
+        record[ 0 ] <= zNUM_UNIQUE_TYPES
+        || record[ 0 ] > zNUM_OBJECT_TYPES
+        || size > available
+        || ( ( size + 7 ) & ~ 7llu ) > available
+      )
+    ){
+      zGc__panic( "buffer holds a malformed gc graph" );
+    }
+    
+    struct zOT objectType = (struct zOT){ .objectType = record[ 0 ] };
+    
+    if( zUNLIKELY( zGc__data_size( objectType, (char *) ( record + 2 ), size ) != size ) ){
+      zGc__panic( "buffer holds a malformed gc graph" );
     }
+    
+    // zGc__serialize never writes these, and their cfrees would run on whatever's in them
+    if( zUNLIKELY( requiresFinalization[ objectType.objectType ] ) ){
+      zGc__panic( "buffer holds an object of type %s, which has a cfree or cfreebatch", zGc__type_name( objectType ) );
+    }
+    
+    char storage = zGc__storage_for( gc, objectType, size );
+    
+    requiredSlots += zGc__slots_for( storage, size );
+    anyLarge      |= storage == zLARGE_OBJECT ;
+    
+    offset += zSERIALIZE_RECORD + ( ( size + 7 ) & ~ 7llu ) ;
   }
   
-  struct zII newII = 
-    (struct zII){
-      .indirectionIndex =
-        zGc__take_and_increment_skipping_first_of_each_64_and_zeroing_if_skipped(
-          & gc->nextII.indirectionIndex ,
-          zGc__finalmap( gc, gc->nextII )
-        )
-    };
+  if( zUNLIKELY( offset != buffer->size ) ){
+    zGc__panic( "buffer holds a malformed gc graph" );
+  }
   
-  static unsigned char requiresFinalization [] = { 0 $ISCFREES } ;
+  struct zII * made = malloc( ( numObjects + 1 ) * sizeof( struct zII ) );
+  if( zUNLIKELY( ! made ) ){
+    zGc__panic( "failed to alloc memory for deserializing : %s", strerror( errno ) );
+  }
   
-  struct zIndirection * indirection = zGc__indirection( gc, newII );
-  indirection->objectType = objectType ;
-  indirection->immediate  = isImmediate ;
+  zGc__reserve( gc, numObjects, requiredSlots, anyLarge );
   
-  if( requiresFinalization[ objectType.objectType ] ){
-    zGc__finalmap__mark( gc, newII );
+  offset = zSERIALIZE_HEADER ;
+  for( uint64_t jj = 0 ; jj < numObjects ; jj ++ ){
+    const uint64_t * record     = (const uint64_t *) ( buffer->data + offset );
+    struct zOT       objectType = (struct zOT){ .objectType = record[ 0 ] };
+    uint64_t         size       = record[ 1 ] ;
+    
+    char       storage    = zGc__storage_for( gc, objectType, size );
+    
+    made[ jj ] = zGc__take( gc, objectType, size, storage );
+    memcpy( zGc__data( gc, made[ jj ] ), record + 2, size );
+    
+    zGc__count_allocations( gc, objectType, 1, zGc__slots_for( storage, size ), size );
+    
+    offset += zSERIALIZE_RECORD + ( ( size + 7 ) & ~ 7llu ) ;
   }
   
-  if( isImmediate ){
-    memset( indirection->as_immediateData, 0, sizeof( indirection->as_immediateData ) );
-  } else {
-    indirection->as_slotIndex = gc->nextSI ;
-    gc->nextSI.slotIndex += requiredSlots ;
-    gc->slotsAllocated += requiredSlots ;
+  #define yield( ptr ) \
+    do{ \
+      if( zUNLIKELY( (ptr)->indirectionIndex >= endNumber ) ){ \
+        zGc__panic( "buffer holds a malformed gc graph" ); \
+      } \
+      if( (ptr)->indirectionIndex > zNUM_UNIQUE_TYPES ){ \
+        * (ptr) = made[ (ptr)->indirectionIndex - zNUM_UNIQUE_TYPES - 1 ] ; \
+      } \
+    } while( 0 )
+  
+  for( uint64_t jj = 0 ; jj < numObjects ; jj ++ ){
+    #define zTYPEWALK_PREFIX zDESERIALIZE
+    
+    #define zCURRENT_II (made[ jj ])
+    
+    // type walk targets
+    // 
+    $TYPEWALKTARGETS
+    
+    // type walks
+    // 
+    zTYPEWALK( zGc__indirection( gc, made[ jj ] )->objectType );
+    $TYPEWALKS
+    zPASTEVALUE( zTYPEWALK_PREFIX, typeWalkExit ):;
+    
+    #undef zCURRENT_II
+    #undef zTYPEWALK_PREFIX
   }
   
-  gc->bytesAllocated        += requiredSpace ;
-  gc->indirectionsAllocated += 1 ; // don't count finalmaps
-  gc->allocations ++ ;
+  struct zII root = (struct zII){ .indirectionIndex = header[ 3 ] };
+  yield( & root );
   
-  return newII ;
+  #undef yield
+  
+  free( made );
+  
+  return root ;
 }
 
 $TYPEDEFINITIONS
@@ -1240,6 +6836,8 @@ $TYPEDEFINITIONS
 
 """
 
+import hashlib
+import re
 import sys
 
 def main():
@@ -1250,6 +6848,22 @@ def main():
     
     numRegisters = 1
     slotSize     = 8
+    nurserySlots = 0
+    promoteAfter = 1
+    incrementalWork = 0
+    concurrentMarking = 0
+    markThreads = 1
+    compactThreads = 1
+    liveRatio = 0
+    largeObjectBytes = 0
+    traceRing = 16
+    usdtProbes = 0
+    stableHandles = 0
+    deferFinalizers = 0
+    finalizerThread = 0
+    
+    # heap files record a hash of the spec they were made with, see PERSIST-NOTES
+    specHash = hashlib.sha1()
     
     for line in specification:
         
@@ -1258,6 +6872,8 @@ def main():
         if (not strippedLine) or strippedLine.startswith( '#' ):
             continue
         
+        specHash.update( strippedLine + '\n' )
+        
         if ':' not in strippedLine:
             raise Exception( 'expected ":" in line %s' % repr( line ) )
         
@@ -1277,6 +6893,60 @@ def main():
             slotSize = int( value )
             continue
         
+        if name == '@nursery':
+            nurserySlots = int( value )
+            continue
+        
+        if name == '@promoteAfter':
+            promoteAfter = int( value )
+            continue
+        
+        if name == '@incremental':
+            incrementalWork = int( value )
+            continue
+        
+        if name == '@concurrent':
+            concurrentMarking = int( value )
+            continue
+        
+        if name == '@markThreads':
+            markThreads = int( value )
+            continue
+        
+        if name == '@compactThreads':
+            compactThreads = int( value )
+            continue
+        
+        if name == '@liveRatio':
+            liveRatio = int( value )
+            continue
+        
+        if name == '@largeObjects':
+            largeObjectBytes = int( value )
+            continue
+        
+        if name == '@traceRing':
+            traceRing = int( value )
+            if traceRing < 1:
+                raise Exception( '@traceRing must keep at least one trace : %s' % repr( line ) )
+            continue
+        
+        if name == '@usdtProbes':
+            usdtProbes = int( value )
+            continue
+        
+        if name == '@stableHandles':
+            stableHandles = int( value )
+            continue
+        
+        if name == '@deferFinalizers':
+            deferFinalizers = int( value )
+            continue
+        
+        if name == '@finalizerThread':
+            finalizerThread = int( value )
+            continue
+        
         if name != 'name' and currentName == None:
             raise Exception( 'data before first name : %s' % repr( line ) )
         
@@ -1300,11 +6970,33 @@ def main():
             
             KNOWN[ currentName ][ name ] = value
     
+    # generations and parallel compaction both rely on ii's staying in allocation order, see STABLE-NOTES
+    if stableHandles and ( nurserySlots or compactThreads > 1 ):
+        raise Exception( '@stableHandles cannot be used with @nursery or @compactThreads' )
+    
+    # the thread only ever runs what's been deferred, see DEFER-NOTES
+    if finalizerThread:
+        deferFinalizers = 1
+    
     for entry in KNOWN.values():
-        if entry.get( 'cfree', None ) == None:
+        # see BATCHFREE-NOTES in the template
+        if 'cfreebatch' in entry:
+            if 'cfree' in entry:
+                raise Exception( 'cannot have both cfree and cfreebatch : %s' % repr( entry['name'] ) )
+            if 'ctype' not in entry:
+                raise Exception( 'cfreebatch without ctype : %s' % repr( entry['name'] ) )
+            if 'csize' in entry:
+                raise Exception( 'cfreebatch needs a fixed size, it cannot have a csize : %s' % repr( entry['name'] ) )
+        
+        if entry.get( 'cfree', None ) == None and entry.get( 'cfreebatch', None ) == None:
             entry['iscfree'] = 0
         else:
             entry['iscfree'] = 1
+        
+        if entry.get( 'cpinned', '0' ) == '0':
+            entry['iscpinned'] = 0
+        else:
+            entry['iscpinned'] = 1
     
     uniqueTypes = [
         vv
@@ -1377,15 +7069,7 @@ def main():
                   # '    zGc__warn( "RW[%%llu]", '
                   # '      (unsigned long long) (rewrites[ zCURRENT_II ].indirectionIndex) '
                   # '    ); '
-                  '    type * this = '
-                  '      (type *) zGc__data( '
-                  '        gc, '
-                  '        (struct zII){ '
-                  '          .indirectionIndex = '
-                  '            rewrites[ zCURRENT_II ].indirectionIndex '
-                  '        } '
-                  '      ) '
-                  '    ; '
+                  '    type * this = (type *) zGc__data( gc, zCURRENT_II ) ; '
                   '    (void) this ; '
                   '    { %(cwalk)s } '
                   '  } while(0) ; '
@@ -1396,6 +7080,17 @@ def main():
     typeDefinitions = []
     for typeDefinition in sorted( KNOWN.values(), key = lambda ee : ee['eno'] ):
         
+        # the cargs as ( ctype, name ) pairs, for passing them to zGc__new_many_<type> as arrays
+        cargPairs = []
+        for carg in ( typeDefinition.get( 'cargs', None ) or '' ).split( ',' ):
+            if not carg.strip():
+                continue
+            match = re.match( r'^\s*(.*?)\s*\b(\w+)\s*$', carg )
+            if not match or not match.group( 1 ):
+                raise Exception( 'cannot make arrays of carg %s of %s' % ( repr( carg ), typeDefinition['name'] ))
+            cargPairs.append( ( match.group( 1 ), match.group( 2 ) ) )
+        
+        
         if not typeDefinition.get( 'ctype', None ):
             # it's a unique type
             typeDefinitions.append(
@@ -1441,7 +7136,7 @@ def main():
             
             typeDefinitions.append(
               (
-                'struct zII zGc__new_%(name)s ( struct zGc * gc %(cargs)s ) { \n'
+                'static inline struct zII zGc__new_%(name)s ( struct zGc * gc %(cargs)s ) { \n'
                 '  typedef zTYPE_%(name)s type ;\n'
                 '  size_t requiredSpace = %(csize)s ;\n'
                 '  struct zII new = zGc__new( gc, zOT_%(name)s, requiredSpace );\n'
@@ -1454,13 +7149,54 @@ def main():
                 typeDefinition
               )
             )
+            
+            bindings = ''.join(
+                '    %s %s = %sEach[ jj ] ; zUNUSED( %s ) ;\n' % ( ctype, name, name, name )
+                for ctype, name in cargPairs
+            )
+            
+            typeDefinitions.append(
+              (
+                'static inline void zGc__new_many_%(name)s ( struct zGc * gc , uint64_t numObjects , struct zII * out %(cmanyargs)s ) { \n'
+                '  typedef zTYPE_%(name)s type ;\n'
+                '  uint64_t requiredSlots = 0 ;\n'
+                '  uint64_t requiredBytes = 0 ;\n'
+                '  int      anyLarge      = 0 ;\n'
+                '  for( uint64_t jj = 0 ; jj < numObjects ; jj ++ ){ \n'
+                '%(bindings)s'
+                '    size_t requiredSpace = %(csize)s ;\n'
+                '    char   storage       = zGc__storage_for( gc, zOT_%(name)s, requiredSpace );\n'
+                '    requiredSlots += zGc__slots_for( storage, requiredSpace );\n'
+                '    requiredBytes += requiredSpace ;\n'
+                '    anyLarge      |= storage == zLARGE_OBJECT ;\n'
+                '  }\n'
+                '  zGc__reserve( gc, numObjects, requiredSlots, anyLarge );\n'
+                '  for( uint64_t jj = 0 ; jj < numObjects ; jj ++ ){ \n'
+                '%(bindings)s'
+                '    size_t requiredSpace = %(csize)s ;\n'
+                '    struct zII new = zGc__take( gc, zOT_%(name)s, requiredSpace, zGc__storage_for( gc, zOT_%(name)s, requiredSpace ) );\n'
+                '    type * this = (type *) zGc__data( gc, new ); \n'
+                '    zUNUSED( this ) ; // allow ignoring this in cinit \n'
+                '    { %(cinit)s } \n'
+                '    out[ jj ] = new ; \n'
+                '  }\n'
+                '  zGc__count_allocations( gc, zOT_%(name)s, numObjects, requiredSlots, requiredBytes );\n'
+                '}\n'
+              ) % (
+                dict(
+                  typeDefinition ,
+                  bindings  = bindings ,
+                  cmanyargs = ''.join( ' , %s * %sEach' % ( ctype, name ) for ctype, name in cargPairs ) ,
+                )
+              )
+            )
     
     typeShiftTargets = []
     typeShiftTargets.append(
       'static void * typeShiftTargets [] = { && typeShiftExit '
     )
     for typeDefinition in sorted( KNOWN.values(), key = lambda ee : ee['eno'] ):
-        if 'cmove' in typeDefinition:
+        if 'ctype' in typeDefinition:
             typeShiftTargets.append(
               ' , && typeShiftTarget_%(name)s ' % typeDefinition
             )
@@ -1474,28 +7210,189 @@ def main():
     
     typeShifts = []
     for typeDefinition in sorted( KNOWN.values(), key = lambda ee : ee['eno'] ):
-        if 'cmove' in typeDefinition:
+        if 'ctype' in typeDefinition:
             typeShifts.append(
                 ( 'typeShiftTarget_%(name)s: { '
                   '  typedef zTYPE_%(name)s type ; '
                   '  type * this = (type *) source ; '
+                  '  (void) this ; '
                   '  uint64_t size = %(cmove)s ; '
-                  '  memmove( destination, source, size ); '
-                  '  nextNewSlot += size / zSLOT_SIZE + (!! (size %% zSLOT_SIZE)); '
-                  '  slotShifts ++ ; '
+                  '  if( destination != source ){ '
+                  '    memmove( destination, source, size ); '
+                  '    (*slotShifts) ++ ; '
+                  '  } '
+                  '  (*nextNewSlot) += size / zSLOT_SIZE + (!! (size %% zSLOT_SIZE)); '
                   '  goto typeShiftExit; '
                   '} '
                 ) % (
-                  typeDefinition
+                  dict( typeDefinition, cmove = typeDefinition.get( 'cmove', 'sizeof( type )' ) )
+                )
+            )
+    
+    typeSizeTargets = []
+    typeSizeTargets.append(
+      'static void * typeSizeTargets [] = { && typeSizeExit '
+    )
+    for typeDefinition in sorted( KNOWN.values(), key = lambda ee : ee['eno'] ):
+        if 'ctype' in typeDefinition:
+            typeSizeTargets.append(
+              ' , && typeSizeTarget_%(name)s ' % typeDefinition
+            )
+        else:
+            typeSizeTargets.append(
+              ' , && typeSizeExit '
+            )
+    typeSizeTargets.append(
+        ' } ; '
+    )
+    
+    typeSizes = []
+    for typeDefinition in sorted( KNOWN.values(), key = lambda ee : ee['eno'] ):
+        if 'ctype' in typeDefinition:
+            typeSizes.append(
+                ( 'typeSizeTarget_%(name)s: { '
+                  '  typedef zTYPE_%(name)s type ; '
+                  '  type * this = (type *) source ; '
+                  '  (void) this ; '
+                  '  uint64_t size = %(cmove)s ; '
+                  '  return size / zSLOT_SIZE + (!! (size %% zSLOT_SIZE)); '
+                  '} '
+                ) % (
+                  dict( typeDefinition, cmove = typeDefinition.get( 'cmove', 'sizeof( type )' ) )
+                )
+            )
+    
+    typeBytesTargets = []
+    typeBytesTargets.append(
+      'static void * typeBytesTargets [] = { && typeBytesExit '
+    )
+    for typeDefinition in sorted( KNOWN.values(), key = lambda ee : ee['eno'] ):
+        if 'ctype' in typeDefinition:
+            typeBytesTargets.append(
+              ' , && typeBytesTarget_%(name)s ' % typeDefinition
+            )
+        else:
+            typeBytesTargets.append(
+              ' , && typeBytesExit '
+            )
+    typeBytesTargets.append(
+        ' } ; '
+    )
+    
+    typeBytes = []
+    for typeDefinition in sorted( KNOWN.values(), key = lambda ee : ee['eno'] ):
+        if 'ctype' in typeDefinition:
+            typeBytes.append(
+                ( 'typeBytesTarget_%(name)s: { '
+                  '  typedef zTYPE_%(name)s type ; '
+                  '  type * this = (type *) source ; '
+                  '  (void) this ; '
+                  '  if( available < sizeof( type ) ){ '
+                  '    return UINT64_MAX ; '
+                  '  } '
+                  '  return %(cmove)s ; '
+                  '} '
+                ) % (
+                  dict( typeDefinition, cmove = typeDefinition.get( 'cmove', 'sizeof( type )' ) )
                 )
             )
     
+    typeNames = []
+    for typeDefinition in sorted( KNOWN.values(), key = lambda ee : ee['eno'] ):
+        typeNames.append(
+          ', "%(name)s" ' % typeDefinition
+        )
+    
+    # weak types, see WEAK-NOTES in the template
+    weaknesses = []
+    weakKeys = []
+    weakValues = []
+    weakTypes = 0
+    ephemeronTypes = 0
+    typeFields = {}
+    for typeDefinition in sorted( KNOWN.values(), key = lambda ee : ee['eno'] ):
+        kinds = [ kind for kind in [ 'cwalk', 'cfields', 'cweak', 'cephemeron' ] if kind in typeDefinition ]
+        if len( kinds ) > 1:
+            raise Exception( 'cannot have more than one of %s : %s' % ( ', '.join( kinds ), repr( typeDefinition['name'] ) ) )
+        
+        fields = []
+        for kind in [ 'cfields', 'cweak', 'cephemeron' ]:
+            if kind in typeDefinition:
+                if 'ctype' not in typeDefinition:
+                    raise Exception( '%s without ctype : %s' % ( kind, repr( typeDefinition['name'] ) ) )
+                
+                fields = [ ff.strip() for ff in typeDefinition[ kind ].split( ',' ) if ff.strip() ]
+                if not fields or len( fields ) != { 'cweak' : 1, 'cephemeron' : 2 }.get( kind, len( fields ) ):
+                    raise Exception( 'wrong number of fields in %s : %s' % ( kind, repr( typeDefinition['name'] ) ) )
+        
+        typeFields[ typeDefinition['name'] ] = fields
+        
+        if 'cweak' in typeDefinition or 'cephemeron' in typeDefinition:
+            weakTypes += 1
+            ephemeronTypes += 'cephemeron' in typeDefinition
+            weaknesses.append( ', %s ' % ( 'zEPHEMERON' if 'cephemeron' in typeDefinition else 'zWEAK_REFERENCE' ) )
+            weakKeys.append(
+              ', offsetof( zTYPE_%s, %s ) / sizeof( struct zII ) ' % ( typeDefinition['name'], fields[ 0 ] )
+            )
+            weakValues.append(
+              ', offsetof( zTYPE_%s, %s ) / sizeof( struct zII ) ' % ( typeDefinition['name'], fields[ -1 ] )
+            )
+        else:
+            weaknesses.append( ', 0 ' )
+            weakKeys.append( ', 0 ' )
+            weakValues.append( ', 0 ' )
+    
+    isleafs = []
+    for typeDefinition in sorted( KNOWN.values(), key = lambda ee : ee['eno'] ):
+        isleafs.append(
+          ', %d ' % (
+            ( 'cwalk' not in typeDefinition and 'cfields' not in typeDefinition )
+            or 'cweak' in typeDefinition
+            or 'cephemeron' in typeDefinition
+          )
+        )
+    
+    fieldMasks = []
+    fieldChecks = []
+    for typeDefinition in sorted( KNOWN.values(), key = lambda ee : ee['eno'] ):
+        fields = typeFields[ typeDefinition['name'] ]
+        if not fields:
+            fieldMasks.append( ', 0 ' )
+            continue
+        
+        fieldMasks.append(
+          ', ( %s ) ' % ' | '.join(
+            '( 1llu << ( offsetof( zTYPE_%s, %s ) / sizeof( struct zII ) ) )' % ( typeDefinition['name'], field )
+            for field in fields
+          )
+        )
+        
+        for field in fields:
+            fieldChecks.append(
+              (
+                '_Static_assert( '
+                '__builtin_types_compatible_p( __typeof__( ( (zTYPE_%(name)s *) 0 )->%(field)s ), struct zII ) '
+                '&& offsetof( zTYPE_%(name)s, %(field)s ) %% sizeof( struct zII ) == 0 '
+                '&& offsetof( zTYPE_%(name)s, %(field)s ) < 64 * sizeof( struct zII ), '
+                '"fields of %(name)s must be struct zII fields within its first 64 words : %(field)s" );'
+              ) % {
+                'name'  : typeDefinition['name'] ,
+                'field' : field                   ,
+              }
+            )
+    
     iscfrees = []
     for typeDefinition in sorted( KNOWN.values(), key = lambda ee : ee['eno'] ):
         iscfrees.append(
           ', %d ' % typeDefinition['iscfree']
         )
     
+    iscpinneds = []
+    for typeDefinition in sorted( KNOWN.values(), key = lambda ee : ee['eno'] ):
+        iscpinneds.append(
+          ', %d ' % typeDefinition['iscpinned']
+        )
+    
     cfreeTargets = []
     for typeDefinition in sorted( KNOWN.values(), key = lambda ee : ee['eno'] ):
         if 'cfree' in typeDefinition:
@@ -1514,7 +7411,7 @@ def main():
                 (
                     'zPASTEVALUE( zPREFIX, cfreeTarget__%(name)s ): { \n'
                     '  typedef zTYPE_%(name)s type ; \n'
-                    '  type * this = zGc__data( gc, zCURRENT_II ); \n'
+                    '  type * this = zCURRENT_DATA ; \n'
                     '  (void) this ; \n'
                     '  %(cfree)s ; \n'
                     '  goto zPASTEVALUE( zPREFIX, cFreeExit ); \n'
@@ -1522,6 +7419,47 @@ def main():
                 ) % typeDefinition
             )
     
+    freeBatchSizes = []
+    freeBatchTypes = 0
+    for typeDefinition in sorted( KNOWN.values(), key = lambda ee : ee['eno'] ):
+        if 'cfreebatch' in typeDefinition:
+            freeBatchTypes += 1
+            freeBatchSizes.append(
+                ', sizeof( zTYPE_%(name)s ) ' % typeDefinition
+            )
+        else:
+            freeBatchSizes.append(
+                ', 0 '
+            )
+    
+    cfreeBatchTargets = []
+    for typeDefinition in sorted( KNOWN.values(), key = lambda ee : ee['eno'] ):
+        if 'cfreebatch' in typeDefinition:
+            cfreeBatchTargets.append(
+                ' , && zPASTEVALUE( zPREFIX, cfreeBatchTarget__%(name)s ) ' % typeDefinition
+            )
+        else:
+            cfreeBatchTargets.append(
+                ' , && zPASTEVALUE( zPREFIX, cFreeBatchExit ) '
+            )
+    
+    cfreeBatches = []
+    for typeDefinition in sorted( KNOWN.values(), key = lambda ee : ee['eno'] ):
+        if 'cfreebatch' in typeDefinition:
+            cfreeBatches.append(
+                (
+                    'zPASTEVALUE( zPREFIX, cfreeBatchTarget__%(name)s ): { \n'
+                    '  typedef zTYPE_%(name)s type ; \n'
+                    '  type * these = zCURRENT_BATCH ; \n'
+                    '  uint64_t count = zCURRENT_COUNT ; \n'
+                    '  (void) these ; \n'
+                    '  (void) count ; \n'
+                    '  %(cfreebatch)s ; \n'
+                    '  goto zPASTEVALUE( zPREFIX, cFreeBatchExit ); \n'
+                    '}\n'
+                ) % typeDefinition
+            )
+    
     template = TEMPLATE
     for name, replacement in [
       ('$NUMREGISTERS'      , str( numRegisters )),
@@ -1531,14 +7469,46 @@ def main():
       ('$TYPEWALKS'         , '\n'.join( typeWalks )),
       ('$TYPESHIFTTARGETS'  , '\n'.join( typeShiftTargets )),
       ('$TYPESHIFTS'        , '\n'.join( typeShifts )),
+      ('$TYPESIZETARGETS'   , '\n'.join( typeSizeTargets )),
+      ('$TYPESIZES'         , '\n'.join( typeSizes )),
+      ('$TYPEBYTESTARGETS'  , '\n'.join( typeBytesTargets )),
+      ('$TYPEBYTES'         , '\n'.join( typeBytes )),
       ('$UNIQUETYPES'       , str( len( uniqueTypes ))),
       ('$OBJECTTYPES'       , str( len( KNOWN ))),
+      ('$WEAKTYPES'         , str( weakTypes )),
+      ('$EPHEMERONTYPES'    , str( ephemeronTypes )),
       ('$SLOTSIZE'          , str( slotSize )),
+      ('$NURSERYSLOTS'      , str( nurserySlots )),
+      ('$PROMOTEAFTER'      , str( promoteAfter )),
+      ('$INCREMENTALWORK'   , str( incrementalWork )),
+      ('$CONCURRENTMARKING' , str( concurrentMarking )),
+      ('$MARKTHREADS'       , str( markThreads )),
+      ('$COMPACTTHREADS'    , str( compactThreads )),
+      ('$LIVERATIO'         , str( liveRatio )),
+      ('$LARGEOBJECTBYTES'  , str( largeObjectBytes )),
+      ('$TRACERING'         , str( traceRing )),
+      ('$USDTPROBES'        , str( usdtProbes )),
+      ('$STABLEHANDLES'     , str( stableHandles )),
+      ('$DEFERFINALIZERS'   , str( deferFinalizers )),
+      ('$FINALIZERTHREAD'   , str( finalizerThread )),
+      ('$SPECHASH'          , '0x%sllu' % specHash.hexdigest()[ :16 ] ),
       ('$UNIQUERESERVATIONS', '\n'.join( uniqueTypeReservations )),
       ('$TYPEDEFINITIONS'   , '\n'.join( typeDefinitions )),
+      ('$TYPENAMES'         , '\n'.join( typeNames )),
+      ('$ISLEAFS'           , '\n'.join( isleafs )),
+      ('$FIELDMASKS'        , '\n'.join( fieldMasks )),
+      ('$FIELDCHECKS'       , '\n'.join( fieldChecks )),
+      ('$WEAKNESSES'        , '\n'.join( weaknesses )),
+      ('$WEAKKEYS'          , '\n'.join( weakKeys )),
+      ('$WEAKVALUES'        , '\n'.join( weakValues )),
       ('$ISCFREES'          , '\n'.join( iscfrees )),
+      ('$ISCPINNEDS'        , '\n'.join( iscpinneds )),
       ('$CFREETARGETS'      , '\n'.join( cfreeTargets )),
       ('$CFREES'            , '\n'.join( cfrees )),
+      ('$FREEBATCHTYPES'    , str( freeBatchTypes )),
+      ('$FREEBATCHSIZES'    , '\n'.join( freeBatchSizes )),
+      ('$CFREEBATCHTARGETS' , '\n'.join( cfreeBatchTargets )),
+      ('$CFREEBATCHES'      , '\n'.join( cfreeBatches )),
     ]:
       template = template.replace( name, replacement )
     